@@ -0,0 +1,10 @@
+from fastapi import APIRouter, Query
+from app.schemas.api.autocomplete import AutocompleteField, AutocompleteResponse
+from app.services.autocomplete import autocomplete_index
+
+router = APIRouter(prefix="/api", tags=["autocomplete"])
+
+@router.get("/autocomplete", response_model=AutocompleteResponse)
+def autocomplete(field: AutocompleteField, q: str = "", limit: int = Query(10, ge=1, le=50)):
+    # 메모리 prefix 인덱스 조회 (ES 요청 없음, 인덱스 구축 전이면 빈 목록)
+    return AutocompleteResponse(field=field, query=q, suggestions=autocomplete_index.suggest(field, q, limit))
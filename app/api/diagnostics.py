@@ -0,0 +1,39 @@
+from fastapi import APIRouter, Header, HTTPException
+from fastapi.responses import PlainTextResponse
+from app.observability.profiling import diagnostics_store, is_authorized
+
+router = APIRouter(prefix="/diagnostics", tags=["diagnostics"], include_in_schema=False)
+
+def _authorize(token: str | None):
+    # 프로파일링 결과에는 코드 경로/파일 위치가 포함되므로 요청 시와 같은 토큰 필요
+    if not is_authorized(token):
+        raise HTTPException(status_code=403, detail="진단 조회 권한이 없습니다.")
+
+def _get_entry(trace_id: str) -> dict:
+    entry = diagnostics_store.get(trace_id)
+    if entry is None:
+        raise HTTPException(status_code=404, detail=f"trace id {trace_id}의 진단 결과가 없습니다.")
+    return entry
+
+@router.get("")
+def list_diagnostics(x_profile: str | None = Header(None)):
+    # 보관 중인 진단 결과 목록 (최근 순)
+    _authorize(x_profile)
+    return [
+        {"trace_id": trace_id, "method": entry["method"], "path": entry["path"],
+         "status": entry["status"], "duration_ms": entry["duration_ms"]}
+        for trace_id, entry in diagnostics_store.recent()
+    ]
+
+@router.get("/{trace_id}")
+def get_diagnostics(trace_id: str, x_profile: str | None = Header(None)):
+    # 요청 요약 + 상위 스택 + 상위 할당 위치 (collapsed stack은 /flamegraph로 조회)
+    _authorize(x_profile)
+    entry = _get_entry(trace_id)
+    return {key: value for key, value in entry.items() if key != "collapsed"}
+
+@router.get("/{trace_id}/flamegraph", response_class=PlainTextResponse)
+def get_flamegraph(trace_id: str, x_profile: str | None = Header(None)):
+    # collapsed stack 형식 (flamegraph.pl, speedscope에서 바로 열 수 있음)
+    _authorize(x_profile)
+    return PlainTextResponse(_get_entry(trace_id)["collapsed"])
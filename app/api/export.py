@@ -0,0 +1,17 @@
+from typing import Literal
+from fastapi import APIRouter
+from fastapi.responses import StreamingResponse
+from app.schemas.api.search import SearchRequest
+from app.services.export_service import export_ct_documents, EXPORT_MEDIA_TYPES
+
+router = APIRouter(prefix="/api", tags=["export"])
+
+@router.post("/search/export")
+def export(request: SearchRequest, format: Literal["ndjson", "csv"] = "ndjson"):
+    # 검색 조건에 맞는 전체 문서를 ES 페이지 단위로 스트리밍 (size/cursor는 무시)
+    # 동기 generator는 청크 전송이 끝난 뒤 다음 페이지를 조회하므로 클라이언트 속도에 맞춰 진행됨
+    return StreamingResponse(
+        export_ct_documents(request, format),
+        media_type=EXPORT_MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="ct_documents.{format}"'}
+    )
@@ -0,0 +1,22 @@
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+from app.observability.metrics import render_metrics
+from app.observability.es_stats import es_stats_collector
+from app.services.shadow import shadow_runner
+
+router = APIRouter(tags=["metrics"])
+
+@router.get("/metrics", response_class=PlainTextResponse, include_in_schema=False)
+def metrics():
+    # Prometheus text exposition format
+    return PlainTextResponse(render_metrics(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+@router.get("/metrics/es")
+def es_metrics():
+    # Elasticsearch 인덱스/노드 통계 최근 스냅샷 + rolling window 요약
+    return es_stats_collector.report()
+
+@router.get("/metrics/shadow")
+def shadow_metrics():
+    # 섀도 실행 후보 전략별 지연 시간 차이 / 결과 겹침 요약
+    return shadow_runner.report()
@@ -1,22 +1,39 @@
-from fastapi import APIRouter
-from app.schemas.api.search import SearchRequest, SearchResponse
+from fastapi import APIRouter, HTTPException
+from app.schemas.api.search import SearchRequest, SearchResponse, BatchSearchRequest, BatchSearchResponse
 from app.schemas.api.generate import GenerateRequest, GenerateResponse
 from app.schemas.common import (
     SpecialNote, PackingInfo, ExperimentInfo, Document
 )
-from app.services.search_service import get_ct_document
+from app.services.search_service import get_ct_document_page
+from app.services.batch_search import search_ct_documents_batch
+from app.api.responses import ModelORJSONResponse
+from app.observability.capture import capture_search_request
 
 router = APIRouter(prefix="/api", tags=["document"])
 
-@router.post("/search", response_model=SearchResponse)
-async def search(request: SearchRequest):
+@router.post("/search/batch", response_model=BatchSearchResponse, response_class=ModelORJSONResponse)
+def search_batch(request: BatchSearchRequest):
+    """
+    여러 검색 요청의 첫 페이지를 한 번에 검색 (비교 화면용)
+    쿼리 임베딩은 요청 간 중복 제거, ES 검색은 _msearch로 묶어서 실행
+    응답은 요청 순서대로, 실패한 요청은 result 대신 error
+    임베딩 API / ES 호출이 블로킹이므로 동기 함수로 두어 스레드 풀에서 실행 (이벤트 루프를 막지 않음)
+    """
+    return ModelORJSONResponse(search_ct_documents_batch(request.requests))
+
+@router.post("/search", response_model=SearchResponse, response_class=ModelORJSONResponse)
+def search(request: SearchRequest):
+    # 임베딩 API / ES 호출이 블로킹이므로 동기 함수로 두어 스레드 풀에서 실행 (search_batch와 동일)
+    # 부하 재현용 요청 캡처 (QUERY_CAPTURE_PATH 지정 시)
+    capture_search_request(request)
 
     if request.packages:
-        documents = get_ct_document(request)
-        return SearchResponse(
-            results=documents,
-            total=len(documents)
-        )
+        try:
+            # 서비스에서 만든 응답을 response_model 재검증 없이 orjson으로 직렬화
+            return ModelORJSONResponse(get_ct_document_page(request))
+        except ValueError as e:
+            # 잘못되었거나 만료된 페이지 토큰
+            raise HTTPException(status_code=400, detail=str(e))
 
     # 요청 바디(request)는 SearchRequest 타입으로 자동 검증됨
     return SearchResponse(
@@ -0,0 +1,16 @@
+from typing import Any
+from fastapi.responses import ORJSONResponse
+from pydantic import BaseModel
+from app.observability.metrics import stage
+
+class ModelORJSONResponse(ORJSONResponse):
+    """
+    이미 검증된 pydantic 모델(또는 같은 구조의 dict)을 orjson으로 바로 직렬화하는 응답
+    엔드포인트에서 이 응답 객체를 직접 반환하면 FastAPI의 response_model 재검증/직렬화 단계를 건너뜀
+    (response_model은 OpenAPI 문서용으로만 사용)
+    """
+    def render(self, content: Any) -> bytes:
+        with stage("serialization"):
+            if isinstance(content, BaseModel):
+                content = content.model_dump()
+            return super().render(content)
@@ -8,11 +8,35 @@ load_dotenv()
 ELASTICSEARCH_HOST = os.getenv("ELASTICSEARCH_HOST")
 ELASTICSEARCH_USER = os.getenv("ELASTICSEARCH_USER")
 ELASTICSEARCH_PASSWORD = os.getenv("ELASTICSEARCH_PASSWORD")
+# 클라이언트 종류 (elasticsearch: 실제 클러스터, memory: 프로세스 내 대체 구현 - 테스트/오프라인 벤치마크용)
+ELASTICSEARCH_BACKEND = os.getenv("ELASTICSEARCH_BACKEND", "elasticsearch")
 
-def get_es_client():
+# 프로세스 공용 클라이언트 (모든 모듈이 같은 커넥션 풀 사용)
+_shared_client = None
+
+def create_es_client(backend: str = None):
+    """새 Elasticsearch 클라이언트 생성"""
+    backend = backend or ELASTICSEARCH_BACKEND
+    if backend == "memory":
+        from app.elasticsearch.memory import InMemoryElasticsearch
+        return InMemoryElasticsearch()
+    if backend != "elasticsearch":
+        raise ValueError(f"지원하지 않는 ELASTICSEARCH_BACKEND: {backend}")
     return Elasticsearch(
         ELASTICSEARCH_HOST,
         basic_auth=(ELASTICSEARCH_USER, ELASTICSEARCH_PASSWORD),
         verify_certs=False,
         ssl_show_warn=False  # SSL 경고 억제
-    )
\ No newline at end of file
+    )
+
+def get_es_client():
+    """공용 Elasticsearch 클라이언트 반환 (최초 호출 시 생성)"""
+    global _shared_client
+    if _shared_client is None:
+        _shared_client = create_es_client()
+    return _shared_client
+
+def set_es_client(client):
+    """공용 클라이언트 교체 (테스트/벤치마크에서 InMemoryElasticsearch 주입용, None이면 다음 호출 시 새로 생성)"""
+    global _shared_client
+    _shared_client = client
@@ -0,0 +1,247 @@
+"""
+업체/재질 정규 ID 사전 (같은 업체의 여러 표기를 하나의 keyword로 필터링)
+
+같은 포장재 업체가 "펌텍", "펌텍코리아", "Pumtech"처럼 제각각 입력되어 match/fuzziness 없이는
+찾을 수 없으므로 색인 시점에 정규 ID로 바꿔 저장하고 검색 입력도 같은 사전으로 한 번만 변환
+- 색인: packing_info[].company_id / material_id, 문서 단위 company_ids / material_ids (keyword)
+- 사전: 코퍼스에서 추출(mine)한 JSON (CT_ENTITY_DICTIONARY) + 코드의 수동 지정(ENTITY_OVERRIDES, 우선)
+- 사전에 없는 값은 정규화 키(공백/대소문자/법인 접미사 제거)가 그대로 ID
+
+사전 추출 (업체/재질 표기 집계 → 정규화 키 + 유사 표기 묶음 → 가장 많이 쓰인 표기를 ID로):
+  python -m app.elasticsearch.entities mine --output entity_dictionary.json
+  CT_ENTITY_DICTIONARY=entity_dictionary.json 로 서버/적재 실행
+사전이 바뀌면 content_hash(dictionary_fingerprint 포함)가 달라져 다음 적재에서 기존 문서도 다시 씀
+"""
+from typing import Any, Dict, List, Optional, Tuple
+from difflib import SequenceMatcher
+import argparse
+import hashlib
+import json
+import logging
+import os
+import re
+import threading
+
+from app.elasticsearch.normalization import normalize_keyword, fold_width
+
+logger = logging.getLogger("ct_search.entities")
+
+ENTITY_KINDS = ("company", "material")
+# 추출한 사전 JSON 경로 ({"company": {"표기": "ID"}, "material": {...}}, 없으면 수동 지정만 사용)
+ENTITY_DICTIONARY_PATH = os.getenv("CT_ENTITY_DICTIONARY", "")
+# 추출 시 같은 업체로 묶을 정규화 키 유사도 (SequenceMatcher ratio) / 최소 길이
+CLUSTER_SIMILARITY = float(os.getenv("CT_ENTITY_CLUSTER_SIMILARITY", "0.9"))
+CLUSTER_MIN_LENGTH = 5
+
+# 수동 지정: ID → 표기 목록 (추출 결과보다 우선, 영문/한글 표기처럼 자동으로 묶을 수 없는 경우)
+ENTITY_OVERRIDES: Dict[str, Dict[str, List[str]]] = {
+    "company": {
+        "펌텍": ["펌텍코리아", "Pumtech", "Pumtech Korea", "PUMTECH KOREA"],
+        "연우": ["Yonwoo", "연우코리아"],
+        "삼화": ["Samhwa", "삼화플라스틱"],
+        "에이치피씨": ["HPC"],
+    },
+    "material": {
+        "pet": ["페트", "P.E.T"],
+        "pp": ["폴리프로필렌", "P.P"],
+        "pe": ["폴리에틸렌", "P.E"],
+        "알루미늄": ["AL", "Aluminum", "Aluminium", "알미늄"],
+        "유리": ["Glass"],
+        "실리콘": ["Silicone", "Silicon"],
+    },
+}
+
+# 업체 정규화 키에서 제거할 법인/지역 접미사·접두사 (공백 제거 전 소문자 표기에서 비교)
+# 영문 접미사는 앞에 공백/쉼표/마침표가 있을 때만 제거 ("zinc", "decorp"의 일부를 지우지 않도록)
+_COMPANY_AFFIXES = re.compile(
+    r"^(?:\(주\)|㈜|주식회사)"
+    r"|(?:\(주\)|㈜|주식회사|코리아|(?:^|[\s,.]+)(?:korea|co\.?,?\s*ltd\.?|co\.|ltd\.?|inc\.?|corp\.?))$"
+)
+# 재질 정규화 키에서 제거할 구분 기호 (P.E.T → pet)
+_MATERIAL_PUNCTUATION = re.compile(r"[.\-_/·]")
+
+def entity_key(kind: str, value: Any) -> Optional[str]:
+    """비교용 정규화 키 (keyword_normalizer 규칙 + 업체 접미사 / 재질 구분 기호 제거)"""
+    key = normalize_keyword(value)
+    if not key:
+        return None
+    if kind == "company":
+        stripped = fold_width(str(value).lower()).strip()
+        while True:
+            shorter = _COMPANY_AFFIXES.sub("", stripped).strip()
+            if shorter == stripped or not shorter:
+                break
+            stripped = shorter
+        key = normalize_keyword(stripped) or key
+    else:
+        key = _MATERIAL_PUNCTUATION.sub("", key) or key
+    return key
+
+_dictionary: Optional[Dict[str, Dict[str, str]]] = None
+_fingerprint = ""
+_dictionary_lock = threading.Lock()
+
+def _build_dictionary(mined: Dict[str, Dict[str, str]]) -> Dict[str, Dict[str, str]]:
+    """추출 사전 + 수동 지정 → 종류별 {정규화 키: ID}"""
+    dictionary = {}
+    for kind in ENTITY_KINDS:
+        aliases = {}
+        for alias, entity_id in (mined.get(kind) or {}).items():
+            key = entity_key(kind, alias)
+            if key:
+                aliases[key] = entity_id
+        for entity_id, names in ENTITY_OVERRIDES.get(kind, {}).items():
+            for name in [entity_id, *names]:
+                key = entity_key(kind, name)
+                if key:
+                    aliases[key] = entity_id
+        dictionary[kind] = aliases
+    return dictionary
+
+def load_dictionary(path: str = None) -> Dict[str, Dict[str, str]]:
+    """사전 로드 (경로가 없거나 파일이 없으면 수동 지정만)"""
+    path = ENTITY_DICTIONARY_PATH if path is None else path
+    mined = {}
+    if path:
+        try:
+            with open(path, encoding="utf-8") as f:
+                mined = json.load(f)
+        except FileNotFoundError:
+            logger.warning("업체/재질 사전 파일 없음: %s (수동 지정만 사용)", path)
+    return _build_dictionary(mined)
+
+def _install(dictionary: Dict[str, Dict[str, str]]):
+    global _dictionary, _fingerprint
+    payload = json.dumps(dictionary, ensure_ascii=False, sort_keys=True)
+    _fingerprint = hashlib.sha1(payload.encode("utf-8")).hexdigest()[:12]
+    _dictionary = dictionary
+
+def get_dictionary() -> Dict[str, Dict[str, str]]:
+    if _dictionary is None:
+        with _dictionary_lock:
+            if _dictionary is None:
+                _install(load_dictionary())
+    return _dictionary
+
+def set_dictionary(mined: Dict[str, Dict[str, str]]):
+    """추출 사전 교체 (사전 갱신 후 프로세스 재시작 없이 적용)"""
+    with _dictionary_lock:
+        _install(_build_dictionary(mined))
+
+def dictionary_fingerprint() -> str:
+    """사전 내용 해시 (content_hash에 포함해 사전 변경 시 문서를 다시 쓰도록 함)"""
+    get_dictionary()
+    return _fingerprint
+
+def lookup_entity(kind: str, value: Any) -> Optional[str]:
+    """사전에 등록된 표기면 ID, 아니면 None (전체 텍스트 검색에서 업체/재질 단어 판별용)"""
+    key = entity_key(kind, value)
+    if not key:
+        return None
+    return get_dictionary()[kind].get(key)
+
+def resolve_entity(kind: str, value: Any) -> Optional[str]:
+    """표기 → 정규 ID (사전에 없으면 정규화 키, 빈 값이면 None)"""
+    key = entity_key(kind, value)
+    if not key:
+        return None
+    return get_dictionary()[kind].get(key, key)
+
+def company_id(value: Any) -> Optional[str]:
+    return resolve_entity("company", value)
+
+def material_id(value: Any) -> Optional[str]:
+    return resolve_entity("material", value)
+
+def entity_fields(packing_info: List[Dict[str, Any]]) -> Tuple[List[Dict[str, Any]], Dict[str, List[str]]]:
+    """포장 항목별 company_id / material_id를 추가한 packing_info와 문서 단위 {"company_ids", "material_ids"}"""
+    items, companies, materials = [], set(), set()
+    for pack in packing_info:
+        item = dict(pack)
+        item["company_id"] = company_id(pack.get("company"))
+        item["material_id"] = material_id(pack.get("material"))
+        if item["company_id"]:
+            companies.add(item["company_id"])
+        if item["material_id"]:
+            materials.add(item["material_id"])
+        items.append(item)
+    return items, {"company_ids": sorted(companies), "material_ids": sorted(materials)}
+
+def cluster_variants(kind: str, counts: Dict[str, int]) -> Dict[str, str]:
+    """
+    표기별 문서 수 → {표기: ID}
+    1) 정규화 키가 같은 표기끼리 묶음 (펌텍 / 펌텍코리아 / "펌 텍")
+    2) CLUSTER_MIN_LENGTH 이상인 키는 유사도 CLUSTER_SIMILARITY 이상이면 많이 쓰인 쪽으로 묶음 (오타)
+    3) 묶음 안에서 가장 많이 쓰인 키가 ID
+    """
+    key_counts: Dict[str, int] = {}
+    variants_by_key: Dict[str, List[str]] = {}
+    for variant, count in counts.items():
+        key = entity_key(kind, variant)
+        if not key:
+            continue
+        key_counts[key] = key_counts.get(key, 0) + count
+        variants_by_key.setdefault(key, []).append(variant)
+
+    # 많이 쓰인 키부터 대표로 두고, 나머지는 가장 비슷한 대표에 붙임
+    representatives: List[str] = []
+    owner: Dict[str, str] = {}
+    for key in sorted(key_counts, key=lambda k: (-key_counts[k], k)):
+        best, best_ratio = None, 0.0
+        if len(key) >= CLUSTER_MIN_LENGTH:
+            for rep in representatives:
+                if len(rep) < CLUSTER_MIN_LENGTH:
+                    continue
+                ratio = SequenceMatcher(None, key, rep).ratio()
+                if ratio >= CLUSTER_SIMILARITY and ratio > best_ratio:
+                    best, best_ratio = rep, ratio
+        if best is None:
+            representatives.append(key)
+            owner[key] = key
+        else:
+            owner[key] = best
+    return {variant: owner[key] for key, variants in variants_by_key.items() for variant in variants}
+
+def mine_dictionary(es=None, index_name: str = "ct_documents", size: int = 10000) -> Dict[str, Dict[str, str]]:
+    """인덱스의 업체/재질 표기 집계로 사전 생성 (nested terms 집계)"""
+    from app.elasticsearch.client import get_es_client
+
+    es = es or get_es_client()
+    response = es.search(index=index_name, size=0, aggs={
+        "packing": {
+            "nested": {"path": "packing_info"},
+            "aggs": {
+                "company": {"terms": {"field": "packing_info.company.norm", "size": size}},
+                "material": {"terms": {"field": "packing_info.material", "size": size}},
+            }
+        }
+    })
+    packing = response["aggregations"]["packing"]
+    mined = {}
+    for kind in ENTITY_KINDS:
+        counts = {bucket["key"]: bucket["doc_count"] for bucket in packing[kind]["buckets"]}
+        mined[kind] = cluster_variants(kind, counts)
+        logger.info("%s 표기 %d개 → ID %d개", kind, len(counts), len(set(mined[kind].values())))
+    return mined
+
+def main():
+    parser = argparse.ArgumentParser(description="업체/재질 정규 ID 사전 관리")
+    parser.add_argument("command", choices=["mine", "show"])
+    parser.add_argument("--index", default="ct_documents")
+    parser.add_argument("--output", help="mine 결과 저장 경로 (없으면 표준 출력)")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+
+    if args.command == "mine":
+        mined = mine_dictionary(index_name=args.index)
+        text = json.dumps(mined, ensure_ascii=False, indent=2, sort_keys=True)
+        if args.output:
+            with open(args.output, "w", encoding="utf-8") as f:
+                f.write(text + "\n")
+        else:
+            print(text)
+    else:
+        print(json.dumps(get_dictionary(), ensure_ascii=False, indent=2, sort_keys=True))
+
+if __name__ == "__main__":
+    main()
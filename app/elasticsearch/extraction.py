@@ -0,0 +1,207 @@
+"""
+자유 텍스트 수치 추출 (포장 규격 / 특이사항 / 실험실 정보 / 적정용량 → measurements.* 숫자 필드)
+
+내경, 토출구, 외경, 토크처럼 검색 조건으로 쓰이는 수치가 packing_info.spec과
+special_notes.value에 "내경 : 17.8Φ", "토출구 2.4파이", "잠금 토크 약 23.14kgf" 형태로만 있어
+match 쿼리로는 범위 검색이 불가능하므로 색인 시점에 숫자 필드로 추출
+- 지름: Φ/φ/파이/mm → mm, cm → mm 환산
+- 토크: kgf(현장 표기, kgf·cm와 동일 취급) 기준, N·m → kgf·cm 환산
+- 토출량: g
+- "15~25kgf" 같은 범위 표기는 양 끝 값을 모두 저장 (range 필터는 값 중 하나라도 범위에 들면 일치)
+- 비중: lab_info의 "비중 1.002 - 1.017" → specific_gravity_min / specific_gravity_max (단일 값이면 둘 다 같은 값)
+- 적정용량: optimum_capacity의 "10ml", "50 mL", "15g", "10" → capacity_ml / capacity_g (단위 없으면 ml)
+검색 조건 문자열(lab_info, optimum_capacity)도 같은 함수로 해석해 range 필터로 변환
+
+실험 기준/결과 (experiment_info 항목별 + 문서 단위 평탄화 keyword)
+- standard "2.5g ± 0.5g/회" → standard_nominal 2.5, standard_lower 2.0, standard_upper 3.0, standard_unit "g"
+  "잠금 토크 15~25kgf" → lower 15, upper 25 / "1.2m 높이에서..." → nominal 1.2, unit "m"
+- result "적합" / "부적합" → passed True / False (그 외 값은 None)
+- test_codes: ["TMM202", ...], test_outcomes: ["TMM202:pass", "TMM101:fail", "TMM005:unknown"]
+"""
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+import re
+
+# 추출 필드 (색인 문서의 measurements.<필드>, 모두 float 배열)
+MEASUREMENT_FIELDS = (
+    "inner_diameter_mm",
+    "outer_diameter_mm",
+    "orifice_mm",
+    "dose_g",
+    "torque_kgf",
+    "lock_torque_kgf",
+    "unlock_torque_kgf",
+    "specific_gravity_min",
+    "specific_gravity_max",
+    "capacity_ml",
+    "capacity_g",
+)
+
+_NUMBER = r"(\d+(?:\.\d+)?)"
+_SEPARATOR = r"\s*[:：]?\s*"
+_DIAMETER_UNIT = r"\s*(Φ|φ|Ø|ø|파이|mm|㎜|cm|㎝)"
+_DIAMETER_SCALE = {"cm": 10.0, "㎝": 10.0}
+
+# 토출구 안의 "내경"이 내경으로 잡히지 않도록 토출구를 먼저 추출하고 해당 구간을 지움
+_DIAMETER_PATTERNS = (
+    ("orifice_mm", re.compile(r"토출구(?:\s*(?:내경|직경|지름))?" + _SEPARATOR + _NUMBER + _DIAMETER_UNIT)),
+    ("inner_diameter_mm", re.compile(r"내경" + _SEPARATOR + _NUMBER + _DIAMETER_UNIT)),
+    ("outer_diameter_mm", re.compile(r"외경" + _SEPARATOR + _NUMBER + _DIAMETER_UNIT)),
+)
+_DOSE_PATTERN = re.compile(r"토출량" + _SEPARATOR + _NUMBER + r"\s*g(?![a-zA-Z])")
+_TORQUE_PATTERN = re.compile(
+    r"(잠금|체결|풀림|개봉)?\s*토크\s*(?:약\s*)?[:：]?\s*" + _NUMBER
+    + r"(?:\s*[~∼\-]\s*" + _NUMBER + r")?\s*(kgf(?:\s*[·.\-]?\s*cm)?|N\s*[·.\-]?\s*m)",
+    re.IGNORECASE,
+)
+_TORQUE_KIND = {"잠금": "lock_torque_kgf", "체결": "lock_torque_kgf", "풀림": "unlock_torque_kgf", "개봉": "unlock_torque_kgf"}
+_GRAVITY_PATTERN = re.compile(r"비중" + _SEPARATOR + _NUMBER + r"(?:\s*[~∼\-]\s*" + _NUMBER + r")?")
+_CAPACITY_PATTERN = re.compile(r"^\s*" + _NUMBER + r"\s*(ml|㎖|cc|l|ℓ|g|kg)?\s*$", re.IGNORECASE)
+_CAPACITY_UNITS = {"ml": ("capacity_ml", 1.0), "㎖": ("capacity_ml", 1.0), "cc": ("capacity_ml", 1.0),
+                   "l": ("capacity_ml", 1000.0), "ℓ": ("capacity_ml", 1000.0),
+                   "g": ("capacity_g", 1.0), "kg": ("capacity_g", 1000.0)}
+_SIGNED_NUMBER = r"([-+]?\d+(?:\.\d+)?)"
+_STANDARD_UNIT = r"\s*(kgf/㎠|kg/㎠|kgf/cm2|kg/cm2|kgf|kg|mpa|kpa|㎖|ml|mm|cm|g|m|℃|도|%|시간|분|초|주|일|회)?"
+_TOLERANCE_PATTERN = re.compile(_SIGNED_NUMBER + _STANDARD_UNIT + r"\s*(?:±|\+/-)\s*" + _NUMBER, re.IGNORECASE)
+_BETWEEN_PATTERN = re.compile(_SIGNED_NUMBER + _STANDARD_UNIT + r"\s*[~∼]\s*" + _SIGNED_NUMBER + _STANDARD_UNIT, re.IGNORECASE)
+_VALUE_PATTERN = re.compile(_SIGNED_NUMBER + _STANDARD_UNIT, re.IGNORECASE)
+_STANDARD_UNITS = {"kg/㎠": "kgf/cm2", "kgf/㎠": "kgf/cm2", "kg/cm2": "kgf/cm2", "kgf/cm2": "kgf/cm2",
+                   "kg": "kgf", "kgf": "kgf", "mpa": "MPa", "kpa": "kPa", "㎖": "ml", "도": "deg"}
+# 판정 결과 (부적합을 먼저 확인해야 "적합"이 부분 일치하지 않음)
+_RESULT_WORDS = (("부적합", False), ("불합격", False), ("NG", False), ("적합", True), ("합격", True), ("OK", True))
+# 1 N·m = 10.197 kgf·cm
+_NEWTON_METER_TO_KGF_CM = 10.197
+
+def _number(value: str, scale: float = 1.0) -> float:
+    return round(float(value) * scale, 3)
+
+def extract_measurements(text: str) -> Dict[str, List[float]]:
+    """텍스트 1건에서 수치 추출 (필드별 값 목록, 찾은 값이 없는 필드는 제외)"""
+    found: Dict[str, List[float]] = {}
+    if not text:
+        return found
+
+    for field, pattern in _DIAMETER_PATTERNS:
+        for match in pattern.finditer(text):
+            found.setdefault(field, []).append(_number(match.group(1), _DIAMETER_SCALE.get(match.group(2), 1.0)))
+        text = pattern.sub(lambda m: " " * len(m.group(0)), text)
+
+    for match in _DOSE_PATTERN.finditer(text):
+        found.setdefault("dose_g", []).append(_number(match.group(1)))
+
+    for match in _TORQUE_PATTERN.finditer(text):
+        kind, low, high, unit = match.groups()
+        scale = _NEWTON_METER_TO_KGF_CM if unit[0] in "Nn" else 1.0
+        values = [_number(low, scale)] + ([_number(high, scale)] if high else [])
+        found.setdefault("torque_kgf", []).extend(values)
+        if kind:
+            found.setdefault(_TORQUE_KIND[kind], []).extend(values)
+    return found
+
+def parse_specific_gravity(text: str) -> Optional[Tuple[float, float]]:
+    """"비중 1.002 - 1.017" → (1.002, 1.017), 단일 값이면 (값, 값), 비중 표기가 없으면 None"""
+    match = _GRAVITY_PATTERN.search(text or "")
+    if not match:
+        return None
+    values = sorted(_number(value) for value in match.groups() if value)
+    return values[0], values[-1]
+
+def strip_specific_gravity(text: str) -> str:
+    """비중 표기를 뺀 나머지 텍스트 (검색 시 나머지는 텍스트 조건으로 사용)"""
+    return _GRAVITY_PATTERN.sub(" ", text or "").strip()
+
+def parse_capacity(text: str) -> Optional[Tuple[str, float]]:
+    """"10ml" / "50 mL" / "15g" / "10" → (필드명, 값), 숫자+단위 형식이 아니면 None"""
+    match = _CAPACITY_PATTERN.match(text or "")
+    if not match:
+        return None
+    field, scale = _CAPACITY_UNITS[(match.group(2) or "ml").lower()]
+    return field, _number(match.group(1), scale)
+
+def _standard_unit(unit: Optional[str]) -> Optional[str]:
+    if not unit:
+        return None
+    return _STANDARD_UNITS.get(unit.lower(), unit.lower() if unit.isascii() else unit)
+
+def parse_standard(text: str) -> Dict[str, Any]:
+    """
+    실험 기준 문자열 → {"standard_nominal", "standard_lower", "standard_upper", "standard_unit"}
+    (± 허용차 > ~ 범위 > 첫 번째 수치 순으로 해석, "원형 10Kg/㎠, 타원 8Kg/㎠"처럼 여러 값이면 첫 값, 수치가 없으면 빈 dict)
+    """
+    if not text:
+        return {}
+    match = _TOLERANCE_PATTERN.search(text)
+    if match:
+        nominal, tolerance = _number(match.group(1)), _number(match.group(3))
+        return {
+            "standard_nominal": nominal,
+            "standard_lower": round(nominal - tolerance, 3),
+            "standard_upper": round(nominal + tolerance, 3),
+            "standard_unit": _standard_unit(match.group(2)),
+        }
+    match = _BETWEEN_PATTERN.search(text)
+    if match:
+        lower, upper = sorted((_number(match.group(1)), _number(match.group(3))))
+        return {
+            "standard_lower": lower,
+            "standard_upper": upper,
+            "standard_unit": _standard_unit(match.group(4) or match.group(2)),
+        }
+    match = _VALUE_PATTERN.search(text)
+    if match:
+        return {"standard_nominal": _number(match.group(1)), "standard_unit": _standard_unit(match.group(2))}
+    return {}
+
+def parse_result(text: str) -> Optional[bool]:
+    """실험 결과 → True(적합) / False(부적합) / None(판정 아님: 수치, "-" 등)"""
+    text = (text or "").strip()
+    for word, passed in _RESULT_WORDS:
+        if text.upper().startswith(word):
+            return passed
+    return None
+
+def experiment_fields(experiment_info: List[Dict[str, Any]]) -> Tuple[List[Dict[str, Any]], Dict[str, List[str]]]:
+    """
+    실험 항목별 기준 수치/판정 필드를 추가한 experiment_info와
+    문서 단위 평탄화 필드 {"test_codes", "test_outcomes"} 반환
+    """
+    items, codes, outcomes = [], set(), set()
+    for exp in experiment_info:
+        item = dict(exp)
+        item.update(parse_standard(exp.get("standard")))
+        item["passed"] = parse_result(exp.get("result"))
+        items.append(item)
+        if exp.get("code"):
+            codes.add(exp["code"])
+            outcome = "unknown" if item["passed"] is None else ("pass" if item["passed"] else "fail")
+            outcomes.add(f"{exp['code']}:{outcome}")
+    return items, {"test_codes": sorted(codes), "test_outcomes": sorted(outcomes)}
+
+def test_outcome(code: str, passed: bool) -> str:
+    """test_outcomes 필터 값 ("TMM202:pass" / "TMM202:fail")"""
+    return f"{code}:{'pass' if passed else 'fail'}"
+
+def merge_measurements(texts: Iterable[str]) -> Dict[str, List[float]]:
+    """여러 텍스트의 추출 결과 병합 (필드별 중복 제거 + 정렬)"""
+    merged: Dict[str, set] = {}
+    for text in texts:
+        for field, values in extract_measurements(text).items():
+            merged.setdefault(field, set()).update(values)
+    return {field: sorted(merged[field]) for field in MEASUREMENT_FIELDS if field in merged}
+
+def document_measurements(document: Dict[str, Any]) -> Dict[str, List[float]]:
+    """문서의 포장 규격, 특이사항, 실험실 정보(비중), 적정용량에서 수치 추출"""
+    texts = [pack.get("spec") for pack in document.get("packing_info") or []]
+    texts += [note.get("value") for note in document.get("special_notes") or []]
+    found = merge_measurements(text for text in texts if isinstance(text, str))
+
+    gravity = parse_specific_gravity(document.get("lab_info")) if isinstance(document.get("lab_info"), str) else None
+    if gravity:
+        found["specific_gravity_min"], found["specific_gravity_max"] = [gravity[0]], [gravity[1]]
+    capacity = parse_capacity(document.get("optimum_capacity")) if isinstance(document.get("optimum_capacity"), str) else None
+    if capacity:
+        found[capacity[0]] = [capacity[1]]
+    return {field: found[field] for field in MEASUREMENT_FIELDS if field in found}
+
+def measurement_mappings() -> Dict[str, Any]:
+    """매핑의 measurements 객체 정의 (doc values 기반 range 필터용 float)"""
+    return {"properties": {field: {"type": "float"} for field in MEASUREMENT_FIELDS}}
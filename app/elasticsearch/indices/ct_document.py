@@ -1,8 +1,28 @@
 from elasticsearch import Elasticsearch
+from app.elasticsearch.normalization import NORMALIZER_ANALYSIS, norm_subfield
+from app.elasticsearch.extraction import measurement_mappings
+import os
 
-def create_ct_document_index_with_mapping(es: Elasticsearch, index_name: str):
-    """CT 문서 검색을 위한 인덱스 생성 및 매핑 설정"""
-    mapping = {
+# 인덱스를 test_date 내림차순으로 정렬해 저장할지 여부 (build_ct_document_index_body 기본값)
+CT_INDEX_SORT_BY_TEST_DATE = os.getenv("CT_INDEX_SORT_BY_TEST_DATE", "false").lower() == "true"
+
+# 인덱스 정렬 설정: 최신 문서가 세그먼트 앞쪽에 오도록 저장 (recent 정렬 + track_total_hits 제한 시 세그먼트별 조기 종료)
+# 조기 종료는 검색 정렬이 인덱스 정렬의 앞부분과 같아야 하므로 pagination.RECENT_SORT와 필드/순서/missing을 맞춤
+# (인덱스 정렬은 생성 시에만 지정 가능하므로 바꾸면 reindex 필요)
+TEST_DATE_INDEX_SORT = {
+    "sort.field": ["test_date", "document_id"],
+    "sort.order": ["desc", "asc"],
+    "sort.missing": ["_last", "_last"]
+}
+
+def build_ct_document_index_body(sort_by_test_date: bool = None) -> dict:
+    """
+    CT 문서 인덱스 생성 본문 (매핑 + 분석기 설정)
+    sort_by_test_date: test_date 내림차순 인덱스 정렬 (None이면 CT_INDEX_SORT_BY_TEST_DATE)
+      nested 필드(packing_info 등)와 index sorting을 함께 허용하지 않는 Elasticsearch 버전에서는
+      인덱스 생성이 거부되므로 클러스터 버전 확인 후 사용
+    """
+    body = {
         "mappings": {
             "properties": {
                 # 기본 정보
@@ -10,7 +30,7 @@ def create_ct_document_index_with_mapping(es: Elasticsearch, index_name: str):
                 "file_name": {"type": "text", "analyzer": "korean_analyzer"},
                 "test_no": {"type": "keyword"},
                 "product_name": {"type": "text", "analyzer": "korean_analyzer"},
-                "customer": {"type": "text", "analyzer": "korean_analyzer"},
+                "customer": {"type": "text", "analyzer": "korean_analyzer", "fields": {"norm": norm_subfield()}},
                 "developer": {"type": "keyword"},
                 "requester": {"type": "keyword"},
                 "test_count": {"type": "keyword"},
@@ -28,19 +48,32 @@ def create_ct_document_index_with_mapping(es: Elasticsearch, index_name: str):
                 "download_url": {"type": "keyword"},
                 
                 # 실험실 정보
-                "lab_id": {"type": "keyword"},
+                "lab_id": {"type": "keyword", "fields": {"norm": norm_subfield()}},
                 "lab_info": {"type": "text", "analyzer": "korean_analyzer"},
                 
                 # 포장 정보 (nested object)
+                # - .norm: 정확히 일치시킬 때 쓰는 정규화 keyword (공백/대소문자/전각 무시, bool.filter용)
+                # - .raw: 원본 표기 keyword (자동완성 distinct 값 집계용)
                 "packing_info": {
                     "type": "nested",
                     "properties": {
-                        "type": {"type": "text", "analyzer": "korean_analyzer"},
-                        "material": {"type": "keyword"},
+                        "type": {"type": "text", "analyzer": "korean_analyzer", "fields": {"norm": norm_subfield(), "raw": {"type": "keyword"}}},
+                        "material": {"type": "keyword", "fields": {"norm": norm_subfield()}},
                         "spec": {"type": "text", "analyzer": "korean_analyzer"},
-                        "company": {"type": "text", "analyzer": "korean_analyzer"}
+                        "company": {"type": "text", "analyzer": "korean_analyzer", "fields": {"norm": norm_subfield(), "raw": {"type": "keyword"}}},
+                        # 업체/재질 정규 ID (app.elasticsearch.entities 사전, 표기가 달라도 같은 ID)
+                        "company_id": {"type": "keyword"},
+                        "material_id": {"type": "keyword"}
                     }
                 },
+                "company_ids": {"type": "keyword"},
+                "material_ids": {"type": "keyword"},
+                # 포장 시그니처 (process_ct_document_data에서 생성, 정규화된 "타입|재질[|업체]" 조합)
+                "packing_type_material": {"type": "keyword"},
+                "packing_type_material_company": {"type": "keyword"},
+                "packing_set_hash": {"type": "keyword"},
+                # 포장 규격/특이사항에서 추출한 수치 (app.elasticsearch.extraction, 단위 정규화된 float 배열)
+                "measurements": measurement_mappings(),
                 
                 # 실험 정보 (nested object)
                 "experiment_info": {
@@ -51,9 +84,18 @@ def create_ct_document_index_with_mapping(es: Elasticsearch, index_name: str):
                         "period": {"type": "keyword"},
                         "check": {"type": "keyword"},
                         "standard": {"type": "text", "analyzer": "korean_analyzer"},
-                        "result": {"type": "text", "analyzer": "korean_analyzer"}
+                        "result": {"type": "text", "analyzer": "korean_analyzer"},
+                        # standard/result에서 추출한 기준 수치와 판정 (app.elasticsearch.extraction.experiment_fields)
+                        "standard_nominal": {"type": "float"},
+                        "standard_lower": {"type": "float"},
+                        "standard_upper": {"type": "float"},
+                        "standard_unit": {"type": "keyword"},
+                        "passed": {"type": "boolean"}
                     }
                 },
+                # 실험 코드 / "코드:pass|fail|unknown" 평탄화 필드 (nested 조인 없는 필터용)
+                "test_codes": {"type": "keyword"},
+                "test_outcomes": {"type": "keyword"},
                 
                 # 특별 참고사항 (nested object)
                 "special_notes": {
@@ -76,6 +118,7 @@ def create_ct_document_index_with_mapping(es: Elasticsearch, index_name: str):
                 # 메타데이터
                 "created_at": {"type": "date"},
                 "updated_at": {"type": "date"},
+                "content_hash": {"type": "keyword"},  # 원본 내용 해시 (재적재 시 변경 여부 판단)
                 "tags": {"type": "keyword"},
                 "status": {"type": "keyword"}
             }
@@ -88,10 +131,22 @@ def create_ct_document_index_with_mapping(es: Elasticsearch, index_name: str):
                         "tokenizer": "standard",
                         "filter": ["lowercase", "stop"]
                     }
-                }
+                },
+                **NORMALIZER_ANALYSIS
             }
         }
     }
+    if CT_INDEX_SORT_BY_TEST_DATE if sort_by_test_date is None else sort_by_test_date:
+        body["settings"]["index"] = dict(TEST_DATE_INDEX_SORT)
+    return body
+
+def create_ct_document_index_with_mapping(es: Elasticsearch, index_name: str, sort_by_test_date: bool = None):
+    """
+    CT 문서 검색을 위한 인덱스 생성 및 매핑 설정 (기존 인덱스는 삭제 후 재생성)
+    운영 중인 인덱스의 매핑 변경은 app.elasticsearch.reindex의 버전 인덱스 + alias 교체 사용
+    sort_by_test_date: test_date 내림차순 인덱스 정렬 (build_ct_document_index_body 참고)
+    """
+    mapping = build_ct_document_index_body(sort_by_test_date)
     
     try:
         # 인덱스가 존재하면 삭제
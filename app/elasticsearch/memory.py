@@ -0,0 +1,1896 @@
+"""
+프로세스 내 Elasticsearch 대체 구현 (테스트/오프라인 벤치마크용)
+
+서비스 코드가 사용하는 API 일부만 구현
+- 문서: index, create, get, mget, exists, delete, update(doc/upsert), bulk, count
+- 검색: bool/nested/term/terms/ids/prefix/wildcard/exists/range/match/match_phrase/multi_match/
+        constant_score/dis_max/script_score(벡터 함수)/top-level knn, _source 필터, highlight, sort,
+        search_after, point-in-time, track_total_hits, msearch
+- 집계: terms, date_histogram, histogram, nested, filter, value_count/cardinality/min/max/avg/sum/stats
+- 인덱스: create/delete/exists/refresh/get_mapping/put_mapping/get_settings/put_settings/stats/forcemerge, alias,
+         index template (index_patterns/priority, 자동 생성 인덱스에도 적용)
+- 클러스터: health (단일 노드, 항상 green)
+
+실제 엔진과 다른 점
+- 점수는 단순화된 tf 기반 값 (BM25/idf 미적용), 순위 비교용으로만 사용
+- 색인 즉시 검색 가능 (refresh는 통계만 증가)
+- text 필드의 terms 집계/정렬은 원본 값 기준으로 허용 (실제로는 fielddata 오류)
+
+사용: ELASTICSEARCH_BACKEND=memory 또는 set_es_client(InMemoryElasticsearch())
+"""
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+import base64
+import copy
+import datetime
+import fnmatch
+import functools
+import itertools
+import json
+import math
+import re
+import threading
+import time
+import unicodedata
+import uuid
+
+from elastic_transport import ApiResponseMeta, HeadApiResponse, HttpHeaders, NodeConfig, ObjectApiResponse
+from elastic_transport import JsonSerializer
+from elasticsearch import BadRequestError, ConflictError, NotFoundError
+
+_NODE = NodeConfig("http", "memory", 9200)
+
+def _meta(status: int = 200) -> ApiResponseMeta:
+    return ApiResponseMeta(status=status, http_version="1.1", headers=HttpHeaders(), duration=0.0, node=_NODE)
+
+def _response(body: Dict[str, Any]) -> ObjectApiResponse:
+    return ObjectApiResponse(body=body, meta=_meta())
+
+def _error(cls, status: int, error_type: str, reason: str):
+    body = {"error": {"type": error_type, "reason": reason}, "status": status}
+    return cls(message=error_type, meta=_meta(status), body=body)
+
+def _index_not_found(name: str):
+    return _error(NotFoundError, 404, "index_not_found_exception", f"no such index [{name}]")
+
+def _bad_request(reason: str):
+    return _error(BadRequestError, 400, "parsing_exception", reason)
+
+# ---------------------------------------------------------------------------
+# 분석기
+# ---------------------------------------------------------------------------
+
+# Lucene 기본 영어 불용어 (stop 필터 기본값)
+ENGLISH_STOP_WORDS = frozenset(
+    "a an and are as at be but by for if in into is it no not of on or such that the their "
+    "then there these they this to was will with".split()
+)
+# standard tokenizer 근사: 소수점 포함 숫자 또는 문자/숫자 연속
+STANDARD_TOKEN = re.compile(r"\d+(?:[.,]\d+)*|[^\W_]+", re.UNICODE)
+WHITESPACE_TOKEN = re.compile(r"\S+")
+
+def _asciifolding(token: str) -> str:
+    decomposed = unicodedata.normalize("NFKD", token)
+    return "".join(c for c in decomposed if not unicodedata.combining(c))
+
+def _cjk_width(token: str) -> str:
+    """전각 ASCII → 반각, 반각 가타카나 → 전각 (NFKC 전체가 아닌 ES cjk_width 범위만)"""
+    return "".join(
+        chr(ord(c) - 0xFEE0) if 0xFF01 <= ord(c) <= 0xFF5E
+        else unicodedata.normalize("NFKC", c) if 0xFF65 <= ord(c) <= 0xFF9F
+        else c
+        for c in token
+    )
+
+TOKEN_FILTERS: Dict[str, Callable[[List[str]], List[str]]] = {
+    "lowercase": lambda tokens: [t.lower() for t in tokens],
+    "uppercase": lambda tokens: [t.upper() for t in tokens],
+    "stop": lambda tokens: [t for t in tokens if t not in ENGLISH_STOP_WORDS],
+    "asciifolding": lambda tokens: [_asciifolding(t) for t in tokens],
+    "cjk_width": lambda tokens: [_cjk_width(t) for t in tokens],
+    "trim": lambda tokens: [t.strip() for t in tokens],
+}
+
+class Analyzer:
+    """tokenizer + char_filter + token filter 조합 (index settings의 analysis 정의 일부 지원)"""
+    def __init__(self, tokenizer: str = "standard", filters: Iterable[Callable] = (), char_filters: Iterable[Callable] = ()):
+        self.tokenizer = tokenizer
+        self.filters = list(filters)
+        self.char_filters = list(char_filters)
+
+    def __call__(self, text: Any) -> List[str]:
+        text = str(text)
+        for char_filter in self.char_filters:
+            text = char_filter(text)
+        if self.tokenizer == "keyword":
+            tokens = [text]
+        elif self.tokenizer == "whitespace":
+            tokens = WHITESPACE_TOKEN.findall(text)
+        else:
+            tokens = STANDARD_TOKEN.findall(text)
+        for token_filter in self.filters:
+            tokens = token_filter(tokens)
+        return [t for t in tokens if t != ""]
+
+STANDARD_ANALYZER = Analyzer("standard", [TOKEN_FILTERS["lowercase"]])
+KEYWORD_ANALYZER = Analyzer("keyword")
+
+def _build_char_filter(name: str, definitions: Dict[str, Any]) -> Callable[[str], str]:
+    spec = definitions.get(name)
+    if spec is None:
+        raise _bad_request(f"failed to find char_filter [{name}]")
+    if spec.get("type") == "pattern_replace":
+        pattern = re.compile(spec["pattern"])
+        replacement = re.sub(r"\$(\d)", r"\\\1", spec.get("replacement", ""))
+        return lambda text: pattern.sub(replacement, text)
+    if spec.get("type") == "mapping":
+        pairs = [m.split("=>") for m in spec.get("mappings", [])]
+        pairs = [(a.strip(), b.strip()) for a, b in pairs]
+        def apply(text):
+            for a, b in pairs:
+                text = text.replace(a, b)
+            return text
+        return apply
+    raise _bad_request(f"unsupported char_filter type [{spec.get('type')}]")
+
+def _build_token_filter(name: str, definitions: Dict[str, Any]) -> Callable[[List[str]], List[str]]:
+    if name in TOKEN_FILTERS:
+        return TOKEN_FILTERS[name]
+    spec = definitions.get(name)
+    if spec is None:
+        raise _bad_request(f"failed to find filter [{name}]")
+    if spec.get("type") == "stop":
+        words = spec.get("stopwords", "_english_")
+        stop = ENGLISH_STOP_WORDS if words == "_english_" else frozenset(words)
+        return lambda tokens: [t for t in tokens if t not in stop]
+    if spec.get("type") == "pattern_replace":
+        pattern = re.compile(spec["pattern"])
+        replacement = re.sub(r"\$(\d)", r"\\\1", spec.get("replacement", ""))
+        return lambda tokens: [pattern.sub(replacement, t) for t in tokens]
+    if spec.get("type") in TOKEN_FILTERS:
+        return TOKEN_FILTERS[spec["type"]]
+    raise _bad_request(f"unsupported filter type [{spec.get('type')}]")
+
+def _build_analyzers(analysis: Dict[str, Any]) -> Tuple[Dict[str, Analyzer], Dict[str, Analyzer]]:
+    """index settings의 analysis → (analyzer, normalizer) 이름별 구현"""
+    char_filters = analysis.get("char_filter", {})
+    filters = analysis.get("filter", {})
+    analyzers = {"standard": STANDARD_ANALYZER, "default": STANDARD_ANALYZER, "keyword": KEYWORD_ANALYZER,
+                 "whitespace": Analyzer("whitespace"), "simple": STANDARD_ANALYZER}
+    for name, spec in analysis.get("analyzer", {}).items():
+        if spec.get("type", "custom") == "custom":
+            analyzers[name] = Analyzer(
+                spec.get("tokenizer", "standard"),
+                [_build_token_filter(f, filters) for f in spec.get("filter", [])],
+                [_build_char_filter(c, char_filters) for c in spec.get("char_filter", [])],
+            )
+        else:
+            analyzers[name] = analyzers.get(spec["type"], STANDARD_ANALYZER)
+    normalizers = {"lowercase": Analyzer("keyword", [TOKEN_FILTERS["lowercase"]])}
+    for name, spec in analysis.get("normalizer", {}).items():
+        normalizers[name] = Analyzer(
+            "keyword",
+            [_build_token_filter(f, filters) for f in spec.get("filter", [])],
+            [_build_char_filter(c, char_filters) for c in spec.get("char_filter", [])],
+        )
+    return analyzers, normalizers
+
+# ---------------------------------------------------------------------------
+# 매핑 / 필드 값
+# ---------------------------------------------------------------------------
+
+NUMERIC_TYPES = {"long", "integer", "short", "byte", "double", "float", "half_float", "scaled_float", "unsigned_long"}
+TEXT_TYPES = {"text", "match_only_text", "search_as_you_type"}
+
+def _parse_date(value: Any) -> Optional[float]:
+    """날짜 값 → epoch millis (문자열 ISO 형식 / epoch millis 숫자)"""
+    if value is None:
+        return None
+    if isinstance(value, (int, float)):
+        return float(value)
+    if isinstance(value, datetime.datetime):
+        dt = value
+    elif isinstance(value, datetime.date):
+        dt = datetime.datetime(value.year, value.month, value.day)
+    else:
+        text = str(value).strip()
+        if text.startswith("now"):
+            return _date_math(text)
+        text = text.replace("Z", "+00:00")
+        if re.fullmatch(r"\d{4}", text):
+            text += "-01-01"
+        elif re.fullmatch(r"\d{4}-\d{2}", text):
+            text += "-01"
+        try:
+            dt = datetime.datetime.fromisoformat(text)
+        except ValueError:
+            if text.isdigit():
+                return float(text)
+            raise _error(BadRequestError, 400, "parse_exception", f"failed to parse date field [{value}]")
+    if dt.tzinfo is not None:
+        dt = dt.astimezone(datetime.timezone.utc).replace(tzinfo=None)
+    return (dt - datetime.datetime(1970, 1, 1)).total_seconds() * 1000
+
+DATE_MATH_UNITS = {"s": 1, "m": 60, "h": 3600, "d": 86400, "w": 7 * 86400, "M": 30 * 86400, "y": 365 * 86400}
+
+def _date_math(expression: str) -> float:
+    """now, now-1d, now+2h, now-1y/d 형태의 간단한 date math"""
+    now = datetime.datetime.utcnow()
+    rest = expression[3:]
+    rounding = None
+    if "/" in rest:
+        rest, rounding = rest.split("/", 1)
+    for sign, amount, unit in re.findall(r"([+-])(\d+)([smhdwMy])", rest):
+        delta = datetime.timedelta(seconds=int(amount) * DATE_MATH_UNITS[unit])
+        now = now + delta if sign == "+" else now - delta
+    if rounding:
+        now = _round_date(now, rounding)
+    return (now - datetime.datetime(1970, 1, 1)).total_seconds() * 1000
+
+def _round_date(dt: datetime.datetime, unit: str) -> datetime.datetime:
+    if unit in ("y", "year"):
+        return datetime.datetime(dt.year, 1, 1)
+    if unit in ("q", "quarter"):
+        return datetime.datetime(dt.year, (dt.month - 1) // 3 * 3 + 1, 1)
+    if unit in ("M", "month"):
+        return datetime.datetime(dt.year, dt.month, 1)
+    if unit in ("w", "week"):
+        day = datetime.datetime(dt.year, dt.month, dt.day)
+        return day - datetime.timedelta(days=day.weekday())
+    if unit in ("d", "day"):
+        return datetime.datetime(dt.year, dt.month, dt.day)
+    if unit in ("h", "hour"):
+        return datetime.datetime(dt.year, dt.month, dt.day, dt.hour)
+    return dt
+
+def _millis_to_iso(millis: float) -> str:
+    dt = datetime.datetime(1970, 1, 1) + datetime.timedelta(milliseconds=millis)
+    return dt.strftime("%Y-%m-%dT%H:%M:%S.") + f"{dt.microsecond // 1000:03d}Z"
+
+class Mapping:
+    """properties 정의를 점(.) 경로 단위로 펼친 필드 정보"""
+    def __init__(self, mappings: Optional[Dict[str, Any]] = None):
+        self.raw = {"properties": {}}
+        self.fields: Dict[str, Dict[str, Any]] = {}
+        self.nested_paths: List[str] = []
+        if mappings:
+            self.merge(mappings)
+
+    def merge(self, mappings: Dict[str, Any]):
+        mappings = mappings.get("mappings", mappings)
+        for key, value in mappings.items():
+            if key == "properties":
+                self.raw["properties"].update(copy.deepcopy(value))
+            else:
+                self.raw[key] = copy.deepcopy(value)
+        self.fields = {}
+        self.nested_paths = []
+        self._walk(self.raw["properties"], "")
+        # 깊은 경로가 먼저 오도록 정렬 (가장 가까운 nested 상위 경로 탐색용)
+        self.nested_paths.sort(key=len, reverse=True)
+
+    def _walk(self, properties: Dict[str, Any], prefix: str):
+        for name, spec in properties.items():
+            path = prefix + name
+            field_type = spec.get("type", "object" if "properties" in spec else None)
+            self.fields[path] = dict(spec, type=field_type, source_path=path)
+            if field_type == "nested":
+                self.nested_paths.append(path)
+            if "properties" in spec:
+                self._walk(spec["properties"], path + ".")
+            for sub_name, sub_spec in spec.get("fields", {}).items():
+                self.fields[f"{path}.{sub_name}"] = dict(sub_spec, source_path=path)
+
+    def field(self, path: str) -> Dict[str, Any]:
+        spec = self.fields.get(path)
+        if spec is not None:
+            return spec
+        # 동적 매핑 기본값: 문자열은 text + .keyword 하위 필드
+        if path.endswith(".keyword") and path[:-8] not in self.fields:
+            return {"type": "keyword", "source_path": path[:-8]}
+        return {"type": None, "source_path": path}
+
+    def nested_parent(self, path: str) -> Optional[str]:
+        """필드가 속한 가장 가까운 nested 경로"""
+        for nested in self.nested_paths:
+            if path.startswith(nested + "."):
+                return nested
+        return None
+
+    def expand(self, pattern: str) -> List[str]:
+        """필드 이름 패턴(wildcard) → 검색 가능한 필드 경로"""
+        if "*" not in pattern:
+            return [pattern]
+        return [
+            path for path, spec in self.fields.items()
+            if fnmatch.fnmatchcase(path, pattern) and spec.get("type") not in ("object", "nested", "dense_vector")
+        ]
+
+def _raw_values(obj: Any, parts: List[str]) -> List[Any]:
+    """문서(또는 nested 객체)에서 경로 값 수집 (배열은 펼침)"""
+    if obj is None:
+        return []
+    if isinstance(obj, list):
+        return [v for item in obj for v in _raw_values(item, parts)]
+    if not parts:
+        return [obj]
+    if not isinstance(obj, dict):
+        return []
+    if parts[0] in obj:
+        return _raw_values(obj[parts[0]], parts[1:])
+    # 'a.b' 형태로 저장된 키 지원
+    for i in range(2, len(parts) + 1):
+        key = ".".join(parts[:i])
+        if key in obj:
+            return _raw_values(obj[key], parts[i:])
+    return []
+
+def _vector_values(obj: Any, parts: List[str]) -> List[List[float]]:
+    """dense_vector 값 수집 (벡터 자체는 펼치지 않음)"""
+    if obj is None:
+        return []
+    if isinstance(obj, list) and (not obj or not isinstance(obj[0], (int, float))):
+        return [v for item in obj for v in _vector_values(item, parts)]
+    if not parts:
+        return [obj] if isinstance(obj, list) else []
+    if not isinstance(obj, dict):
+        return []
+    return _vector_values(obj.get(parts[0]), parts[1:])
+
+class _Doc:
+    __slots__ = ("index", "id", "seq", "version", "source")
+
+    def __init__(self, index: str, doc_id: str, seq: int, version: int, source: Dict[str, Any]):
+        self.index = index
+        self.id = doc_id
+        self.seq = seq
+        self.version = version
+        self.source = source
+
+class _Index:
+    def __init__(self, name: str, mappings=None, settings=None):
+        self.name = name
+        self.docs: Dict[str, _Doc] = {}
+        self.settings = _flatten_settings(settings or {})
+        self.mapping = Mapping(mappings)
+        self.analyzers, self.normalizers = _build_analyzers(self.settings.get("analysis", {}))
+        self.created = time.time()
+        self.stats = {"index_total": 0, "delete_total": 0, "query_total": 0, "query_time_ms": 0.0, "refresh_total": 0}
+
+    def analyzer_for(self, spec: Dict[str, Any], search: bool = False) -> Analyzer:
+        name = (search and spec.get("search_analyzer")) or spec.get("analyzer")
+        if name is None:
+            return self.analyzers.get("default", STANDARD_ANALYZER)
+        if name not in self.analyzers:
+            raise _bad_request(f"analyzer [{name}] has not been configured in mappings")
+        return self.analyzers[name]
+
+    def normalizer_for(self, spec: Dict[str, Any]) -> Optional[Analyzer]:
+        name = spec.get("normalizer")
+        return self.normalizers.get(name) if name else None
+
+def _flatten_settings(settings: Dict[str, Any]) -> Dict[str, Any]:
+    """{"index": {...}} / "index.xxx" 형태를 같은 구조로 정리"""
+    settings = copy.deepcopy(settings.get("settings", settings))
+    flat = dict(settings.pop("index", {}) or {})
+    for key, value in settings.items():
+        flat[key[6:] if key.startswith("index.") else key] = value
+    return flat
+
+# ---------------------------------------------------------------------------
+# 쿼리 평가
+# ---------------------------------------------------------------------------
+
+class _Context:
+    """쿼리 평가 단위 (문서 또는 nested 객체)"""
+    __slots__ = ("index", "doc", "obj", "scope", "inner_hits")
+
+    def __init__(self, index: _Index, doc: _Doc, obj: Dict[str, Any], scope: Optional[str], inner_hits=None):
+        self.index = index
+        self.doc = doc
+        self.obj = obj
+        self.scope = scope
+        self.inner_hits = inner_hits
+
+    def _relative(self, path: str) -> Optional[List[str]]:
+        """현재 범위 기준 상대 경로 (다른 nested 객체에 속한 필드면 None)"""
+        if self.index.mapping.nested_parent(path) != self.scope:
+            return None
+        if self.scope:
+            return path[len(self.scope) + 1:].split(".")
+        return path.split(".")
+
+    def raw(self, field: str) -> List[Any]:
+        spec = self.index.mapping.field(field)
+        parts = self._relative(spec["source_path"])
+        if parts is None:
+            return []
+        return [v for v in _raw_values(self.obj, parts) if v is not None]
+
+    def vectors(self, field: str) -> List[List[float]]:
+        parts = self._relative(field)
+        return _vector_values(self.obj, parts) if parts is not None else []
+
+    def terms(self, field: str) -> List[Any]:
+        """색인된 term 값 (text: 분석된 토큰, keyword: normalizer 적용 값, 숫자/날짜: 변환 값)"""
+        spec = self.index.mapping.field(field)
+        values = self.raw(field)
+        field_type = spec.get("type")
+        if field_type in TEXT_TYPES or (field_type is None and values and isinstance(values[0], str)):
+            analyzer = self.index.analyzer_for(spec)
+            return [token for value in values for token in analyzer(value)]
+        return [_typed_value(self.index, spec, value) for value in values]
+
+def _typed_value(index: _Index, spec: Dict[str, Any], value: Any) -> Any:
+    """필드 타입에 맞춘 비교용 값"""
+    field_type = spec.get("type")
+    if value is None:
+        return None
+    if field_type == "date":
+        return _parse_date(value)
+    if field_type in NUMERIC_TYPES:
+        try:
+            return float(value)
+        except (TypeError, ValueError):
+            raise _error(BadRequestError, 400, "number_format_exception", f"For input string: \"{value}\"")
+    if field_type == "boolean":
+        return value if isinstance(value, bool) else str(value).lower() == "true"
+    if field_type == "keyword":
+        normalizer = index.normalizer_for(spec)
+        text = str(value) if not isinstance(value, bool) else str(value).lower()
+        return normalizer(text)[0] if normalizer else text
+    return value
+
+def _term_value(index: _Index, field: str, value: Any) -> Any:
+    """term 쿼리 값 변환 (keyword normalizer / 숫자 / 날짜)"""
+    spec = index.mapping.field(field)
+    if spec.get("type") in TEXT_TYPES or spec.get("type") is None:
+        return value if not isinstance(value, str) else value
+    return _typed_value(index, spec, value)
+
+def _unpack(body: Dict[str, Any], key_name: str = "value") -> Tuple[str, Dict[str, Any]]:
+    """{field: value} / {field: {...}} 형태 분리"""
+    options = {k: v for k, v in body.items() if k in ("boost", "_name")}
+    fields = [k for k in body if k not in ("boost", "_name")]
+    if len(fields) != 1:
+        raise _bad_request(f"query does not support multiple fields {fields}")
+    field = fields[0]
+    value = body[field]
+    if isinstance(value, dict):
+        return field, dict(options, **value)
+    return field, dict(options, **{key_name: value})
+
+def _edit_distance(a: str, b: str, limit: int) -> int:
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    previous = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        current = [i]
+        for j, cb in enumerate(b, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (ca != cb)))
+        if min(current) > limit:
+            return limit + 1
+        previous = current
+    return previous[-1]
+
+def _fuzziness(token: str, fuzziness: Any) -> int:
+    if fuzziness in (None, 0, "0"):
+        return 0
+    if str(fuzziness).upper().startswith("AUTO"):
+        return 0 if len(token) < 3 else 1 if len(token) < 6 else 2
+    return int(fuzziness)
+
+def _tf_score(tf: int) -> float:
+    """단순화된 term 빈도 점수 (포화 함수)"""
+    return tf / (tf + 1.2) * 2.2
+
+def _match_field(ctx: _Context, field: str, options: Dict[str, Any]) -> Optional[float]:
+    query_text = options.get("query")
+    if query_text is None:
+        return None
+    spec = ctx.index.mapping.field(field)
+    field_type = spec.get("type")
+    if field_type not in TEXT_TYPES and field_type is not None:
+        # keyword/숫자/날짜 필드는 전체 값 일치
+        value = _term_value(ctx.index, field, query_text)
+        return 1.0 if value in ctx.terms(field) else None
+
+    analyzer = ctx.index.analyzer_for(spec, search=True)
+    query_tokens = analyzer(query_text)
+    if not query_tokens:
+        return None
+    field_tokens = ctx.terms(field)
+    if not field_tokens:
+        return None
+    counts: Dict[str, int] = {}
+    for token in field_tokens:
+        counts[token] = counts.get(token, 0) + 1
+
+    fuzziness = options.get("fuzziness")
+    score = 0.0
+    matched = 0
+    for token in query_tokens:
+        tf = counts.get(token, 0)
+        if not tf and fuzziness:
+            limit = _fuzziness(token, fuzziness)
+            if limit:
+                tf = sum(c for t, c in counts.items() if _edit_distance(token, t, limit) <= limit)
+        if tf:
+            matched += 1
+            score += _tf_score(tf)
+
+    operator = str(options.get("operator", "or")).lower()
+    required = len(query_tokens) if operator == "and" else _minimum_should_match(options.get("minimum_should_match"), len(query_tokens), 1)
+    if matched < required:
+        return None
+    return score * float(options.get("boost", 1.0))
+
+def _minimum_should_match(value: Any, clauses: int, default: int) -> int:
+    if value is None:
+        return default
+    text = str(value).strip()
+    if text.endswith("%"):
+        percent = int(text[:-1])
+        count = int(clauses * abs(percent) / 100)
+        return count if percent >= 0 else clauses - count
+    number = int(text)
+    return number if number >= 0 else clauses + number
+
+def _match_phrase_field(ctx: _Context, field: str, options: Dict[str, Any]) -> Optional[float]:
+    spec = ctx.index.mapping.field(field)
+    analyzer = ctx.index.analyzer_for(spec, search=True)
+    phrase = analyzer(options.get("query", ""))
+    if not phrase:
+        return None
+    count = 0
+    for value in ctx.raw(field):
+        tokens = analyzer(value) if spec.get("type") in TEXT_TYPES or spec.get("type") is None else [str(value)]
+        for i in range(len(tokens) - len(phrase) + 1):
+            if tokens[i:i + len(phrase)] == phrase:
+                count += 1
+    if not count:
+        return None
+    return _tf_score(count) * len(phrase) * float(options.get("boost", 1.0))
+
+def _parse_field_boost(field: str) -> Tuple[str, float]:
+    if "^" in field:
+        name, boost = field.split("^", 1)
+        return name, float(boost)
+    return field, 1.0
+
+SCRIPT_PATTERN = re.compile(
+    r"^\s*(cosineSimilarity|dotProduct|l1norm|l2norm)\(\s*params\.(\w+)\s*,\s*['\"]([^'\"]+)['\"]\s*\)"
+    r"\s*(?:([+*\-/])\s*([0-9.]+))?\s*$"
+)
+
+def _cosine(a: List[float], b: List[float]) -> float:
+    dot = sum(x * y for x, y in zip(a, b))
+    norm = math.sqrt(sum(x * x for x in a)) * math.sqrt(sum(y * y for y in b))
+    return dot / norm if norm else 0.0
+
+VECTOR_FUNCTIONS = {
+    "cosineSimilarity": _cosine,
+    "dotProduct": lambda a, b: sum(x * y for x, y in zip(a, b)),
+    "l1norm": lambda a, b: sum(abs(x - y) for x, y in zip(a, b)),
+    "l2norm": lambda a, b: math.sqrt(sum((x - y) ** 2 for x, y in zip(a, b))),
+}
+
+def _run_script(ctx: _Context, script: Dict[str, Any], score: float) -> float:
+    """script_score 스크립트 실행 (벡터 함수 ± 상수, _score 형태만 지원)"""
+    source = script.get("source", "").strip().rstrip(";")
+    params = script.get("params", {})
+    if source == "_score":
+        return score
+    match = SCRIPT_PATTERN.match(source)
+    if not match:
+        raise _error(BadRequestError, 400, "script_exception", f"unsupported script [{source}]")
+    function, param, field, operator, operand = match.groups()
+    vectors = ctx.vectors(field)
+    if not vectors:
+        raise _error(BadRequestError, 400, "script_exception",
+                     f"A document doesn't have a value for a vector field [{field}]!")
+    value = VECTOR_FUNCTIONS[function](params[param], vectors[0])
+    if operator:
+        operand = float(operand)
+        value = {"+": value + operand, "-": value - operand, "*": value * operand, "/": value / operand}[operator]
+    return value
+
+def evaluate(query: Dict[str, Any], ctx: _Context) -> Optional[float]:
+    """쿼리 평가: 일치하면 점수, 아니면 None"""
+    if not query:
+        return 1.0
+    if len(query) != 1:
+        raise _bad_request(f"[{list(query)}] malformed query, expected a single query type")
+    query_type, body = next(iter(query.items()))
+    handler = QUERY_HANDLERS.get(query_type)
+    if handler is None:
+        raise _bad_request(f"unknown query [{query_type}]")
+    return handler(body, ctx)
+
+def _as_list(value: Any) -> List[Any]:
+    if value is None:
+        return []
+    return value if isinstance(value, list) else [value]
+
+def _bool_query(body: Dict[str, Any], ctx: _Context) -> Optional[float]:
+    must = _as_list(body.get("must"))
+    filters = _as_list(body.get("filter"))
+    should = _as_list(body.get("should"))
+    must_not = _as_list(body.get("must_not"))
+    score = 0.0
+    for clause in must:
+        clause_score = evaluate(clause, ctx)
+        if clause_score is None:
+            return None
+        score += clause_score
+    for clause in filters:
+        if evaluate(clause, ctx) is None:
+            return None
+    for clause in must_not:
+        if evaluate(clause, ctx) is not None:
+            return None
+    if should:
+        required = _minimum_should_match(body.get("minimum_should_match"), len(should), 0 if (must or filters) else 1)
+        matched = 0
+        for clause in should:
+            clause_score = evaluate(clause, ctx)
+            if clause_score is not None:
+                matched += 1
+                score += clause_score
+        if matched < required:
+            return None
+    return score * float(body.get("boost", 1.0))
+
+def _term_query(body: Dict[str, Any], ctx: _Context) -> Optional[float]:
+    field, options = _unpack(body)
+    value = _term_value(ctx.index, field, options["value"])
+    values = ctx.terms(field)
+    if options.get("case_insensitive") and isinstance(value, str):
+        found = value.lower() in (str(v).lower() for v in values)
+    else:
+        found = value in values
+    return float(options.get("boost", 1.0)) if found else None
+
+def _terms_query(body: Dict[str, Any], ctx: _Context) -> Optional[float]:
+    boost = float(body.get("boost", 1.0))
+    fields = [k for k in body if k not in ("boost", "_name")]
+    field = fields[0]
+    wanted = {_term_value(ctx.index, field, v) for v in body[field]}
+    return boost if any(v in wanted for v in ctx.terms(field)) else None
+
+def _ids_query(body: Dict[str, Any], ctx: _Context) -> Optional[float]:
+    return 1.0 if ctx.doc.id in set(map(str, body.get("values", []))) else None
+
+def _prefix_query(body: Dict[str, Any], ctx: _Context) -> Optional[float]:
+    field, options = _unpack(body)
+    prefix = _term_value(ctx.index, field, options["value"])
+    if options.get("case_insensitive"):
+        prefix = prefix.lower()
+        return 1.0 if any(str(v).lower().startswith(prefix) for v in ctx.terms(field)) else None
+    return float(options.get("boost", 1.0)) if any(str(v).startswith(prefix) for v in ctx.terms(field)) else None
+
+def _wildcard_query(body: Dict[str, Any], ctx: _Context) -> Optional[float]:
+    field, options = _unpack(body)
+    pattern = options.get("value", options.get("wildcard"))
+    return float(options.get("boost", 1.0)) if any(fnmatch.fnmatchcase(str(v), pattern) for v in ctx.terms(field)) else None
+
+def _exists_query(body: Dict[str, Any], ctx: _Context) -> Optional[float]:
+    field = body["field"]
+    spec = ctx.index.mapping.field(field)
+    if spec.get("type") == "dense_vector":
+        return 1.0 if ctx.vectors(field) else None
+    parts = ctx._relative(spec["source_path"]) if spec.get("type") != "nested" else (
+        field[len(ctx.scope) + 1:].split(".") if ctx.scope else field.split("."))
+    if parts is None:
+        return None
+    values = [v for v in _raw_values(ctx.obj, parts) if v is not None and v != []]
+    return 1.0 if values else None
+
+def _range_query(body: Dict[str, Any], ctx: _Context) -> Optional[float]:
+    field, options = _unpack(body)
+    spec = ctx.index.mapping.field(field)
+    convert = (lambda v: _parse_date(v)) if spec.get("type") == "date" else (
+        (lambda v: float(v)) if spec.get("type") in NUMERIC_TYPES else (lambda v: v))
+    bounds = {op: convert(options[op]) for op in ("gt", "gte", "lt", "lte") if options.get(op) is not None}
+    if "from" in options and options["from"] is not None:
+        bounds["gte" if options.get("include_lower", True) else "gt"] = convert(options["from"])
+    if "to" in options and options["to"] is not None:
+        bounds["lte" if options.get("include_upper", True) else "lt"] = convert(options["to"])
+    for value in ctx.raw(field):
+        value = convert(value)
+        if value is None:
+            continue
+        if "gt" in bounds and not value > bounds["gt"]:
+            continue
+        if "gte" in bounds and not value >= bounds["gte"]:
+            continue
+        if "lt" in bounds and not value < bounds["lt"]:
+            continue
+        if "lte" in bounds and not value <= bounds["lte"]:
+            continue
+        return float(options.get("boost", 1.0))
+    return None
+
+def _match_query(body: Dict[str, Any], ctx: _Context) -> Optional[float]:
+    field, options = _unpack(body, "query")
+    return _match_field(ctx, field, options)
+
+def _match_phrase_query(body: Dict[str, Any], ctx: _Context) -> Optional[float]:
+    field, options = _unpack(body, "query")
+    return _match_phrase_field(ctx, field, options)
+
+def _multi_match_query(body: Dict[str, Any], ctx: _Context) -> Optional[float]:
+    match_type = body.get("type", "best_fields")
+    options = {k: v for k, v in body.items() if k in ("query", "operator", "fuzziness", "minimum_should_match")}
+    scores = []
+    for pattern in body.get("fields", ["*"]):
+        pattern, field_boost = _parse_field_boost(pattern)
+        for field in ctx.index.mapping.expand(pattern):
+            if match_type in ("phrase", "phrase_prefix"):
+                score = _match_phrase_field(ctx, field, options)
+            else:
+                score = _match_field(ctx, field, options)
+            if score is not None:
+                scores.append(score * field_boost)
+    if not scores:
+        return None
+    if match_type == "most_fields":
+        total = sum(scores)
+    else:
+        best = max(scores)
+        total = best + float(body.get("tie_breaker", 0.0)) * (sum(scores) - best)
+    return total * float(body.get("boost", 1.0))
+
+def _nested_query(body: Dict[str, Any], ctx: _Context) -> Optional[float]:
+    path = body["path"]
+    if ctx.index.mapping.field(path).get("type") != "nested":
+        if body.get("ignore_unmapped"):
+            return None
+        raise _error(BadRequestError, 400, "query_shard_exception", f"[nested] failed to find nested object under path [{path}]")
+    parts = ctx._relative(path) if ctx.index.mapping.nested_parent(path) == ctx.scope else None
+    if parts is None:
+        return None
+    objects = _raw_values(ctx.obj, parts)
+    matches = []
+    for offset, obj in enumerate(objects):
+        if not isinstance(obj, dict):
+            continue
+        child = _Context(ctx.index, ctx.doc, obj, path)
+        score = evaluate(body.get("query", {"match_all": {}}), child)
+        if score is not None:
+            matches.append((offset, score, obj))
+    if not matches:
+        return None
+    inner = body.get("inner_hits")
+    if inner is not None and ctx.inner_hits is not None:
+        ctx.inner_hits[inner.get("name", path)] = (path, inner, matches)
+    scores = [score for _, score, _ in matches]
+    score_mode = body.get("score_mode", "avg")
+    combined = {
+        "avg": lambda: sum(scores) / len(scores),
+        "max": lambda: max(scores),
+        "min": lambda: min(scores),
+        "sum": lambda: sum(scores),
+        "none": lambda: 0.0,
+    }[score_mode]()
+    return combined * float(body.get("boost", 1.0))
+
+def _script_score_query(body: Dict[str, Any], ctx: _Context) -> Optional[float]:
+    score = evaluate(body.get("query", {"match_all": {}}), ctx)
+    if score is None:
+        return None
+    result = _run_script(ctx, body["script"], score)
+    if result < 0:
+        raise _error(BadRequestError, 400, "illegal_argument_exception", "script score function must not produce negative scores")
+    if body.get("min_score") is not None and result < body["min_score"]:
+        return None
+    return result * float(body.get("boost", 1.0))
+
+def _constant_score_query(body: Dict[str, Any], ctx: _Context) -> Optional[float]:
+    return float(body.get("boost", 1.0)) if evaluate(body["filter"], ctx) is not None else None
+
+def _dis_max_query(body: Dict[str, Any], ctx: _Context) -> Optional[float]:
+    scores = [s for s in (evaluate(q, ctx) for q in body.get("queries", [])) if s is not None]
+    if not scores:
+        return None
+    best = max(scores)
+    return (best + float(body.get("tie_breaker", 0.0)) * (sum(scores) - best)) * float(body.get("boost", 1.0))
+
+QUERY_HANDLERS: Dict[str, Callable[[Any, _Context], Optional[float]]] = {
+    "match_all": lambda body, ctx: float(body.get("boost", 1.0)),
+    "match_none": lambda body, ctx: None,
+    "bool": _bool_query,
+    "term": _term_query,
+    "terms": _terms_query,
+    "ids": _ids_query,
+    "prefix": _prefix_query,
+    "wildcard": _wildcard_query,
+    "exists": _exists_query,
+    "range": _range_query,
+    "match": _match_query,
+    "match_phrase": _match_phrase_query,
+    "multi_match": _multi_match_query,
+    "nested": _nested_query,
+    "script_score": _script_score_query,
+    "constant_score": _constant_score_query,
+    "dis_max": _dis_max_query,
+}
+
+# ---------------------------------------------------------------------------
+# knn
+# ---------------------------------------------------------------------------
+
+def _knn_similarity(similarity: str, query_vector: List[float], vector: List[float]) -> float:
+    """ES knn 점수 변환 (similarity 종류별)"""
+    if similarity == "l2_norm":
+        return 1 / (1 + sum((x - y) ** 2 for x, y in zip(query_vector, vector)))
+    if similarity in ("dot_product", "max_inner_product"):
+        dot = sum(x * y for x, y in zip(query_vector, vector))
+        return (1 + dot) / 2 if similarity == "dot_product" else (1 / (1 - dot) if dot < 0 else dot + 1)
+    return (1 + _cosine(query_vector, vector)) / 2
+
+def _knn_scores(index: _Index, docs: List[_Doc], knn: Dict[str, Any]) -> Dict[Tuple[str, str], float]:
+    field = knn["field"]
+    spec = index.mapping.field(field)
+    similarity = spec.get("similarity", "cosine")
+    query_vector = knn["query_vector"]
+    nested = index.mapping.nested_parent(field)
+    scored = []
+    for doc in docs:
+        ctx = _Context(index, doc, doc.source, None)
+        if knn.get("filter") and all(evaluate(f, ctx) is None for f in _as_list(knn["filter"])):
+            continue
+        vectors = _vector_values(doc.source, field.split("."))
+        if not vectors:
+            continue
+        # nested 벡터는 문서별 최고 점수 사용
+        score = max(_knn_similarity(similarity, query_vector, v) for v in vectors)
+        if knn.get("similarity") is not None and score < knn["similarity"]:
+            continue
+        scored.append(((doc.index, doc.id), score * float(knn.get("boost", 1.0))))
+    del nested
+    scored.sort(key=lambda item: item[1], reverse=True)
+    return dict(scored[:int(knn.get("k", 10))])
+
+# ---------------------------------------------------------------------------
+# _source 필터 / 정렬 / 하이라이트
+# ---------------------------------------------------------------------------
+
+def _source_patterns(spec: Any) -> Tuple[List[str], List[str]]:
+    if spec is None or spec is True:
+        return [], []
+    if isinstance(spec, str):
+        return [spec], []
+    if isinstance(spec, list):
+        return list(spec), []
+    includes = spec.get("includes", spec.get("include", []))
+    excludes = spec.get("excludes", spec.get("exclude", []))
+    return _as_list(includes), _as_list(excludes)
+
+def _path_matches(path: str, pattern: str) -> bool:
+    return fnmatch.fnmatchcase(path, pattern) or path.startswith(pattern + ".")
+
+def filter_source(source: Dict[str, Any], spec: Any, prefix: str = "") -> Optional[Dict[str, Any]]:
+    """_source includes/excludes 적용 (prefix: nested 객체의 전체 경로)"""
+    if spec is False:
+        return None
+    includes, excludes = _source_patterns(spec)
+    if not includes and not excludes:
+        return copy.deepcopy(source)
+    return _filter_object(source, prefix, includes, excludes, not includes)
+
+def _filter_object(obj: Dict[str, Any], prefix: str, includes, excludes, included: bool) -> Dict[str, Any]:
+    result = {}
+    for key, value in obj.items():
+        path = prefix + key
+        if any(_path_matches(path, p) for p in excludes):
+            continue
+        key_included = included or any(_path_matches(path, p) for p in includes)
+        partially = not key_included and any(p.startswith(path + ".") or fnmatch.fnmatchcase(path, p.split(".")[0]) and "." in p
+                                             for p in includes)
+        if not key_included and not partially:
+            continue
+        filtered = _filter_value(value, path, includes, excludes, key_included)
+        if filtered is _SKIP:
+            continue
+        result[key] = filtered
+    return result
+
+_SKIP = object()
+
+def _filter_value(value: Any, path: str, includes, excludes, included: bool) -> Any:
+    if isinstance(value, dict):
+        filtered = _filter_object(value, path + ".", includes, excludes, included)
+        return filtered if (filtered or included) else _SKIP
+    if isinstance(value, list) and any(isinstance(v, dict) for v in value):
+        items = [_filter_value(v, path, includes, excludes, included) for v in value]
+        items = [v for v in items if v is not _SKIP]
+        return items if (items or included) else _SKIP
+    return copy.deepcopy(value) if included else _SKIP
+
+def _parse_sort(sort: Any) -> List[Tuple[str, str, Dict[str, Any]]]:
+    """sort 정의 → (필드, 방향, 옵션) 목록"""
+    result = []
+    for item in _as_list(sort):
+        if isinstance(item, str):
+            field, _, order = item.partition(":")
+            options = {}
+        else:
+            field, value = next(iter(item.items()))
+            options = value if isinstance(value, dict) else {"order": value}
+            order = options.get("order")
+        order = order or ("desc" if field == "_score" else "asc")
+        result.append((field, order, options))
+    return result
+
+def _sort_value(index: _Index, doc: _Doc, score: float, field: str, order: str, options: Dict[str, Any]) -> Any:
+    if field == "_score":
+        return score
+    if field in ("_doc", "_shard_doc"):
+        return doc.seq
+    if field == "_id":
+        return doc.id
+    ctx = _Context(index, doc, doc.source, None)
+    spec = index.mapping.field(field)
+    values = [_typed_value(index, spec, v) for v in ctx.raw(field)] if spec.get("type") else ctx.raw(field)
+    values = [v for v in values if v is not None]
+    if not values:
+        return None
+    if spec.get("type") == "date":
+        # ES와 같이 날짜 정렬 값은 epoch millis 정수
+        values = [int(v) for v in values]
+    mode = options.get("mode", "max" if order == "desc" else "min")
+    if mode == "avg" and all(isinstance(v, (int, float)) for v in values):
+        return sum(values) / len(values)
+    if mode == "sum" and all(isinstance(v, (int, float)) for v in values):
+        return sum(values)
+    return max(values) if mode == "max" else min(values)
+
+def _compare_keys(a: List[Any], b: List[Any], orders: List[str]) -> int:
+    """정렬 키 비교 (값 없음은 항상 뒤로)"""
+    for x, y, order in zip(a, b, orders):
+        if x == y:
+            continue
+        if x is None:
+            return 1
+        if y is None:
+            return -1
+        try:
+            less = x < y
+        except TypeError:
+            less = str(x) < str(y)
+        result = -1 if less else 1
+        return result if order == "asc" else -result
+    return 0
+
+def _query_terms(index: _Index, query: Any, collected: Dict[str, set]):
+    """하이라이트용: 쿼리에서 필드별 검색어 토큰 수집"""
+    if isinstance(query, list):
+        for item in query:
+            _query_terms(index, item, collected)
+        return
+    if not isinstance(query, dict):
+        return
+    for query_type, body in query.items():
+        if query_type in ("match", "match_phrase", "term", "prefix"):
+            field, options = _unpack(body, "query" if query_type.startswith("match") else "value")
+            text = options.get("query", options.get("value"))
+            if text is None:
+                continue
+            spec = index.mapping.field(field)
+            analyzer = index.analyzer_for(spec, search=True) if spec.get("type") in TEXT_TYPES else None
+            tokens = analyzer(text) if analyzer and query_type.startswith("match") else [str(text)]
+            collected.setdefault(field, set()).update(tokens)
+        elif query_type == "terms":
+            for field, values in body.items():
+                if field != "boost":
+                    collected.setdefault(field, set()).update(str(v) for v in values)
+        elif query_type == "multi_match":
+            for pattern in body.get("fields", ["*"]):
+                for field in index.mapping.expand(_parse_field_boost(pattern)[0]):
+                    spec = index.mapping.field(field)
+                    tokens = index.analyzer_for(spec, search=True)(body["query"]) if spec.get("type") in TEXT_TYPES else [str(body["query"])]
+                    collected.setdefault(field, set()).update(tokens)
+        elif query_type == "bool":
+            for clause in ("must", "should", "filter"):
+                _query_terms(index, body.get(clause), collected)
+        elif query_type in ("nested", "script_score", "constant_score"):
+            _query_terms(index, body.get("query", body.get("filter")), collected)
+        elif query_type == "dis_max":
+            _query_terms(index, body.get("queries"), collected)
+
+def _highlight(index: _Index, doc: _Doc, spec: Dict[str, Any], terms: Dict[str, set]) -> Dict[str, List[str]]:
+    pre_tag = _as_list(spec.get("pre_tags", ["<em>"]))[0]
+    post_tag = _as_list(spec.get("post_tags", ["</em>"]))[0]
+    fields = spec.get("fields", {})
+    if isinstance(fields, list):
+        fields = {k: v for item in fields for k, v in item.items()}
+    result = {}
+    for pattern, options in fields.items():
+        options = dict(spec, **(options or {}))
+        for field in index.mapping.expand(pattern):
+            wanted = terms.get(field, set()) if options.get("require_field_match", True) else set().union(*terms.values()) if terms else set()
+            if not wanted:
+                continue
+            field_spec = index.mapping.field(field)
+            analyzer = index.analyzer_for(field_spec) if field_spec.get("type") in TEXT_TYPES else None
+            fragments = []
+            # 하이라이트는 nested 여부와 관계없이 원본 값 기준으로 표시
+            for value in _raw_values(doc.source, field_spec["source_path"].split(".")):
+                if not isinstance(value, str):
+                    continue
+                fragment = _highlight_value(value, wanted, analyzer, pre_tag, post_tag, options)
+                if fragment:
+                    fragments.append(fragment)
+            limit = int(options.get("number_of_fragments", 5))
+            if fragments:
+                result[field] = fragments[:limit] if limit else fragments
+    return result
+
+def _highlight_value(value: str, wanted: set, analyzer: Optional[Analyzer], pre_tag: str, post_tag: str,
+                     options: Dict[str, Any]) -> Optional[str]:
+    if analyzer is None:
+        return f"{pre_tag}{value}{post_tag}" if value in wanted else None
+    spans = [m.span() for m in STANDARD_TOKEN.finditer(value) if (analyzer(m.group()) or [None])[0] in wanted]
+    if not spans:
+        return None
+    size = int(options.get("fragment_size", 100))
+    start, end = 0, len(value)
+    if options.get("number_of_fragments", 5) != 0 and len(value) > size:
+        start = max(0, spans[0][0] - size // 4)
+        end = min(len(value), start + size)
+    parts = []
+    cursor = start
+    for span_start, span_end in spans:
+        if span_start < start or span_end > end:
+            continue
+        parts.append(value[cursor:span_start])
+        parts.append(pre_tag + value[span_start:span_end] + post_tag)
+        cursor = span_end
+    parts.append(value[cursor:end])
+    return "".join(parts)
+
+# ---------------------------------------------------------------------------
+# 집계
+# ---------------------------------------------------------------------------
+
+CALENDAR_INTERVALS = {"minute": "m", "1m": "m", "hour": "h", "1h": "h", "day": "d", "1d": "d", "week": "w", "1w": "w",
+                      "month": "M", "1M": "M", "quarter": "q", "1q": "q", "year": "y", "1y": "y"}
+FIXED_UNITS = {"ms": 0.001, "s": 1, "m": 60, "h": 3600, "d": 86400}
+
+def _next_calendar(dt: datetime.datetime, unit: str) -> datetime.datetime:
+    if unit == "y":
+        return datetime.datetime(dt.year + 1, 1, 1)
+    if unit in ("M", "q"):
+        step = 3 if unit == "q" else 1
+        month = dt.month - 1 + step
+        return datetime.datetime(dt.year + month // 12, month % 12 + 1, 1)
+    return dt + datetime.timedelta(seconds=DATE_MATH_UNITS[unit])
+
+def _agg_values(ctx: _Context, field: str) -> List[Any]:
+    spec = ctx.index.mapping.field(field)
+    values = ctx.raw(field)
+    if spec.get("type") in TEXT_TYPES or spec.get("type") is None:
+        return [v if not isinstance(v, str) else v for v in values]
+    return [_typed_value(ctx.index, spec, v) for v in values]
+
+def aggregate(aggs: Dict[str, Any], contexts: List[_Context]) -> Dict[str, Any]:
+    result = {}
+    for name, definition in aggs.items():
+        sub_aggs = definition.get("aggs", definition.get("aggregations", {}))
+        agg_types = [k for k in definition if k not in ("aggs", "aggregations", "meta")]
+        if len(agg_types) != 1:
+            raise _bad_request(f"Expected exactly one aggregation type for [{name}]")
+        agg_type = agg_types[0]
+        body = definition[agg_type]
+        handler = AGG_HANDLERS.get(agg_type)
+        if handler is None:
+            raise _bad_request(f"Unknown aggregation type [{agg_type}]")
+        result[name] = handler(body, contexts, sub_aggs)
+    return result
+
+def _bucket(key: Any, contexts: List[_Context], sub_aggs: Dict[str, Any], **extra) -> Dict[str, Any]:
+    bucket = {"key": key, **extra, "doc_count": len(contexts)}
+    bucket.update(aggregate(sub_aggs, contexts))
+    return bucket
+
+def _terms_agg(body, contexts, sub_aggs):
+    field = body["field"]
+    groups: Dict[Any, List[_Context]] = {}
+    for ctx in contexts:
+        values = set(_agg_values(ctx, field))
+        if not values and body.get("missing") is not None:
+            values = {body["missing"]}
+        for value in values:
+            groups.setdefault(value, []).append(ctx)
+    order = body.get("order", {"_count": "desc"})
+    order_key, direction = next(iter((order[0] if isinstance(order, list) else order).items()))
+    if order_key == "_key":
+        ordered = sorted(groups.items(), key=lambda item: item[0], reverse=direction == "desc")
+    else:
+        ordered = sorted(groups.items(), key=lambda item: (-len(item[1]) if direction == "desc" else len(item[1]), str(item[0])))
+    ordered = [item for item in ordered if len(item[1]) >= body.get("min_doc_count", 1)]
+    size = int(body.get("size", 10))
+    spec = contexts[0].index.mapping.field(field) if contexts else {}
+    buckets = []
+    for key, members in ordered[:size]:
+        if spec.get("type") == "date":
+            buckets.append(_bucket(int(key), members, sub_aggs, key_as_string=_millis_to_iso(key)))
+        elif spec.get("type") in NUMERIC_TYPES and float(key).is_integer() and spec.get("type") not in ("double", "float", "half_float", "scaled_float"):
+            buckets.append(_bucket(int(key), members, sub_aggs))
+        else:
+            buckets.append(_bucket(key, members, sub_aggs))
+    return {
+        "doc_count_error_upper_bound": 0,
+        "sum_other_doc_count": sum(len(m) for _, m in ordered[size:]),
+        "buckets": buckets,
+    }
+
+def _date_histogram_agg(body, contexts, sub_aggs):
+    field = body["field"]
+    interval = body.get("calendar_interval") or body.get("interval")
+    fixed = body.get("fixed_interval")
+    groups: Dict[float, List[_Context]] = {}
+    for ctx in contexts:
+        for millis in {_parse_date(v) for v in ctx.raw(field)}:
+            if millis is None:
+                continue
+            dt = datetime.datetime(1970, 1, 1) + datetime.timedelta(milliseconds=millis)
+            if fixed:
+                amount, unit = re.fullmatch(r"(\d+)(ms|s|m|h|d)", fixed).groups()
+                step = int(amount) * FIXED_UNITS[unit] * 1000
+                key = millis // step * step
+            else:
+                key = _parse_date(_round_date(dt, CALENDAR_INTERVALS.get(interval, interval)))
+            groups.setdefault(key, []).append(ctx)
+    if not groups:
+        return {"buckets": []}
+    keys = sorted(groups)
+    min_doc_count = body.get("min_doc_count", 0)
+    all_keys = keys
+    if min_doc_count == 0:
+        # 빈 구간 채움
+        all_keys = []
+        current = keys[0]
+        while current <= keys[-1]:
+            all_keys.append(current)
+            if fixed:
+                current += step
+            else:
+                dt = datetime.datetime(1970, 1, 1) + datetime.timedelta(milliseconds=current)
+                current = _parse_date(_next_calendar(dt, CALENDAR_INTERVALS.get(interval, interval)))
+    buckets = [
+        _bucket(int(key), groups.get(key, []), sub_aggs, key_as_string=_millis_to_iso(key))
+        for key in all_keys if len(groups.get(key, [])) >= min_doc_count
+    ]
+    return {"buckets": buckets}
+
+def _histogram_agg(body, contexts, sub_aggs):
+    field = body["field"]
+    interval = float(body["interval"])
+    groups: Dict[float, List[_Context]] = {}
+    for ctx in contexts:
+        for value in {float(v) for v in _agg_values(ctx, field) if v is not None}:
+            groups.setdefault(math.floor(value / interval) * interval, []).append(ctx)
+    min_doc_count = body.get("min_doc_count", 0)
+    keys = sorted(groups)
+    if keys and min_doc_count == 0:
+        count = int(round((keys[-1] - keys[0]) / interval)) + 1
+        keys = [keys[0] + i * interval for i in range(count)]
+    return {"buckets": [_bucket(key, groups.get(key, []), sub_aggs) for key in keys if len(groups.get(key, [])) >= min_doc_count]}
+
+def _nested_agg(body, contexts, sub_aggs):
+    path = body["path"]
+    children = []
+    for ctx in contexts:
+        parts = ctx._relative(path) if ctx.index.mapping.nested_parent(path) == ctx.scope else None
+        if parts is None:
+            continue
+        for obj in _raw_values(ctx.obj, parts):
+            if isinstance(obj, dict):
+                children.append(_Context(ctx.index, ctx.doc, obj, path))
+    return {"doc_count": len(children), **aggregate(sub_aggs, children)}
+
+def _filter_agg(body, contexts, sub_aggs):
+    matched = [ctx for ctx in contexts if evaluate(body, ctx) is not None]
+    return {"doc_count": len(matched), **aggregate(sub_aggs, matched)}
+
+def _numeric_values(body, contexts) -> List[float]:
+    values = []
+    for ctx in contexts:
+        values.extend(float(v) for v in _agg_values(ctx, body["field"]) if v is not None)
+    return values
+
+def _metric(function):
+    def handler(body, contexts, sub_aggs):
+        values = _numeric_values(body, contexts)
+        return {"value": function(values) if values else None}
+    return handler
+
+def _stats_agg(body, contexts, sub_aggs):
+    values = _numeric_values(body, contexts)
+    return {
+        "count": len(values),
+        "min": min(values) if values else None,
+        "max": max(values) if values else None,
+        "avg": sum(values) / len(values) if values else None,
+        "sum": sum(values),
+    }
+
+AGG_HANDLERS = {
+    "terms": _terms_agg,
+    "date_histogram": _date_histogram_agg,
+    "histogram": _histogram_agg,
+    "nested": _nested_agg,
+    "filter": _filter_agg,
+    "value_count": lambda body, contexts, sub: {"value": sum(len(_agg_values(c, body["field"])) for c in contexts)},
+    "cardinality": lambda body, contexts, sub: {"value": len({v for c in contexts for v in _agg_values(c, body["field"])})},
+    "min": _metric(min),
+    "max": _metric(max),
+    "avg": _metric(lambda values: sum(values) / len(values)),
+    "sum": lambda body, contexts, sub: {"value": sum(_numeric_values(body, contexts))},
+    "stats": _stats_agg,
+}
+
+# ---------------------------------------------------------------------------
+# 클라이언트
+# ---------------------------------------------------------------------------
+
+SEARCH_BODY_PARAMS = ("query", "size", "from_", "sort", "_source", "source_excludes", "source_includes", "highlight",
+                      "aggs", "aggregations", "track_total_hits", "search_after", "pit", "knn", "min_score")
+
+class _Transport:
+    """helpers.streaming_bulk가 사용하는 serializer 조회만 지원"""
+    class _Serializers:
+        def __init__(self):
+            self._json = JsonSerializer()
+
+        def get_serializer(self, mimetype: str):
+            return self._json
+
+    def __init__(self):
+        self.serializers = self._Serializers()
+
+class InMemoryElasticsearch:
+    """Elasticsearch 클라이언트 대체 (단일 프로세스, 스레드 안전)"""
+    def __init__(self):
+        self._indices: Dict[str, _Index] = {}
+        self._aliases: Dict[str, List[str]] = {}
+        self._templates: Dict[str, Dict[str, Any]] = {}
+        self._pits: Dict[str, List[Tuple[_Index, _Doc]]] = {}
+        self._seq = itertools.count()
+        self._lock = threading.RLock()
+        self.transport = _Transport()
+        self.indices = _IndicesClient(self)
+        self.nodes = _NodesClient(self)
+        self.cluster = _ClusterClient(self)
+
+    # -- 공통 --------------------------------------------------------------
+
+    def options(self, **kwargs) -> "InMemoryElasticsearch":
+        return self
+
+    def info(self, **kwargs):
+        return _response({"name": "memory", "cluster_name": "in-memory", "version": {"number": "8.13.0"}})
+
+    def ping(self, **kwargs) -> bool:
+        return True
+
+    def close(self):
+        pass
+
+    def _resolve(self, index: Any, allow_missing: bool = False) -> List[_Index]:
+        """인덱스 이름/alias/wildcard/콤마 목록 → 인덱스 목록"""
+        if index is None or index in ("_all", "*"):
+            return list(self._indices.values())
+        names = index if isinstance(index, list) else str(index).split(",")
+        resolved = []
+        for name in names:
+            name = name.strip()
+            if "*" in name:
+                resolved.extend(i for n, i in self._indices.items() if fnmatch.fnmatchcase(n, name))
+                resolved.extend(self._indices[n] for alias, targets in self._aliases.items()
+                                if fnmatch.fnmatchcase(alias, name) for n in targets)
+            elif name in self._indices:
+                resolved.append(self._indices[name])
+            elif name in self._aliases:
+                resolved.extend(self._indices[n] for n in self._aliases[name])
+            elif not allow_missing:
+                raise _index_not_found(name)
+        unique = []
+        for item in resolved:
+            if item not in unique:
+                unique.append(item)
+        return unique
+
+    def _write_index(self, index: str) -> _Index:
+        """쓰기 대상 인덱스 (없으면 동적 매핑으로 생성, alias는 is_write_index 또는 단일 대상)"""
+        if index in self._indices:
+            return self._indices[index]
+        if index in self._aliases:
+            targets = self._aliases[index]
+            writable = [n for n in targets if self._indices[n].settings.get("_write_alias_" + index)]
+            if len(writable) == 1:
+                return self._indices[writable[0]]
+            if len(targets) == 1:
+                return self._indices[targets[0]]
+            raise _error(BadRequestError, 400, "illegal_argument_exception",
+                         f"no write index is defined for alias [{index}]")
+        return self.indices._create(index, {})
+
+    # -- 문서 --------------------------------------------------------------
+
+    def index(self, index: str, document: Dict[str, Any] = None, body: Dict[str, Any] = None, id: str = None,
+              op_type: str = None, refresh=None, **kwargs):
+        with self._lock:
+            target = self._write_index(index)
+            doc_id = str(id) if id is not None else uuid.uuid4().hex[:20]
+            existing = target.docs.get(doc_id)
+            if existing is not None and op_type == "create":
+                raise _error(ConflictError, 409, "version_conflict_engine_exception",
+                             f"[{doc_id}]: version conflict, document already exists")
+            source = copy.deepcopy(document if document is not None else body)
+            version = existing.version + 1 if existing else 1
+            target.docs[doc_id] = _Doc(target.name, doc_id, next(self._seq), version, source)
+            target.stats["index_total"] += 1
+        return _response({"_index": target.name, "_id": doc_id, "_version": version,
+                          "result": "updated" if existing else "created", "_seq_no": version - 1, "_primary_term": 1})
+
+    def create(self, index: str, id: str, document: Dict[str, Any] = None, body: Dict[str, Any] = None, **kwargs):
+        return self.index(index=index, id=id, document=document, body=body, op_type="create")
+
+    def _find(self, index: str, doc_id: str) -> Tuple[_Index, Optional[_Doc]]:
+        targets = self._resolve(index)
+        for target in targets:
+            if str(doc_id) in target.docs:
+                return target, target.docs[str(doc_id)]
+        return (targets[0] if targets else None), None
+
+    def get(self, index: str, id: str, _source=None, **kwargs):
+        with self._lock:
+            target, doc = self._find(index, id)
+        if doc is None:
+            raise _error(NotFoundError, 404, "not_found", f"[{id}] not found")
+        return _response({"_index": target.name, "_id": doc.id, "_version": doc.version, "found": True,
+                          "_source": filter_source(doc.source, _source)})
+
+    def mget(self, index: str = None, ids: List[str] = None, docs: List[Dict[str, Any]] = None,
+             body: Dict[str, Any] = None, _source=None, **kwargs):
+        if body:
+            ids = body.get("ids", ids)
+            docs = body.get("docs", docs)
+        requests = docs if docs is not None else [{"_id": doc_id} for doc_id in ids or []]
+        results = []
+        with self._lock:
+            for request in requests:
+                target_index = request.get("_index", index)
+                target, doc = self._find(target_index, request["_id"])
+                if doc is None:
+                    results.append({"_index": target.name if target else target_index, "_id": str(request["_id"]), "found": False})
+                else:
+                    results.append({"_index": target.name, "_id": doc.id, "_version": doc.version, "found": True,
+                                    "_source": filter_source(doc.source, request.get("_source", _source))})
+        return _response({"docs": results})
+
+    def exists(self, index: str, id: str, **kwargs):
+        with self._lock:
+            _, doc = self._find(index, id)
+        return HeadApiResponse(meta=_meta(200 if doc else 404))
+
+    def delete(self, index: str, id: str, refresh=None, **kwargs):
+        with self._lock:
+            target, doc = self._find(index, id)
+            if doc is None:
+                raise _error(NotFoundError, 404, "not_found", f"[{id}] not found")
+            del target.docs[doc.id]
+            target.stats["delete_total"] += 1
+        return _response({"_index": target.name, "_id": doc.id, "result": "deleted", "_version": doc.version + 1})
+
+    def update(self, index: str, id: str, doc: Dict[str, Any] = None, upsert: Dict[str, Any] = None,
+               doc_as_upsert: bool = False, body: Dict[str, Any] = None, refresh=None, **kwargs):
+        """부분 문서 업데이트 (doc / upsert / doc_as_upsert, detect_noop)"""
+        if body:
+            doc = body.get("doc", doc)
+            upsert = body.get("upsert", upsert)
+            doc_as_upsert = body.get("doc_as_upsert", doc_as_upsert)
+            if "script" in body:
+                kwargs["script"] = body["script"]
+        if kwargs.get("script") is not None:
+            raise _error(BadRequestError, 400, "illegal_argument_exception", "scripted updates are not supported")
+        with self._lock:
+            target = self._write_index(index)
+            existing = target.docs.get(str(id))
+            if existing is None:
+                source = upsert if upsert is not None else (doc if doc_as_upsert else None)
+                if source is None:
+                    raise _error(NotFoundError, 404, "document_missing_exception", f"[{id}]: document missing")
+                return self.index(index=target.name, id=id, document=source)
+            merged = _merge_doc(copy.deepcopy(existing.source), doc or {})
+            if merged == existing.source:
+                return _response({"_index": target.name, "_id": existing.id, "_version": existing.version, "result": "noop"})
+            return self.index(index=target.name, id=id, document=merged)
+
+    def count(self, index: str = None, body: Dict[str, Any] = None, query: Dict[str, Any] = None, **kwargs):
+        query = query or (body or {}).get("query")
+        response = self.search(index=index, query=query, size=0, track_total_hits=True)
+        return _response({"count": response["hits"]["total"]["value"], "_shards": response["_shards"]})
+
+    def bulk(self, operations: Any = None, body: Any = None, index: str = None, refresh=None, **kwargs):
+        """bulk (index/create/update/delete), NDJSON 문자열/bytes 목록 또는 dict 목록"""
+        start = time.perf_counter()
+        lines = list(_bulk_lines(operations if operations is not None else body))
+        items = []
+        errors = False
+        position = 0
+        while position < len(lines):
+            action = lines[position]
+            op, meta = next(iter(action.items()))
+            source = None
+            if op != "delete":
+                position += 1
+                source = lines[position] if position < len(lines) else None
+            position += 1
+            target = meta.get("_index", index)
+            try:
+                if op in ("index", "create"):
+                    result = self.index(index=target, id=meta.get("_id"), document=source,
+                                        op_type="create" if op == "create" else None)
+                    status = 201 if result["result"] == "created" else 200
+                elif op == "update":
+                    result = self.update(index=target, id=meta["_id"], body=source)
+                    status = 201 if result["result"] == "created" else 200
+                elif op == "delete":
+                    result = self.delete(index=target, id=meta["_id"])
+                    status = 200
+                else:
+                    raise _bad_request(f"Malformed action/metadata line, expected one of [create, delete, index, update] but found [{op}]")
+                items.append({op: dict(result.body, status=status)})
+            except Exception as e:
+                errors = True
+                error = getattr(e, "body", None) or {"error": {"type": type(e).__name__, "reason": str(e)}}
+                status = getattr(getattr(e, "meta", None), "status", 400)
+                items.append({op: {"_index": target, "_id": meta.get("_id"), "status": status, "error": error.get("error", error)}})
+        return _response({"took": int((time.perf_counter() - start) * 1000), "errors": errors, "items": items})
+
+    # -- 검색 --------------------------------------------------------------
+
+    def msearch(self, searches: Any = None, body: Any = None, index: str = None, **kwargs):
+        """msearch (헤더/본문 쌍 목록 또는 NDJSON), 요청별 오류는 해당 응답 항목에만 기록"""
+        start = time.perf_counter()
+        lines = list(_bulk_lines(searches if searches is not None else body))
+        responses = []
+        for header, request in zip(lines[0::2], lines[1::2]):
+            try:
+                result = self.search(index=header.get("index", index), body=request)
+                responses.append(dict(result.body, status=200))
+            except Exception as e:
+                error = getattr(e, "body", None) or {"error": {"type": type(e).__name__, "reason": str(e)}}
+                status = getattr(getattr(e, "meta", None), "status", 400)
+                responses.append({"error": error.get("error", error), "status": status})
+        return _response({"took": int((time.perf_counter() - start) * 1000), "responses": responses})
+
+    def open_point_in_time(self, index: str, keep_alive: str = None, **kwargs):
+        with self._lock:
+            snapshot = [(target, doc) for target in self._resolve(index) for doc in target.docs.values()]
+            pit_id = base64.urlsafe_b64encode(uuid.uuid4().bytes).decode("ascii")
+            self._pits[pit_id] = snapshot
+        return _response({"id": pit_id})
+
+    def close_point_in_time(self, body: Dict[str, Any] = None, id: str = None, **kwargs):
+        pit_id = id or (body or {}).get("id")
+        with self._lock:
+            found = self._pits.pop(pit_id, None) is not None
+        return _response({"succeeded": found, "num_freed": int(found)})
+
+    def search(self, index: Any = None, body: Dict[str, Any] = None, **kwargs):
+        start = time.perf_counter()
+        request = dict(body or {})
+        for key in SEARCH_BODY_PARAMS:
+            if kwargs.get(key) is not None:
+                request["from" if key == "from_" else key] = kwargs[key]
+        if request.get("source_includes") or request.get("source_excludes"):
+            request["_source"] = {"includes": _as_list(request.pop("source_includes", [])),
+                                  "excludes": _as_list(request.pop("source_excludes", []))}
+
+        pit = request.get("pit")
+        with self._lock:
+            if pit:
+                if pit.get("id") not in self._pits:
+                    raise _error(NotFoundError, 404, "search_context_missing_exception", "No search context found for id")
+                entries = list(self._pits[pit["id"]])
+            else:
+                entries = [(target, doc) for target in self._resolve(index) for doc in list(target.docs.values())]
+        targets = {id(target): target for target, _ in entries}
+
+        query = request.get("query") or {"match_all": {}}
+        scored = {}
+        has_query = "query" in request or not request.get("knn")
+        for target, doc in entries:
+            if has_query:
+                inner_hits = {}
+                score = evaluate(query, _Context(target, doc, doc.source, None, inner_hits))
+                if score is not None:
+                    scored[(doc.index, doc.id)] = [target, doc, score, inner_hits]
+        for knn in _as_list(request.get("knn")):
+            by_index: Dict[int, List[_Doc]] = {}
+            for target, doc in entries:
+                by_index.setdefault(id(target), []).append(doc)
+            for target_id, docs in by_index.items():
+                for key, knn_score in _knn_scores(targets[target_id], docs, knn).items():
+                    if key in scored:
+                        scored[key][2] += knn_score
+                    else:
+                        doc = next(d for d in docs if (d.index, d.id) == key)
+                        scored[key] = [targets[target_id], doc, knn_score, {}]
+
+        matches = list(scored.values())
+        if request.get("min_score") is not None:
+            matches = [m for m in matches if m[2] >= request["min_score"]]
+
+        response: Dict[str, Any] = {"took": 0, "timed_out": False,
+                                    "_shards": {"total": len(targets) or 1, "successful": len(targets) or 1, "skipped": 0, "failed": 0}}
+        aggs = request.get("aggs", request.get("aggregations"))
+        if aggs:
+            response["aggregations"] = aggregate(aggs, [_Context(t, d, d.source, None) for t, d, _, _ in matches])
+
+        # 정렬 (기본: 점수 내림차순 → 색인 순서)
+        sort = _parse_sort(request.get("sort")) if request.get("sort") else []
+        sort_spec = sort or [("_score", "desc", {}), ("_doc", "asc", {})]
+        orders = [order for _, order, _ in sort_spec]
+        keyed = [([_sort_value(t, d, s, f, o, opts) for f, o, opts in sort_spec], m)
+                 for m in matches for t, d, s in [m[:3]]]
+        keyed.sort(key=functools.cmp_to_key(lambda a, b: _compare_keys(a[0], b[0], orders)))
+        if request.get("search_after") is not None:
+            after = list(request["search_after"])
+            keyed = [item for item in keyed if _compare_keys(item[0], after, orders) > 0]
+
+        offset = int(request.get("from", 0))
+        size = int(request.get("size", 10))
+        page = keyed[offset:offset + size]
+
+        source_spec = request.get("_source")
+        terms: Dict[str, set] = {}
+        if request.get("highlight"):
+            highlight_query = request["highlight"].get("highlight_query", query)
+            for target in targets.values():
+                _query_terms(target, highlight_query, terms)
+        hits = []
+        for sort_values, (target, doc, score, inner_hits) in page:
+            hit = {"_index": doc.index, "_id": doc.id, "_score": None if sort and not any(f == "_score" for f, _, _ in sort) else score}
+            source = filter_source(doc.source, source_spec)
+            if source is not None:
+                hit["_source"] = source
+            if request.get("highlight"):
+                highlight = _highlight(target, doc, request["highlight"], terms)
+                if highlight:
+                    hit["highlight"] = highlight
+            if inner_hits:
+                hit["inner_hits"] = _format_inner_hits(doc, inner_hits)
+            if sort:
+                hit["sort"] = sort_values
+            hits.append(hit)
+
+        total = len(matches)
+        track = request.get("track_total_hits", 10000)
+        hits_section: Dict[str, Any] = {}
+        if track is not False:
+            limit = None if track is True else int(track)
+            if limit is not None and total > limit:
+                hits_section["total"] = {"value": limit, "relation": "gte"}
+            else:
+                hits_section["total"] = {"value": total, "relation": "eq"}
+        scores = [h["_score"] for h in hits if h["_score"] is not None]
+        hits_section["max_score"] = max(scores) if scores else None
+        hits_section["hits"] = hits
+        response["hits"] = hits_section
+        if pit:
+            response["pit_id"] = pit["id"]
+
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        response["took"] = int(elapsed_ms)
+        for target in targets.values():
+            target.stats["query_total"] += 1
+            target.stats["query_time_ms"] += elapsed_ms
+        return _response(response)
+
+def _format_inner_hits(doc: _Doc, inner_hits: Dict[str, Any]) -> Dict[str, Any]:
+    formatted = {}
+    for name, (path, options, matches) in inner_hits.items():
+        ordered = sorted(matches, key=lambda m: m[1], reverse=True)
+        offset = int(options.get("from", 0))
+        size = int(options.get("size", 3))
+        source_spec = options.get("_source")
+        # inner hit의 _source 필터는 전체 경로 기준
+        hits = []
+        for position, score, obj in ordered[offset:offset + size]:
+            hit = {"_index": doc.index, "_id": doc.id, "_nested": {"field": path, "offset": position}, "_score": score}
+            source = filter_source(obj, source_spec, prefix=path + ".")
+            if source is not None:
+                hit["_source"] = source
+            hits.append(hit)
+        formatted[name] = {"hits": {
+            "total": {"value": len(matches), "relation": "eq"},
+            "max_score": ordered[0][1] if ordered else None,
+            "hits": hits,
+        }}
+    return formatted
+
+def _merge_doc(target: Dict[str, Any], partial: Dict[str, Any]) -> Dict[str, Any]:
+    for key, value in partial.items():
+        if isinstance(value, dict) and isinstance(target.get(key), dict):
+            _merge_doc(target[key], value)
+        else:
+            target[key] = copy.deepcopy(value)
+    return target
+
+def _bulk_lines(operations: Any) -> Iterable[Dict[str, Any]]:
+    if operations is None:
+        return
+    if isinstance(operations, (str, bytes)):
+        operations = [operations]
+    for item in operations:
+        if isinstance(item, dict):
+            yield item
+            continue
+        if isinstance(item, bytes):
+            item = item.decode("utf-8")
+        for line in item.split("\n"):
+            if line.strip():
+                yield json.loads(line)
+
+class _IndicesClient:
+    def __init__(self, client: InMemoryElasticsearch):
+        self._client = client
+
+    def _create(self, index: str, body: Dict[str, Any]) -> _Index:
+        body = self._apply_template(index, body)
+        target = _Index(index, body.get("mappings"), body.get("settings"))
+        self._client._indices[index] = target
+        for alias, options in (body.get("aliases") or {}).items():
+            self._add_alias(index, alias, options or {})
+        return target
+
+    def _apply_template(self, index: str, body: Dict[str, Any]) -> Dict[str, Any]:
+        """index_patterns가 일치하는 템플릿 중 priority가 가장 높은 것을 적용 (요청 본문 값 우선)"""
+        matching = [t for t in self._client._templates.values()
+                    if any(fnmatch.fnmatchcase(index, p) for p in t.get("index_patterns", []))]
+        if not matching:
+            return body
+        template = copy.deepcopy(max(matching, key=lambda t: t.get("priority", 0)).get("template", {}))
+        merged = dict(body)
+        for key in ("mappings", "settings", "aliases"):
+            if key in template:
+                merged[key] = {**template[key], **(body.get(key) or {})}
+        return merged
+
+    def put_index_template(self, name: str, body: Dict[str, Any] = None, index_patterns=None, template=None,
+                           priority: int = None, **kwargs):
+        definition = dict(body or {})
+        if index_patterns is not None:
+            definition["index_patterns"] = _as_list(index_patterns)
+        if template is not None:
+            definition["template"] = template
+        if priority is not None:
+            definition["priority"] = priority
+        with self._client._lock:
+            self._client._templates[name] = copy.deepcopy(definition)
+        return _response({"acknowledged": True})
+
+    def get_index_template(self, name: str = None, **kwargs):
+        with self._client._lock:
+            templates = [{"name": n, "index_template": copy.deepcopy(t)} for n, t in self._client._templates.items()
+                         if not name or fnmatch.fnmatchcase(n, name)]
+        if name and not templates:
+            raise _error(NotFoundError, 404, "resource_not_found_exception", f"index template matching [{name}] not found")
+        return _response({"index_templates": templates})
+
+    def exists_index_template(self, name: str, **kwargs):
+        with self._client._lock:
+            found = any(fnmatch.fnmatchcase(n, name) for n in self._client._templates)
+        return HeadApiResponse(meta=_meta(200 if found else 404))
+
+    def delete_index_template(self, name: str, **kwargs):
+        with self._client._lock:
+            if self._client._templates.pop(name, None) is None:
+                raise _error(NotFoundError, 404, "resource_not_found_exception", f"index_template [{name}] missing")
+        return _response({"acknowledged": True})
+
+    def create(self, index: str, body: Dict[str, Any] = None, mappings=None, settings=None, aliases=None, **kwargs):
+        body = dict(body or {})
+        if mappings is not None:
+            body["mappings"] = mappings
+        if settings is not None:
+            body["settings"] = settings
+        if aliases is not None:
+            body["aliases"] = aliases
+        with self._client._lock:
+            if index in self._client._indices or index in self._client._aliases:
+                raise _error(BadRequestError, 400, "resource_already_exists_exception", f"index [{index}] already exists")
+            self._create(index, body)
+        return _response({"acknowledged": True, "shards_acknowledged": True, "index": index})
+
+    def delete(self, index: str, **kwargs):
+        with self._client._lock:
+            for target in self._client._resolve(index):
+                del self._client._indices[target.name]
+                for alias in list(self._client._aliases):
+                    targets = [n for n in self._client._aliases[alias] if n != target.name]
+                    if targets:
+                        self._client._aliases[alias] = targets
+                    else:
+                        del self._client._aliases[alias]
+        return _response({"acknowledged": True})
+
+    def exists(self, index: str, **kwargs):
+        with self._client._lock:
+            found = bool(self._client._resolve(index, allow_missing=True))
+        return HeadApiResponse(meta=_meta(200 if found else 404))
+
+    def refresh(self, index: str = None, **kwargs):
+        with self._client._lock:
+            targets = self._client._resolve(index)
+            for target in targets:
+                target.stats["refresh_total"] += 1
+        return _response({"_shards": {"total": len(targets), "successful": len(targets), "failed": 0}})
+
+    def forcemerge(self, index: str = None, **kwargs):
+        with self._client._lock:
+            targets = self._client._resolve(index)
+        return _response({"_shards": {"total": len(targets), "successful": len(targets), "failed": 0}})
+
+    def get(self, index: str, **kwargs):
+        with self._client._lock:
+            targets = self._client._resolve(index)
+            return _response({t.name: {"aliases": self._aliases_of(t.name), "mappings": copy.deepcopy(t.mapping.raw),
+                                       "settings": {"index": copy.deepcopy(t.settings)}} for t in targets})
+
+    def get_mapping(self, index: str = None, **kwargs):
+        with self._client._lock:
+            return _response({t.name: {"mappings": copy.deepcopy(t.mapping.raw)} for t in self._client._resolve(index)})
+
+    def put_mapping(self, index: str, body: Dict[str, Any] = None, properties: Dict[str, Any] = None, **kwargs):
+        mapping = dict(body or {})
+        if properties is not None:
+            mapping["properties"] = properties
+        with self._client._lock:
+            for target in self._client._resolve(index):
+                target.mapping.merge(mapping)
+        return _response({"acknowledged": True})
+
+    def get_settings(self, index: str = None, **kwargs):
+        with self._client._lock:
+            return _response({t.name: {"settings": {"index": copy.deepcopy(t.settings)}} for t in self._client._resolve(index)})
+
+    def put_settings(self, index: str = None, body: Dict[str, Any] = None, settings: Dict[str, Any] = None, **kwargs):
+        values = _flatten_settings(settings if settings is not None else (body or {}))
+        with self._client._lock:
+            for target in self._client._resolve(index):
+                target.settings.update(values)
+                if "analysis" in values:
+                    target.analyzers, target.normalizers = _build_analyzers(target.settings["analysis"])
+        return _response({"acknowledged": True})
+
+    def stats(self, index: str = None, **kwargs):
+        with self._client._lock:
+            targets = self._client._resolve(index)
+            per_index = {t.name: {"primaries": _index_stats(t), "total": _index_stats(t)} for t in targets}
+        total = {}
+        for stats in per_index.values():
+            for section, values in stats["total"].items():
+                merged = total.setdefault(section, {})
+                for key, value in values.items():
+                    merged[key] = merged.get(key, 0) + value
+        return _response({"_all": {"primaries": total, "total": total}, "indices": per_index})
+
+    # -- alias -------------------------------------------------------------
+
+    def _aliases_of(self, index: str) -> Dict[str, Any]:
+        return {alias: {} for alias, targets in self._client._aliases.items() if index in targets}
+
+    def _add_alias(self, index: str, alias: str, options: Dict[str, Any]):
+        if alias in self._client._indices:
+            raise _error(BadRequestError, 400, "invalid_alias_name_exception",
+                         f"an index or data stream exists with the same name as the alias [{alias}]")
+        targets = self._client._aliases.setdefault(alias, [])
+        if index not in targets:
+            targets.append(index)
+        if options.get("is_write_index"):
+            for name in targets:
+                self._client._indices[name].settings.pop("_write_alias_" + alias, None)
+            self._client._indices[index].settings["_write_alias_" + alias] = True
+
+    def _remove_alias(self, index: str, alias: str):
+        targets = self._client._aliases.get(alias, [])
+        if index not in targets:
+            raise _error(NotFoundError, 404, "aliases_not_found_exception", f"aliases [{alias}] missing")
+        targets.remove(index)
+        self._client._indices[index].settings.pop("_write_alias_" + alias, None)
+        if not targets:
+            del self._client._aliases[alias]
+
+    def update_aliases(self, actions: List[Dict[str, Any]] = None, body: Dict[str, Any] = None, **kwargs):
+        """alias 추가/삭제/인덱스 삭제를 한 번에 적용 (하나라도 실패하면 전체 취소)"""
+        actions = actions if actions is not None else (body or {}).get("actions", [])
+        with self._client._lock:
+            indices_backup = dict(self._client._indices)
+            aliases_backup = {alias: list(targets) for alias, targets in self._client._aliases.items()}
+            settings_backup = {name: dict(t.settings) for name, t in self._client._indices.items()}
+            try:
+                for action in actions:
+                    op, options = next(iter(action.items()))
+                    names = [t.name for t in self._client._resolve(options.get("indices", options.get("index")))]
+                    aliases = _as_list(options.get("aliases", options.get("alias")))
+                    for name in names:
+                        if op == "add":
+                            for alias in aliases:
+                                self._add_alias(name, alias, options)
+                        elif op == "remove":
+                            for alias in aliases:
+                                self._remove_alias(name, alias)
+                        elif op == "remove_index":
+                            self.delete(index=name)
+                        else:
+                            raise _bad_request(f"unknown alias action [{op}]")
+            except Exception:
+                self._client._indices = indices_backup
+                self._client._aliases = aliases_backup
+                for name, settings in settings_backup.items():
+                    if name in indices_backup:
+                        indices_backup[name].settings = settings
+                raise
+        return _response({"acknowledged": True})
+
+    def put_alias(self, index: str, name: str, **kwargs):
+        return self.update_aliases(actions=[{"add": {"index": index, "alias": name, **kwargs}}])
+
+    def delete_alias(self, index: str, name: str, **kwargs):
+        return self.update_aliases(actions=[{"remove": {"index": index, "alias": name}}])
+
+    def get_alias(self, index: str = None, name: str = None, **kwargs):
+        with self._client._lock:
+            result = {}
+            for alias, targets in self._client._aliases.items():
+                if name and not any(fnmatch.fnmatchcase(alias, n) for n in str(name).split(",")):
+                    continue
+                for target in targets:
+                    if index and target not in [t.name for t in self._client._resolve(index, allow_missing=True)]:
+                        continue
+                    result.setdefault(target, {"aliases": {}})["aliases"][alias] = (
+                        {"is_write_index": True} if self._client._indices[target].settings.get("_write_alias_" + alias) else {})
+        if name and not result:
+            raise _error(NotFoundError, 404, "aliases_not_found_exception", f"alias [{name}] missing")
+        return _response(result)
+
+    def exists_alias(self, name: str, index: str = None, **kwargs):
+        with self._client._lock:
+            found = any(fnmatch.fnmatchcase(alias, name) for alias in self._client._aliases)
+        return HeadApiResponse(meta=_meta(200 if found else 404))
+
+def _index_stats(target: _Index) -> Dict[str, Dict[str, float]]:
+    size = sum(len(json.dumps(d.source, ensure_ascii=False, default=str)) for d in target.docs.values())
+    return {
+        "docs": {"count": len(target.docs), "deleted": 0},
+        "store": {"size_in_bytes": size},
+        "indexing": {"index_total": target.stats["index_total"], "index_time_in_millis": 0, "delete_total": target.stats["delete_total"]},
+        "search": {"query_total": target.stats["query_total"], "query_time_in_millis": int(target.stats["query_time_ms"])},
+        "refresh": {"total": target.stats["refresh_total"], "total_time_in_millis": 0},
+        "merges": {"current": 0, "total": 0, "total_time_in_millis": 0},
+        "segments": {"count": 1 if target.docs else 0, "memory_in_bytes": 0},
+    }
+
+class _NodesClient:
+    def __init__(self, client: InMemoryElasticsearch):
+        self._client = client
+
+    def stats(self, **kwargs):
+        return _response({"nodes": {"memory": {"name": "memory", "indices": {}, "breakers": {}, "jvm": {"mem": {}}}}})
+
+class _ClusterClient:
+    def __init__(self, client: InMemoryElasticsearch):
+        self._client = client
+
+    def health(self, index: str = None, **kwargs):
+        with self._client._lock:
+            targets = self._client._resolve(index) if index else list(self._client._indices.values())
+        return _response({"cluster_name": "in-memory", "status": "green", "timed_out": False,
+                          "number_of_nodes": 1, "active_primary_shards": len(targets),
+                          "active_shards": len(targets), "unassigned_shards": 0})
@@ -0,0 +1,94 @@
+"""
+keyword 정규화 (인덱스 normalizer 정의 + 같은 규칙의 파이썬 구현)
+
+포장재 타입/재질/업체, 실험실 ID처럼 정확히 일치시켜야 하는 값은 입력마다
+대소문자, 띄어쓰기, 전각/반각 표기가 달라 term 필터가 빗나가므로
+.norm 하위 필드(keyword + keyword_normalizer)로 색인하고 그 필드로 필터링
+- ES: 공백 제거(char_filter) → lowercase → cjk_width
+- normalize_keyword: 색인 시점에 파생 필드(포장 시그니처 등)를 만들 때 같은 결과를 내도록 구현
+
+포장 시그니처 (nested 조인 없이 정확한 조합을 필터링하기 위한 평탄화 필드)
+- packing_type_material:         "타입|재질ID"
+- packing_type_material_company: "타입|재질ID|업체ID" (ID는 app.elasticsearch.entities 참고)
+- packing_set_hash:              문서의 "타입|재질" 집합을 정렬해 만든 해시 (포장 구성 전체 일치)
+"""
+from typing import Any, Dict, Iterable, List, Optional
+import hashlib
+import re
+
+KEYWORD_NORMALIZER = "keyword_normalizer"
+
+# 인덱스 settings.analysis에 병합할 정의
+NORMALIZER_ANALYSIS: Dict[str, Any] = {
+    "char_filter": {
+        "whitespace_remove": {
+            "type": "pattern_replace",
+            "pattern": "\\s+",
+            "replacement": ""
+        }
+    },
+    "normalizer": {
+        KEYWORD_NORMALIZER: {
+            "type": "custom",
+            "char_filter": ["whitespace_remove"],
+            "filter": ["lowercase", "cjk_width"]
+        }
+    }
+}
+
+def norm_subfield() -> Dict[str, Any]:
+    """정규화 keyword 하위 필드 정의 (매핑의 "fields": {"norm": ...})"""
+    return {"type": "keyword", "normalizer": KEYWORD_NORMALIZER}
+
+_WHITESPACE = re.compile(r"\s+")
+
+def fold_width(text: str) -> str:
+    """cjk_width와 같은 변환: 전각 ASCII(！~～) → 반각 (한글/한자는 그대로)"""
+    return "".join(chr(ord(c) - 0xFEE0) if 0xFF01 <= ord(c) <= 0xFF5E else c for c in text)
+
+def normalize_keyword(value: Any) -> Optional[str]:
+    """keyword_normalizer와 같은 규칙으로 정규화 (빈 값이면 None)"""
+    if value is None:
+        return None
+    text = fold_width(_WHITESPACE.sub("", str(value)).lower())
+    return text or None
+
+def packing_signature(packing_type: Any, material: Any, company: Any = None) -> Optional[str]:
+    """
+    정규화한 "타입|재질ID[|업체ID]" 시그니처 (타입/재질, 업체 지정 시 업체까지 모두 있어야 함)
+    재질/업체는 app.elasticsearch.entities 사전의 정규 ID라 "펌텍" / "펌텍코리아"가 같은 시그니처
+    """
+    from app.elasticsearch.entities import company_id, material_id
+
+    parts = [normalize_keyword(packing_type), material_id(material)]
+    if company is not None:
+        parts.append(company_id(company))
+    if not all(parts):
+        return None
+    return "|".join(parts)
+
+def packing_set_hash(packing_info: Iterable[Dict[str, Any]]) -> Optional[str]:
+    """포장 정보 목록의 "타입|재질" 집합 해시 (순서/중복 무관, 시그니처가 하나도 없으면 None)"""
+    signatures = {packing_signature(pack.get("type"), pack.get("material")) for pack in packing_info}
+    signatures = sorted(signature for signature in signatures if signature)
+    if not signatures:
+        return None
+    return hashlib.sha1("\n".join(signatures).encode("utf-8")).hexdigest()
+
+def packing_signature_fields(packing_info: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """색인 문서에 추가할 포장 시그니처 필드"""
+    type_material = set()
+    type_material_company = set()
+    for pack in packing_info:
+        signature = packing_signature(pack.get("type"), pack.get("material"))
+        if signature:
+            type_material.add(signature)
+        if pack.get("company"):
+            signature = packing_signature(pack.get("type"), pack.get("material"), pack["company"])
+            if signature:
+                type_material_company.add(signature)
+    return {
+        "packing_type_material": sorted(type_material),
+        "packing_type_material_company": sorted(type_material_company),
+        "packing_set_hash": packing_set_hash(packing_info),
+    }
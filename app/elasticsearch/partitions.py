@@ -0,0 +1,183 @@
+"""
+test_date 기준 시간 분할 인덱스 (ct_documents-YYYY / ct_documents-YYYYqN)
+
+CT_INDEX_PARTITIONING=year|quarter로 켜며(기본 none: 단일 인덱스/버전 인덱스 alias), 켜면
+- 인덱스 템플릿(ct_documents-*)이 매핑/설정과 읽기 alias(ct_documents)를 자동 적용
+- 적재 시 문서의 test_date로 분할 인덱스를 결정 (날짜 없는 문서는 ct_documents-undated)
+- 검색 시 test_date_start/test_date_end와 겹치는 분할 인덱스만 대상으로 지정
+  (범위 조건이 없으면 읽기 alias 전체)
+- 현재 기간이 아닌 분할 인덱스는 optimize로 쓰기 차단 + replica 축소 + force merge
+
+실행 예:
+  CT_INDEX_PARTITIONING=year python -m app.elasticsearch.partitions setup
+  CT_INDEX_PARTITIONING=year python -m app.elasticsearch.partitions optimize
+  CT_INDEX_PARTITIONING=year python -m app.elasticsearch.partitions status
+버전 인덱스 alias(app.elasticsearch.reindex)와는 같은 alias 이름을 쓰므로 둘 중 하나만 사용
+"""
+from typing import Any, Dict, List, Optional
+from datetime import date, datetime
+import argparse
+import logging
+import os
+import threading
+import time
+
+from app.elasticsearch.client import get_es_client
+from app.elasticsearch.indices.ct_document import build_ct_document_index_body
+
+logger = logging.getLogger("ct_search.partitions")
+
+DEFAULT_ALIAS = "ct_documents"
+# 분할 단위 (none: 분할 안 함, year, quarter)
+CT_INDEX_PARTITIONING = os.getenv("CT_INDEX_PARTITIONING", "none")
+# 지난 기간 분할 인덱스의 replica 수
+COLD_PARTITION_REPLICAS = int(os.getenv("CT_COLD_PARTITION_REPLICAS", "0"))
+# 존재하는 분할 인덱스 목록 캐시 시간 (초)
+PARTITION_CACHE_TTL = float(os.getenv("CT_PARTITION_CACHE_TTL", "60"))
+
+UNDATED_SUFFIX = "undated"
+
+def partitioning_enabled() -> bool:
+    return CT_INDEX_PARTITIONING in ("year", "quarter")
+
+def _parse_date(value: Any) -> Optional[date]:
+    """YYYY-MM-DD / ISO datetime 문자열 → date (형식이 다르면 None)"""
+    if not value:
+        return None
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    try:
+        return datetime.fromisoformat(str(value)[:10]).date()
+    except ValueError:
+        return None
+
+def _suffix(day: date, granularity: str) -> str:
+    if granularity == "quarter":
+        return f"{day.year}q{(day.month - 1) // 3 + 1}"
+    return str(day.year)
+
+def partition_index(test_date: Any, alias: str = DEFAULT_ALIAS, granularity: str = None) -> str:
+    """문서 test_date가 속하는 분할 인덱스 이름"""
+    day = _parse_date(test_date)
+    if day is None:
+        return f"{alias}-{UNDATED_SUFFIX}"
+    return f"{alias}-{_suffix(day, granularity or CT_INDEX_PARTITIONING)}"
+
+def partition_bounds(name: str, alias: str = DEFAULT_ALIAS) -> Optional[tuple]:
+    """분할 인덱스 이름 → (기간 첫날, 기간 마지막 날), 형식이 다르거나 undated면 None"""
+    suffix = name[len(alias) + 1:]
+    try:
+        if "q" in suffix:
+            year, quarter = (int(part) for part in suffix.split("q"))
+            first = date(year, (quarter - 1) * 3 + 1, 1)
+            last = date(year + 1, 1, 1) if quarter == 4 else date(year, quarter * 3 + 1, 1)
+        else:
+            first, last = date(int(suffix), 1, 1), date(int(suffix) + 1, 1, 1)
+    except ValueError:
+        return None
+    return first, date.fromordinal(last.toordinal() - 1)
+
+_partition_cache: Dict[str, Any] = {}
+_partition_cache_lock = threading.Lock()
+
+def existing_partitions(es, alias: str = DEFAULT_ALIAS, refresh: bool = False) -> List[str]:
+    """읽기 alias에 속한 분할 인덱스 목록 (PARTITION_CACHE_TTL 동안 캐시)"""
+    now = time.monotonic()
+    with _partition_cache_lock:
+        cached = _partition_cache.get(alias)
+        if cached and not refresh and now - cached[0] < PARTITION_CACHE_TTL:
+            return cached[1]
+    if es.indices.exists_alias(name=alias):
+        names = sorted(name for name in es.indices.get_alias(name=alias) if name.startswith(f"{alias}-"))
+    else:
+        names = []
+    with _partition_cache_lock:
+        _partition_cache[alias] = (now, names)
+    return names
+
+def search_index_for_range(index_name: str, test_date_start: Any = None, test_date_end: Any = None, es=None) -> str:
+    """
+    검색 대상 인덱스 표현식
+    - 분할 미사용 / 날짜 범위 없음 → index_name 그대로 (읽기 alias 전체)
+    - 범위와 기간이 겹치는 분할 인덱스 목록 (콤마 구분, 한쪽 끝만 있으면 반대쪽은 열린 범위)
+    - 겹치는 분할 인덱스가 없으면 index_name 그대로 (날짜 필터로 결과 0건)
+    날짜 없는 문서(undated)는 범위 필터에 걸리지 않으므로 제외
+    """
+    if not partitioning_enabled() or not (test_date_start or test_date_end):
+        return index_name
+    start, end = _parse_date(test_date_start), _parse_date(test_date_end)
+    selected = []
+    for name in existing_partitions(es or get_es_client(), index_name):
+        bounds = partition_bounds(name, index_name)
+        if bounds is None:
+            continue
+        if (end is None or bounds[0] <= end) and (start is None or bounds[1] >= start):
+            selected.append(name)
+    return ",".join(selected) if selected else index_name
+
+def install_partition_template(es=None, alias: str = DEFAULT_ALIAS) -> Dict[str, Any]:
+    """분할 인덱스 템플릿 등록 (새 분할 인덱스는 첫 문서 적재 시 자동 생성 + 읽기 alias 연결)"""
+    es = es or get_es_client()
+    body = build_ct_document_index_body()
+    template = {
+        "mappings": body["mappings"],
+        "settings": body["settings"],
+        "aliases": {alias: {}},
+    }
+    es.indices.put_index_template(name=alias, index_patterns=[f"{alias}-*"], template=template, priority=100)
+    logger.info("분할 인덱스 템플릿 등록: %s-*", alias)
+    return template
+
+def is_write_blocked(es, name: str) -> bool:
+    """인덱스 쓰기 차단 여부 (optimize_cold_partitions로 읽기 전용이 된 지난 기간 분할 인덱스, 없는 인덱스는 False)"""
+    if not es.indices.exists(index=name):
+        return False
+    settings = es.indices.get_settings(index=name)[name]["settings"]["index"]
+    return str((settings.get("blocks") or {}).get("write", False)).lower() == "true"
+
+def set_write_block(es, name: str, blocked: bool):
+    es.indices.put_settings(index=name, settings={"index": {"blocks": {"write": blocked}}})
+
+def optimize_cold_partitions(es=None, alias: str = DEFAULT_ALIAS, max_num_segments: int = 1) -> List[str]:
+    """현재 기간이 아닌 분할 인덱스를 읽기 전용으로 전환 (쓰기 차단, replica 축소, force merge)"""
+    es = es or get_es_client()
+    current = partition_index(date.today(), alias)
+    cold = [name for name in existing_partitions(es, alias, refresh=True)
+            if name != current and not name.endswith(f"-{UNDATED_SUFFIX}")]
+    for name in cold:
+        es.indices.put_settings(index=name, settings={
+            "index": {"blocks": {"write": True}, "number_of_replicas": COLD_PARTITION_REPLICAS}
+        })
+        es.options(request_timeout=3600).indices.forcemerge(index=name, max_num_segments=max_num_segments)
+        logger.info("지난 기간 분할 인덱스 최적화: %s", name)
+    return cold
+
+def status(es=None, alias: str = DEFAULT_ALIAS) -> Dict[str, Any]:
+    es = es or get_es_client()
+    partitions = existing_partitions(es, alias, refresh=True)
+    counts = {}
+    if partitions:
+        stats = es.indices.stats(index=",".join(partitions), metric="docs")
+        counts = {name: stats["indices"][name]["primaries"]["docs"]["count"] for name in partitions}
+    return {"alias": alias, "granularity": CT_INDEX_PARTITIONING, "partitions": counts}
+
+def main():
+    parser = argparse.ArgumentParser(description="CT 문서 시간 분할 인덱스 관리")
+    parser.add_argument("--alias", default=DEFAULT_ALIAS, help="읽기 alias 이름")
+    parser.add_argument("command", choices=["setup", "optimize", "status"])
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+    if not partitioning_enabled():
+        raise SystemExit("CT_INDEX_PARTITIONING=year 또는 quarter 설정 필요")
+
+    if args.command == "setup":
+        install_partition_template(alias=args.alias)
+    elif args.command == "optimize":
+        print(optimize_cold_partitions(alias=args.alias))
+    else:
+        print(status(alias=args.alias))
+
+if __name__ == "__main__":
+    main()
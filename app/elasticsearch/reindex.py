@@ -0,0 +1,266 @@
+"""
+무중단 재색인 (버전 인덱스 + alias 교체)
+
+검색/쓰기는 항상 alias(ct_documents)를 대상으로 하고, 매핑 변경이나 전체 재적재 시
+1. 다음 버전 인덱스(ct_documents_vN)를 bulk 적재용 설정으로 생성
+   (refresh 끔, replica 0, translog 비동기 + flush 임계값 상향)
+2. 전처리 → 임베딩 → streaming_bulk로 적재 (현재 alias 문서에서 created_at/바뀌지 않은 note 임베딩 재사용)
+3. 서비스 설정 복원 (refresh/replica/translog) → replica 할당 대기 → force merge → 워밍 쿼리
+4. alias를 새 버전으로 한 번에 교체 (update_aliases 단일 요청이라 검색이 끊기지 않음)
+5. 오래된 버전은 --keep 개수만 남기고 삭제 (직전 버전은 rollback용으로 유지)
+적재/검증 중 실패하면 새 인덱스를 삭제하고 alias는 그대로 둠
+
+실행 예:
+  python -m app.elasticsearch.reindex load --dir data/refine
+  python -m app.elasticsearch.reindex status
+  python -m app.elasticsearch.reindex rollback
+기존 ct_documents가 alias가 아닌 실제 인덱스라면 최초 1회 load --migrate-legacy로
+alias 교체와 같은 요청에서 기존 인덱스를 삭제 (그 전까지는 교체 거부)
+"""
+from typing import Any, Dict, Iterable, List, Optional
+import argparse
+import logging
+import os
+import re
+import time
+
+from elasticsearch import helpers
+from app.elasticsearch.client import get_es_client
+from app.elasticsearch.indices.ct_document import build_ct_document_index_body
+from app.elasticsearch.partitions import partitioning_enabled
+
+logger = logging.getLogger("ct_search.reindex")
+
+DEFAULT_ALIAS = "ct_documents"
+# 서비스 중 replica 수
+SERVING_REPLICAS = int(os.getenv("CT_INDEX_REPLICAS", "1"))
+
+# bulk 적재 중 설정: 세그먼트 생성/복제/fsync 비용 최소화
+BULK_LOAD_SETTINGS = {
+    "index": {
+        "refresh_interval": "-1",
+        "number_of_replicas": 0,
+        "translog": {
+            "durability": "async",
+            "flush_threshold_size": "2gb"
+        }
+    }
+}
+
+# 적재 완료 후 서비스 설정 (None은 클러스터 기본값으로 복원)
+SERVING_SETTINGS = {
+    "index": {
+        "refresh_interval": None,
+        "number_of_replicas": SERVING_REPLICAS,
+        "translog": {
+            "durability": "request",
+            "flush_threshold_size": None
+        }
+    }
+}
+
+# alias 교체 전 캐시/global ordinals를 채우는 쿼리 (자주 쓰는 필터/집계 필드)
+WARMUP_QUERIES = [
+    {"size": 0, "query": {"match_all": {}}},
+    {"size": 0, "aggs": {"signatures": {"terms": {"field": "packing_type_material", "size": 50}}}},
+    {"size": 0, "aggs": {"labs": {"terms": {"field": "lab_id.norm", "size": 50}}}},
+    {"size": 0, "aggs": {"months": {"date_histogram": {"field": "test_date", "calendar_interval": "month"}}}},
+]
+
+def version_pattern(alias: str) -> re.Pattern:
+    return re.compile(re.escape(alias) + r"_v(\d+)$")
+
+def versioned_index_name(alias: str, version: int) -> str:
+    return f"{alias}_v{version}"
+
+def list_versions(es, alias: str = DEFAULT_ALIAS) -> Dict[int, str]:
+    """존재하는 버전 인덱스 {버전: 인덱스 이름}"""
+    pattern = version_pattern(alias)
+    response = es.indices.get(index=f"{alias}_v*", allow_no_indices=True, ignore_unavailable=True)
+    versions = {}
+    for name in response:
+        match = pattern.match(name)
+        if match:
+            versions[int(match.group(1))] = name
+    return dict(sorted(versions.items()))
+
+def current_index(es, alias: str = DEFAULT_ALIAS) -> Optional[str]:
+    """alias가 가리키는 인덱스 (alias가 없으면 None)"""
+    if not es.indices.exists_alias(name=alias):
+        return None
+    targets = list(es.indices.get_alias(name=alias))
+    if len(targets) != 1:
+        raise RuntimeError(f"alias '{alias}'가 여러 인덱스를 가리킵니다: {targets}")
+    return targets[0]
+
+def is_legacy_index(es, alias: str = DEFAULT_ALIAS) -> bool:
+    """alias 이름과 같은 실제 인덱스가 있는지 (버전 관리 도입 전 인덱스)"""
+    return bool(es.indices.exists(index=alias)) and not es.indices.exists_alias(name=alias)
+
+def create_versioned_index(es, alias: str = DEFAULT_ALIAS) -> str:
+    """다음 버전 인덱스를 bulk 적재용 설정으로 생성"""
+    versions = list_versions(es, alias)
+    index_name = versioned_index_name(alias, max(versions, default=0) + 1)
+    body = build_ct_document_index_body()
+    body["settings"]["index"] = {**body["settings"].get("index", {}), **BULK_LOAD_SETTINGS["index"]}
+    es.indices.create(index=index_name, body=body)
+    logger.info("버전 인덱스 생성: %s", index_name)
+    return index_name
+
+def iter_bulk_actions(es, index_name: str, documents: Iterable[Dict[str, Any]], lookup_index: Optional[str],
+                      workers: int = 4):
+    """원본 문서 → 전처리 + 임베딩 → bulk action (lookup_index의 기존 임베딩/created_at 재사용)"""
+    from app.elasticsearch.uploader import prepare_ct_documents
+
+    for doc_id, processed, _ in prepare_ct_documents(es, lookup_index, documents, workers=workers, embed_unchanged=True):
+        yield {"_index": index_name, "_id": doc_id, "_source": processed}
+
+def bulk_load(es, index_name: str, documents: Iterable[Dict[str, Any]], chunk_size: int = 500, workers: int = 4,
+              lookup_index: Optional[str] = None) -> Dict[str, int]:
+    """streaming_bulk로 적재 (실패 문서는 로그 후 건수만 집계)"""
+    success = errors = 0
+    for ok, item in helpers.streaming_bulk(
+        es, iter_bulk_actions(es, index_name, documents, lookup_index, workers), chunk_size=chunk_size, raise_on_error=False
+    ):
+        if ok:
+            success += 1
+        else:
+            errors += 1
+            logger.warning("bulk 적재 실패: %s", item)
+    return {"success": success, "errors": errors}
+
+def finalize_index(es, index_name: str, max_num_segments: int = 1, timeout: str = "10m"):
+    """서비스 설정 복원 → replica 할당 대기 → force merge → 워밍"""
+    es.indices.put_settings(index=index_name, settings=SERVING_SETTINGS)
+    es.indices.refresh(index=index_name)
+    health = es.cluster.health(index=index_name, wait_for_status="green" if SERVING_REPLICAS else "yellow", timeout=timeout)
+    if health.get("timed_out"):
+        raise RuntimeError(f"'{index_name}' replica 할당 대기 시간 초과 (status={health.get('status')})")
+    es.options(request_timeout=3600).indices.forcemerge(index=index_name, max_num_segments=max_num_segments)
+    for query in WARMUP_QUERIES:
+        es.search(index=index_name, body=query, request_cache=True)
+
+def swap_alias(es, new_index: str, alias: str = DEFAULT_ALIAS, migrate_legacy: bool = False) -> Optional[str]:
+    """alias를 new_index로 원자적으로 교체하고 이전 인덱스 이름 반환"""
+    actions = []
+    previous = None
+    if is_legacy_index(es, alias):
+        if not migrate_legacy:
+            raise RuntimeError(f"'{alias}'는 alias가 아닌 인덱스입니다. 최초 전환 시 --migrate-legacy 사용")
+        # 기존 인덱스 삭제와 alias 추가를 한 요청으로 처리 (이름이 같아 별도 요청이면 중단 구간 발생)
+        actions.append({"remove_index": {"index": alias}})
+    else:
+        previous = current_index(es, alias)
+        if previous:
+            actions.append({"remove": {"index": previous, "alias": alias}})
+    actions.append({"add": {"index": new_index, "alias": alias, "is_write_index": True}})
+    es.indices.update_aliases(actions=actions)
+    logger.info("alias 교체: %s → %s", previous or "-", new_index)
+    return previous
+
+def prune_versions(es, alias: str = DEFAULT_ALIAS, keep: int = 2) -> List[str]:
+    """최근 keep개 버전만 남기고 삭제 (alias 대상은 항상 유지)"""
+    active = current_index(es, alias)
+    versions = list_versions(es, alias)
+    stale = [name for version, name in versions.items() if name != active][:max(0, len(versions) - keep)]
+    for name in stale:
+        es.indices.delete(index=name)
+        logger.info("이전 버전 인덱스 삭제: %s", name)
+    return stale
+
+def reindex_ct_documents(documents: Iterable[Dict[str, Any]], alias: str = DEFAULT_ALIAS, es=None,
+                         chunk_size: int = 500, workers: int = 4, keep: int = 2,
+                         migrate_legacy: bool = False, max_error_rate: float = 0.0) -> Dict[str, Any]:
+    """새 버전 인덱스 적재 후 alias 교체 (실패 시 새 인덱스 삭제, alias 유지)"""
+    es = es or get_es_client()
+    if partitioning_enabled():
+        raise RuntimeError("시간 분할 인덱스(CT_INDEX_PARTITIONING) 사용 중에는 버전 인덱스 재색인을 쓸 수 없습니다")
+    if is_legacy_index(es, alias) and not migrate_legacy:
+        raise RuntimeError(f"'{alias}'는 alias가 아닌 인덱스입니다. 최초 전환 시 --migrate-legacy 사용")
+
+    start = time.perf_counter()
+    index_name = create_versioned_index(es, alias)
+    try:
+        # 현재 서비스 중인 인덱스(버전 또는 기존 인덱스)에서 임베딩/created_at 재사용
+        lookup_index = alias if es.indices.exists(index=alias) else None
+        counts = bulk_load(es, index_name, documents, chunk_size, workers, lookup_index)
+        total = counts["success"] + counts["errors"]
+        if not counts["success"] or counts["errors"] > total * max_error_rate:
+            raise RuntimeError(f"적재 실패 비율 초과: 성공 {counts['success']}건, 실패 {counts['errors']}건")
+        load_seconds = time.perf_counter() - start
+        finalize_index(es, index_name)
+        previous = swap_alias(es, index_name, alias, migrate_legacy)
+    except Exception:
+        logger.exception("재색인 실패, 새 인덱스 삭제: %s", index_name)
+        es.indices.delete(index=index_name, ignore_unavailable=True)
+        raise
+    pruned = prune_versions(es, alias, keep)
+    return {
+        "index": index_name,
+        "previous": previous,
+        "pruned": pruned,
+        **counts,
+        "load_seconds": round(load_seconds, 2),
+        "total_seconds": round(time.perf_counter() - start, 2),
+    }
+
+def rollback(alias: str = DEFAULT_ALIAS, es=None) -> str:
+    """alias를 현재보다 한 단계 이전 버전으로 되돌림"""
+    es = es or get_es_client()
+    active = current_index(es, alias)
+    versions = list_versions(es, alias)
+    match = version_pattern(alias).match(active or "")
+    if not match:
+        raise RuntimeError(f"alias '{alias}'가 버전 인덱스를 가리키지 않습니다: {active}")
+    older = [name for version, name in versions.items() if version < int(match.group(1))]
+    if not older:
+        raise RuntimeError("되돌릴 이전 버전 인덱스가 없습니다")
+    swap_alias(es, older[-1], alias)
+    return older[-1]
+
+def status(alias: str = DEFAULT_ALIAS, es=None) -> Dict[str, Any]:
+    """alias 대상과 버전별 문서 수"""
+    es = es or get_es_client()
+    versions = list_versions(es, alias)
+    counts = {}
+    if versions:
+        stats = es.indices.stats(index=",".join(versions.values()), metric="docs")
+        counts = {name: stats["indices"][name]["primaries"]["docs"]["count"] for name in versions.values()}
+    return {
+        "alias": alias,
+        "legacy_index": is_legacy_index(es, alias),
+        "current": current_index(es, alias),
+        "versions": counts,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="CT 문서 버전 인덱스 재색인 / alias 교체")
+    parser.add_argument("--alias", default=DEFAULT_ALIAS, help="서비스 alias 이름")
+    sub = parser.add_subparsers(dest="command", required=True)
+    load = sub.add_parser("load", help="새 버전 인덱스에 적재 후 alias 교체")
+    load.add_argument("--dir", default="data/refine", help="정제된 JSON 디렉토리")
+    load.add_argument("--chunk-size", type=int, default=500, help="bulk 요청당 문서 수")
+    load.add_argument("--workers", type=int, default=4, help="전처리/임베딩 스레드 수")
+    load.add_argument("--keep", type=int, default=2, help="남겨 둘 버전 수 (rollback용)")
+    load.add_argument("--max-error-rate", type=float, default=0.0, help="허용 적재 실패 비율")
+    load.add_argument("--migrate-legacy", action="store_true", help="alias 이름과 같은 기존 인덱스를 교체 시 삭제")
+    sub.add_parser("rollback", help="alias를 이전 버전으로 되돌림")
+    sub.add_parser("status", help="alias 대상과 버전 목록")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+
+    if args.command == "load":
+        from app.elasticsearch.uploader import load_json_files_from_directory
+        documents = load_json_files_from_directory(args.dir)
+        if not documents:
+            raise SystemExit("로드할 JSON 파일이 없습니다.")
+        print(reindex_ct_documents(documents, args.alias, chunk_size=args.chunk_size, workers=args.workers,
+                                   keep=args.keep, migrate_legacy=args.migrate_legacy,
+                                   max_error_rate=args.max_error_rate))
+    elif args.command == "rollback":
+        print(f"alias '{args.alias}' → {rollback(args.alias)}")
+    else:
+        print(status(args.alias))
+
+if __name__ == "__main__":
+    main()
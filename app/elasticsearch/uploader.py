@@ -1,10 +1,66 @@
-from typing import Dict, Any, List
+from typing import Dict, Any, Callable, List, Iterable, Iterator, Optional, Tuple
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+import hashlib
 import json
+import logging
+from elasticsearch import helpers
 from app.elasticsearch.indices.ct_document import create_ct_document_index_with_mapping
 from app.elasticsearch.client import get_es_client
+from app.elasticsearch.normalization import packing_signature_fields
+from app.elasticsearch.extraction import document_measurements, experiment_fields
+from app.elasticsearch.entities import entity_fields, dictionary_fingerprint
+from app.elasticsearch.partitions import (
+    partitioning_enabled, partition_index, existing_partitions, is_write_blocked, set_write_block
+)
 from app.services.embedding_service import embedding_service
 
-es = get_es_client()
+logger = logging.getLogger("ct_search.uploader")
+
+# 전처리 규칙 버전 (파생 필드 계산 방식이 바뀌면 올려서 변경 없는 원본도 다시 쓰도록 함)
+PROCESSING_VERSION = 9
+# content_hash 계산에서 제외하는 필드 (적재 시점마다 달라지는 값)
+VOLATILE_FIELDS = ("created_at", "updated_at", "content_hash")
+# 기존 문서 조회 시 가져올 필드 (변경 여부, 생성 시각 유지, 임베딩 재사용, 자동완성 갱신)
+EXISTING_SOURCE_FIELDS = ["content_hash", "created_at", "updated_at", "special_notes.value", "special_notes.embedding",
+                          "packing_info.type", "packing_info.material", "packing_info.company"]
+
+# 적재로 바뀐 문서의 포장 정보 구독자: listener(새 포장 정보, 이전 포장 정보)
+# (자동완성 인덱스처럼 서비스 계층이 등록, 적재 계층은 서비스 모듈을 import하지 않음)
+_packing_change_listeners: List[Callable[[Optional[List[Dict[str, Any]]], Optional[List[Dict[str, Any]]]], None]] = []
+
+def add_packing_change_listener(listener: Callable[[Optional[List[Dict[str, Any]]], Optional[List[Dict[str, Any]]]], None]):
+    """upsert_ct_documents로 생성/수정된 문서의 포장 정보 변경 구독"""
+    if listener not in _packing_change_listeners:
+        _packing_change_listeners.append(listener)
+
+def remove_packing_change_listener(listener: Callable[[Optional[List[Dict[str, Any]]], Optional[List[Dict[str, Any]]]], None]):
+    if listener in _packing_change_listeners:
+        _packing_change_listeners.remove(listener)
+
+def _notify_packing_change(new_packing, old_packing):
+    for listener in list(_packing_change_listeners):
+        try:
+            listener(new_packing, old_packing)
+        except Exception as e:
+            logger.warning("포장 정보 변경 구독자 오류: %s", e)
+
+def compute_content_hash(raw_data: Dict[str, Any]) -> str:
+    """원본 문서 내용 해시 (키 순서 무관, 임베딩/적재 시각 제외, 전처리 버전 + 업체/재질 사전 포함)"""
+    content = {k: v for k, v in raw_data.items() if k not in VOLATILE_FIELDS}
+    if content.get('special_notes'):
+        content['special_notes'] = [
+            {k: v for k, v in note.items() if k != 'embedding'} for note in content['special_notes']
+        ]
+    payload = json.dumps([PROCESSING_VERSION, dictionary_fingerprint(), content], ensure_ascii=False, sort_keys=True, default=str)
+    return hashlib.sha1(payload.encode('utf-8')).hexdigest()
+
+def ct_document_id(document: Dict[str, Any]) -> str:
+    """문서 _id (refine 단계에서 시험번호로 만든 결정적 document_id, 없으면 test_no / file_name)"""
+    doc_id = document.get('document_id') or document.get('test_no') or document.get('file_name')
+    if not doc_id:
+        raise ValueError("document_id, test_no, file_name이 모두 없는 문서는 적재할 수 없습니다")
+    return doc_id
 
 def process_ct_document_data(raw_data: Dict[str, Any]) -> Dict[str, Any]:
     """CT 문서 데이터를 엘라스틱서치에 적합한 형태로 전처리"""
@@ -82,11 +138,25 @@ def process_ct_document_data(raw_data: Dict[str, Any]) -> Dict[str, Any]:
     
     # 통합 검색 텍스트 생성
     processed_data['search_text'] = ' '.join(search_text_parts)
+
+    # 포장 시그니처 (타입/재질 조합 필터를 nested 쿼리 없이 처리)
+    processed_data.update(packing_signature_fields(raw_data.get('packing_info') or []))
+
+    # 업체/재질 정규 ID (항목별 company_id / material_id + 문서 단위 company_ids / material_ids)
+    processed_data['packing_info'], entity_id_fields = entity_fields(raw_data.get('packing_info') or [])
+    processed_data.update(entity_id_fields)
+
+    # 포장 규격/특이사항의 수치 (내경, 토출구, 외경, 토출량, 토크 → measurements.* range 필터용)
+    processed_data['measurements'] = document_measurements(raw_data)
+
+    # 실험 기준 수치/판정 (항목별 standard_* / passed + 문서 단위 test_codes / test_outcomes)
+    processed_data['experiment_info'], outcome_fields = experiment_fields(raw_data.get('experiment_info') or [])
+    processed_data.update(outcome_fields)
     
-    # 메타데이터 추가
-    from datetime import datetime
+    # 메타데이터 추가 (기존 문서 갱신 시 created_at은 prepare_ct_documents에서 유지)
     processed_data['created_at'] = datetime.now().isoformat()
     processed_data['updated_at'] = datetime.now().isoformat()
+    processed_data['content_hash'] = compute_content_hash(raw_data)
     
     # 태그 생성
     tags = []
@@ -104,11 +174,192 @@ def process_ct_document_data(raw_data: Dict[str, Any]) -> Dict[str, Any]:
     
     return processed_data
 
+def reuse_note_embeddings(processed: Dict[str, Any], existing: Dict[str, Any]) -> int:
+    """기존 문서에서 값이 같은 special_note의 임베딩을 복사 (재사용한 개수 반환)"""
+    cached = {
+        note.get('value'): note['embedding']
+        for note in existing.get('special_notes') or []
+        if note.get('value') and note.get('embedding')
+    }
+    reused = 0
+    for note in processed.get('special_notes') or []:
+        if not note.get('embedding') and note.get('value') in cached:
+            note['embedding'] = cached[note['value']]
+            reused += 1
+    return reused
+
+def fetch_existing_documents(es, index_name: str, ids: List[str]) -> Dict[str, Dict[str, Any]]:
+    """_id 목록의 기존 문서 (EXISTING_SOURCE_FIELDS + 저장된 인덱스 이름 '_index', 인덱스가 없으면 빈 dict)"""
+    if not ids or not index_name or not es.indices.exists(index=index_name):
+        return {}
+    if partitioning_enabled():
+        # 읽기 alias가 여러 분할 인덱스를 가리키면 mget을 쓸 수 없어 ids 검색
+        response = es.search(index=index_name, query={"ids": {"values": ids}},
+                             _source=EXISTING_SOURCE_FIELDS, size=len(ids))
+        found = response['hits']['hits']
+    else:
+        response = es.mget(index=index_name, ids=ids, _source=EXISTING_SOURCE_FIELDS)
+        found = [doc for doc in response['docs'] if doc.get('found')]
+    return {doc['_id']: dict(doc.get('_source') or {}, _index=doc['_index']) for doc in found}
+
+def prepare_ct_documents(es, lookup_index: str, documents: Iterable[Dict[str, Any]], batch_size: int = 200,
+                         workers: int = 1, id_of: Callable[[Dict[str, Any]], str] = ct_document_id,
+                         embed_unchanged: bool = False) -> Iterator[Tuple[str, Dict[str, Any], Optional[Dict[str, Any]]]]:
+    """
+    원본 문서 → (_id, 전처리 문서, 기존 문서)
+    - lookup_index의 기존 문서에서 created_at 유지, 값이 같은 special_note 임베딩 재사용
+    - 임베딩은 신규/변경 문서(content_hash가 다른 문서)에서 재사용할 임베딩이 없는 note만 생성
+      (변경 없는 문서는 적재하지 않으므로 생성하지 않음, workers > 1이면 스레드 병렬)
+    - embed_unchanged=True면 변경 없는 문서도 빠진 임베딩 생성 (새 인덱스에 전체를 다시 쓰는 reindex용)
+    """
+    batch = []
+
+    def flush(pool):
+        existing_docs = fetch_existing_documents(es, lookup_index, [doc_id for doc_id, _ in batch])
+        changed_docs = []
+        for doc_id, processed in batch:
+            existing = existing_docs.get(doc_id)
+            if existing:
+                if existing.get('created_at'):
+                    processed['created_at'] = existing['created_at']
+                reuse_note_embeddings(processed, existing)
+                if existing.get('content_hash') == processed['content_hash']:
+                    # 변경 없음: 적재 시각도 기존 값 유지
+                    processed['updated_at'] = existing.get('updated_at', processed['updated_at'])
+                    if not embed_unchanged:
+                        continue
+            changed_docs.append(processed)
+        if pool:
+            list(pool.map(embedding_service.add_embeddings_to_document, changed_docs))
+        else:
+            for processed in changed_docs:
+                embedding_service.add_embeddings_to_document(processed)
+        for doc_id, processed in batch:
+            yield doc_id, processed, existing_docs.get(doc_id)
+        batch.clear()
+
+    pool = ThreadPoolExecutor(max_workers=workers) if workers > 1 else None
+    try:
+        for document in documents:
+            batch.append((id_of(document), process_ct_document_data(document)))
+            if len(batch) >= batch_size:
+                yield from flush(pool)
+        if batch:
+            yield from flush(pool)
+    finally:
+        if pool:
+            pool.shutdown()
+
+def iter_upsert_actions(index_name: str, prepared: Iterable[Tuple[str, Dict[str, Any], Optional[Dict[str, Any]]]],
+                        counts: Dict[str, int], moves: Optional[Dict[str, str]] = None,
+                        before_write: Optional[Callable[[str], None]] = None):
+    """
+    변경된 문서만 index action(문서 전체 교체)으로 변환
+    - content_hash가 같은 문서는 요청을 보내지 않음 (counts['unchanged'])
+    - 부분 update는 객체 필드가 기존 값과 병합되어 원본에서 빠진 값이 남으므로 전체 교체
+      (created_at, 임베딩은 prepare_ct_documents에서 기존 문서 값으로 채움)
+    - 시간 분할 인덱스 사용 시 test_date로 대상 분할 인덱스를 정함
+    - test_date가 바뀌어 분할 인덱스가 달라진 문서는 moves에 {_id: 이전 인덱스}만 기록
+      (이전 문서 삭제는 새 인덱스 쓰기가 성공한 뒤 호출자가 실행)
+    - before_write(대상 인덱스): 쓰기 action을 보내기 전 호출 (쓰기 차단 해제 등)
+    """
+    for doc_id, processed, existing in prepared:
+        if existing and existing.get('content_hash') == processed['content_hash']:
+            counts['unchanged'] += 1
+            continue
+        target = partition_index(processed.get('test_date'), index_name) if partitioning_enabled() else index_name
+        if existing and partitioning_enabled() and existing['_index'] != target and moves is not None:
+            moves[doc_id] = existing['_index']
+        if before_write:
+            before_write(target)
+        yield {
+            "_op_type": "index",
+            "_index": target,
+            "_id": doc_id,
+            "_source": processed,
+        }
+
+def upsert_ct_documents(index_name: str, documents: Iterable[Dict[str, Any]], chunk_size: int = 500,
+                        refresh: bool = True, workers: int = 1,
+                        id_of: Callable[[Dict[str, Any]], str] = ct_document_id) -> Dict[str, int]:
+    """
+    CT 문서 멱등 적재 (같은 원본을 다시 적재해도 쓰기 없음)
+    반환: {created, updated, unchanged, moved, errors} (moved: 분할 인덱스 이동으로 삭제된 이전 문서)
+    - 분할 인덱스가 바뀐 문서는 새 인덱스 쓰기가 성공한 경우에만 이전 문서 삭제
+      (쓰기 실패 시 이전 문서 유지, 삭제 실패 시 양쪽에 남으므로 errors로 집계)
+    - optimize_cold_partitions로 쓰기 차단된 지난 기간 분할 인덱스는 적재 동안만 차단 해제 후 다시 차단
+      (다시 쓴 인덱스의 force merge는 다음 optimize 실행 때 반영)
+    """
+    es = get_es_client()
+    counts = {"created": 0, "updated": 0, "unchanged": 0, "moved": 0, "errors": 0}
+    # 쓰기 요청을 보낸 문서의 (새 포장 정보, 이전 포장 정보) → 성공 시 구독자(자동완성 등)에 알림
+    packing_changes = {}
+    # 분할 인덱스가 바뀐 문서 {_id: 이전 인덱스}, 새 인덱스 쓰기가 성공한 문서의 삭제 action
+    moves, deletes = {}, []
+    # 쓰기 차단 여부를 확인한 인덱스, 적재 동안 차단을 해제한 인덱스
+    checked, unblocked = set(), []
+
+    def track_packing(prepared):
+        for doc_id, processed, existing in prepared:
+            if not existing or existing.get('content_hash') != processed['content_hash']:
+                packing_changes[doc_id] = (processed.get('packing_info'), (existing or {}).get('packing_info'))
+            yield doc_id, processed, existing
+
+    def ensure_writable(name: str):
+        if not partitioning_enabled() or name in checked:
+            return
+        checked.add(name)
+        if is_write_blocked(es, name):
+            set_write_block(es, name, False)
+            unblocked.append(name)
+            logger.info("쓰기 차단된 분할 인덱스 %s: 적재 동안 차단 해제", name)
+
+    prepared = prepare_ct_documents(es, index_name, documents, workers=workers, id_of=id_of)
+    if _packing_change_listeners:
+        prepared = track_packing(prepared)
+    try:
+        for ok, item in helpers.streaming_bulk(
+            es, iter_upsert_actions(index_name, prepared, counts, moves, ensure_writable),
+            chunk_size=chunk_size, raise_on_error=False
+        ):
+            result = next(iter(item.values()))
+            doc_id = result.get('_id')
+            change = packing_changes.pop(doc_id, None)
+            old_index = moves.pop(doc_id, None)
+            if not ok:
+                counts['errors'] += 1
+                logger.warning("문서 %s 적재 오류: %s", doc_id, result.get('error'))
+                continue
+            counts[result.get('result', 'updated')] += 1
+            if change and result.get('result') in ('created', 'updated'):
+                _notify_packing_change(*change)
+            if old_index:
+                ensure_writable(old_index)
+                deletes.append({"_op_type": "delete", "_index": old_index, "_id": doc_id})
+        for ok, item in helpers.streaming_bulk(es, deletes, chunk_size=chunk_size, raise_on_error=False):
+            result = item['delete']
+            if ok or result.get('status') == 404:
+                counts['moved'] += 1
+            else:
+                counts['errors'] += 1
+                logger.warning("문서 %s 이전 분할 인덱스(%s) 삭제 오류: %s",
+                               result.get('_id'), result.get('_index'), result.get('error'))
+    finally:
+        for name in unblocked:
+            set_write_block(es, name, True)
+    if partitioning_enabled() and counts['created']:
+        # 새 분할 인덱스가 생겼을 수 있으므로 검색 대상 목록 갱신
+        existing_partitions(es, index_name, refresh=True)
+    if refresh and counts['created'] + counts['updated']:
+        es.indices.refresh(index=index_name)
+    return counts
+
 def insert_ct_document(index_name: str, document_id: str, document_data: Dict[str, Any]):
-    """CT 문서를 인덱스에 삽입"""
+    """CT 문서를 인덱스에 삽입 (내용이 같으면 건너뜀)"""
     try:
-        processed_data = process_ct_document_data(document_data)
-        es.index(index=index_name, id=document_id, document=processed_data)
+        counts = upsert_ct_documents(index_name, [document_data], refresh=False, id_of=lambda _: document_id)
+        if counts['errors']:
+            raise RuntimeError("bulk 적재 실패")
         print(f"문서 {document_id} 삽입 완료: {document_data.get('product_name', 'Unknown')}")
         return True
     except Exception as e:
@@ -116,20 +367,12 @@ def insert_ct_document(index_name: str, document_id: str, document_data: Dict[st
         return False
 
 def bulk_insert_ct_documents(index_name: str, documents: List[Dict[str, Any]]):
-    """여러 CT 문서를 일괄 삽입"""
-    success_count = 0
-    error_count = 0
-    
-    for doc in documents:
-        document_id = doc.get('test_no', f"doc_{success_count + error_count}")
-        if insert_ct_document(index_name, document_id, doc):
-            success_count += 1
-        else:
-            error_count += 1
-    
-    # 인덱스 새로고침
-    es.indices.refresh(index=index_name)
-    print(f"일괄 삽입 완료: 성공 {success_count}개, 실패 {error_count}개")
+    """여러 CT 문서를 일괄 삽입 (변경 없는 문서는 건너뜀)"""
+    counts = upsert_ct_documents(index_name, documents)
+    success_count = counts['created'] + counts['updated'] + counts['unchanged']
+    error_count = counts['errors']
+    print(f"일괄 삽입 완료: 성공 {success_count}개, 실패 {error_count}개 "
+          f"(신규 {counts['created']}, 갱신 {counts['updated']}, 변경 없음 {counts['unchanged']})")
     return success_count, error_count
 
 def load_json_files_from_directory(directory_path: str) -> List[Dict[str, Any]]:
@@ -174,7 +417,7 @@ if __name__ == "__main__":
     
     # 1. 인덱스 생성
     print("1. CT 문서 인덱스 생성 중...")
-    if create_ct_document_index_with_mapping(es, index_name):
+    if create_ct_document_index_with_mapping(get_es_client(), index_name):
         print("CT 문서 인덱스 생성 완료!")
         
         # 2. JSON 파일들 로드 및 인덱싱
@@ -1,6 +1,76 @@
-from fastapi import FastAPI
-from app.api import mocks
+import time
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Request
+from app.api import mocks, export, metrics, diagnostics, autocomplete
+from app.observability.tracing import configure_logging, start_trace
+from app.observability.metrics import HTTP_REQUEST_SECONDS, start_request_timings, server_timing_header
+from app.observability.es_stats import es_stats_collector
+from app.observability.capture import start_query_capture, stop_query_capture
+from app.observability.profiling import DIAGNOSTICS_TOKEN, RequestProfile, diagnostics_store, is_authorized
+from app.services.autocomplete import autocomplete_index
 
-app = FastAPI()
+configure_logging()
 
-app.include_router(mocks.router)
\ No newline at end of file
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Elasticsearch 통계 수집기 (ES_STATS_INTERVAL > 0일 때만 동작)
+    es_stats_collector.start()
+    # 검색 요청 캡처 (QUERY_CAPTURE_PATH 지정 시에만 동작)
+    start_query_capture()
+    # 포장 타입/재질/업체 자동완성 인덱스 (백그라운드 구축)
+    autocomplete_index.start()
+    yield
+    autocomplete_index.stop()
+    stop_query_capture()
+    es_stats_collector.stop()
+
+app = FastAPI(lifespan=lifespan)
+
+@app.middleware("http")
+async def observe_request(request: Request, call_next):
+    # 요청별 trace id (클라이언트가 X-Trace-Id를 보내면 그대로 사용) 및 단계별 소요 시간 수집
+    trace_id = start_trace(request.headers.get("x-trace-id"))
+    timings = start_request_timings()
+    # 요청 단위 프로파일링 (DIAGNOSTICS_TOKEN 설정 + 같은 토큰을 X-Profile 헤더/profile 쿼리로 보낸 경우만, 진단 조회 자체는 제외)
+    profile = profile_status = None
+    if DIAGNOSTICS_TOKEN and not request.url.path.startswith("/diagnostics") and is_authorized(request.headers.get("x-profile") or request.query_params.get("profile")):
+        profile = RequestProfile.try_start()
+        profile_status = "recorded" if profile else "busy"
+    start = time.perf_counter()
+
+    try:
+        response = await call_next(request)
+    except Exception:
+        if profile is not None:
+            profile.stop()
+        raise
+
+    elapsed = time.perf_counter() - start
+    route = request.scope.get("route")
+    HTTP_REQUEST_SECONDS.observe(
+        elapsed,
+        method=request.method,
+        path=route.path if route else "unmatched",
+        status=response.status_code
+    )
+    timings["total"] = elapsed
+    response.headers["X-Trace-Id"] = trace_id
+    response.headers["Server-Timing"] = server_timing_header(timings)
+    if profile is not None:
+        diagnostics_store.put(trace_id, {
+            "trace_id": trace_id,
+            "method": request.method,
+            "path": request.url.path,
+            "status": response.status_code,
+            **profile.stop(),
+        })
+        response.headers["X-Diagnostics"] = f"/diagnostics/{trace_id}"
+    if profile_status:
+        response.headers["X-Profile"] = profile_status
+    return response
+
+app.include_router(mocks.router)
+app.include_router(export.router)
+app.include_router(metrics.router)
+app.include_router(diagnostics.router)
+app.include_router(autocomplete.router)
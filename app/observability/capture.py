@@ -0,0 +1,96 @@
+"""
+검색 요청 캡처 (부하 재현용, 기본 비활성화)
+
+QUERY_CAPTURE_PATH를 지정하면 /api/search 요청을 정규화해 JSONL로 기록
+  {"ts": 1729300000.123, "trace_id": "...", "request": {...SearchRequest...}}
+- 파일 쓰기는 QueueListener 스레드에서 처리 (요청 처리 경로에서는 큐에 넣기만 함)
+- QUERY_CAPTURE_MAX_BYTES마다 회전, QUERY_CAPTURE_BACKUP_COUNT개 보관 (path.1이 가장 최근 백업)
+- 재생: python -m benchmarks.replay --capture <path> --target http://localhost:8000
+"""
+from typing import Any, Dict, Optional
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import threading
+import time
+
+from app.observability.tracing import get_trace_id
+
+# 캡처 파일 경로 (비어 있으면 캡처하지 않음)
+QUERY_CAPTURE_PATH = os.getenv("QUERY_CAPTURE_PATH", "")
+# 캡처할 요청 비율 (0.0 ~ 1.0)
+QUERY_CAPTURE_SAMPLE_RATE = float(os.getenv("QUERY_CAPTURE_SAMPLE_RATE", "1.0"))
+QUERY_CAPTURE_MAX_BYTES = int(os.getenv("QUERY_CAPTURE_MAX_BYTES", str(100 * 1024 * 1024)))
+QUERY_CAPTURE_BACKUP_COUNT = int(os.getenv("QUERY_CAPTURE_BACKUP_COUNT", "5"))
+
+# 캡처 전용 로거 (ct_search 로그 출력과 섞이지 않도록 전파하지 않음)
+capture_logger = logging.getLogger("ct_search.capture")
+capture_logger.propagate = False
+
+_listener: Optional[logging.handlers.QueueListener] = None
+_lock = threading.Lock()
+
+def _normalize(value: Any) -> Any:
+    """문자열 앞뒤 공백 제거 (같은 검색이 공백 차이로 다른 요청이 되지 않도록)"""
+    if isinstance(value, str):
+        return value.strip()
+    if isinstance(value, dict):
+        return {k: _normalize(v) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_normalize(v) for v in value]
+    return value
+
+def normalize_search_request(request) -> Dict[str, Any]:
+    """
+    SearchRequest → 재생 가능한 JSON
+    cursor는 PIT에 묶여 만료되므로 제외 (재생 시에는 첫 페이지 요청으로 실행)
+    """
+    return _normalize(request.model_dump(mode="json", exclude={"cursor"}))
+
+def start_query_capture(path: str = QUERY_CAPTURE_PATH) -> bool:
+    """캡처 파일 핸들러 시작 (경로가 없으면 비활성화 상태 유지)"""
+    global _listener
+    if not path:
+        return False
+    with _lock:
+        if _listener is None:
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+            file_handler = logging.handlers.RotatingFileHandler(
+                path, maxBytes=QUERY_CAPTURE_MAX_BYTES, backupCount=QUERY_CAPTURE_BACKUP_COUNT, encoding="utf-8"
+            )
+            file_handler.setFormatter(logging.Formatter("%(message)s"))
+            records = queue.SimpleQueue()
+            capture_logger.addHandler(logging.handlers.QueueHandler(records))
+            capture_logger.setLevel(logging.INFO)
+            _listener = logging.handlers.QueueListener(records, file_handler)
+            _listener.start()
+    return True
+
+def stop_query_capture():
+    """남은 기록을 파일에 쓰고 핸들러 정리"""
+    global _listener
+    with _lock:
+        if _listener is None:
+            return
+        _listener.stop()
+        for handler in _listener.handlers:
+            handler.close()
+        for handler in list(capture_logger.handlers):
+            capture_logger.removeHandler(handler)
+        _listener = None
+
+def is_capture_enabled() -> bool:
+    return _listener is not None
+
+def capture_search_request(request):
+    """검색 요청 1건 기록 (캡처 비활성화 또는 샘플링 제외 시 무시)"""
+    if _listener is None or random.random() >= QUERY_CAPTURE_SAMPLE_RATE:
+        return
+    capture_logger.info(json.dumps({
+        "ts": round(time.time(), 3),
+        "trace_id": get_trace_id(),
+        "request": normalize_search_request(request),
+    }, ensure_ascii=False))
@@ -0,0 +1,194 @@
+from typing import Dict, Any, Optional
+from collections import deque
+import logging
+import os
+import threading
+import time
+
+from app.elasticsearch.client import get_es_client
+from app.observability.metrics import Gauge, register
+
+logger = logging.getLogger("ct_search.es_stats")
+
+# 수집 주기(초), 0이면 수집기 비활성화
+ES_STATS_INTERVAL = float(os.getenv("ES_STATS_INTERVAL", "0"))
+# 보관할 스냅샷 수 (rolling window = 주기 x 개수)
+ES_STATS_WINDOW = int(os.getenv("ES_STATS_WINDOW", "60"))
+
+# 벡터 인덱스 관련 세그먼트 파일 확장자 (vec: 원본 벡터, vex: HNSW 그래프, veq/vemq: 양자화 벡터)
+VECTOR_FILE_TYPES = ("vec", "vex", "veq", "vem", "vemf", "vemq")
+
+ES_INDEX_GAUGE = register(Gauge(
+    "ct_search_es_index_stat", "ct_documents 인덱스 통계 (최근 스냅샷)", ("index", "stat")))
+ES_WINDOW_GAUGE = register(Gauge(
+    "ct_search_es_window_stat", "rolling window 동안의 변화량/비율", ("index", "stat")))
+ES_NODE_GAUGE = register(Gauge(
+    "ct_search_es_node_stat", "노드별 통계 (최근 스냅샷)", ("node", "stat")))
+
+def _get(stats: Dict[str, Any], path: str, default=0):
+    """'a.b.c' 경로로 중첩 dict 값 조회"""
+    value = stats
+    for key in path.split("."):
+        if not isinstance(value, dict) or key not in value:
+            return default
+        value = value[key]
+    return value
+
+def _ratio(hits: float, misses: float) -> Optional[float]:
+    total = hits + misses
+    return hits / total if total else None
+
+def extract_index_stats(total: Dict[str, Any]) -> Dict[str, float]:
+    """indices stats 응답의 _all.total에서 필요한 값만 추출"""
+    file_sizes = _get(total, "segments.file_sizes", {})
+    return {
+        "query_cache_hits": _get(total, "query_cache.hit_count"),
+        "query_cache_misses": _get(total, "query_cache.miss_count"),
+        "query_cache_memory_bytes": _get(total, "query_cache.memory_size_in_bytes"),
+        "query_cache_evictions": _get(total, "query_cache.evictions"),
+        "request_cache_hits": _get(total, "request_cache.hit_count"),
+        "request_cache_misses": _get(total, "request_cache.miss_count"),
+        "request_cache_memory_bytes": _get(total, "request_cache.memory_size_in_bytes"),
+        "request_cache_evictions": _get(total, "request_cache.evictions"),
+        "fielddata_memory_bytes": _get(total, "fielddata.memory_size_in_bytes"),
+        "fielddata_evictions": _get(total, "fielddata.evictions"),
+        "segment_count": _get(total, "segments.count"),
+        "vector_index_bytes": sum(
+            _get(file_sizes, f"{file_type}.size_in_bytes") for file_type in VECTOR_FILE_TYPES
+        ),
+        "dense_vector_count": _get(total, "dense_vector.value_count"),
+        "docs_count": _get(total, "docs.count"),
+        "store_bytes": _get(total, "store.size_in_bytes"),
+        "indexing_total": _get(total, "indexing.index_total"),
+        "indexing_time_ms": _get(total, "indexing.index_time_in_millis"),
+        "refresh_total": _get(total, "refresh.total"),
+        "refresh_time_ms": _get(total, "refresh.total_time_in_millis"),
+        "merges_current": _get(total, "merges.current"),
+        "merges_total": _get(total, "merges.total"),
+        "merges_time_ms": _get(total, "merges.total_time_in_millis"),
+        "search_query_total": _get(total, "search.query_total"),
+        "search_query_time_ms": _get(total, "search.query_time_in_millis"),
+    }
+
+def extract_node_stats(node: Dict[str, Any]) -> Dict[str, float]:
+    """nodes stats 응답에서 노드 단위 캐시/fielddata/global ordinals 값 추출"""
+    indices = node.get("indices", {})
+    return {
+        "fielddata_memory_bytes": _get(indices, "fielddata.memory_size_in_bytes"),
+        "global_ordinals_build_time_ms": _get(indices, "fielddata.global_ordinals.build_time_in_millis"),
+        "query_cache_memory_bytes": _get(indices, "query_cache.memory_size_in_bytes"),
+        "request_cache_memory_bytes": _get(indices, "request_cache.memory_size_in_bytes"),
+        "fielddata_breaker_estimated_bytes": _get(node, "breakers.fielddata.estimated_size_in_bytes"),
+        "heap_used_bytes": _get(node, "jvm.mem.heap_used_in_bytes"),
+    }
+
+class EsStatsCollector:
+    """
+    Elasticsearch 인덱스/노드 통계를 주기적으로 수집하는 백그라운드 수집기
+    - 최근 window개 스냅샷을 보관하고 구간 변화량(캐시 적중률, eviction, 병합, refresh 등)을 계산
+    - 수집 결과는 /metrics 지표(gauge)로도 노출
+    """
+    def __init__(self, index_name: str = "ct_documents", es=None,
+                 interval: float = ES_STATS_INTERVAL, window: int = ES_STATS_WINDOW):
+        # es 미지정 시 수집할 때마다 공용 클라이언트 사용
+        self.es = es
+        self.index_name = index_name
+        self.interval = interval
+        self.snapshots = deque(maxlen=max(window, 2))
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def collect_once(self) -> Dict[str, Any]:
+        """인덱스/노드 통계 1회 수집 후 스냅샷 저장"""
+        es = self.es or get_es_client()
+        index_stats = es.indices.stats(index=self.index_name, include_segment_file_sizes=True)
+        node_stats = es.nodes.stats(metric=["indices", "breaker", "jvm"])
+        snapshot = {
+            "timestamp": time.time(),
+            "index": extract_index_stats(_get(index_stats, "_all.total", {})),
+            "nodes": {
+                node.get("name", node_id): extract_node_stats(node)
+                for node_id, node in node_stats.get("nodes", {}).items()
+            }
+        }
+        with self._lock:
+            self.snapshots.append(snapshot)
+        self._export(snapshot)
+        return snapshot
+
+    def window_summary(self) -> Dict[str, Any]:
+        """보관 중인 가장 오래된/최근 스냅샷의 차이로 구간 지표 계산"""
+        with self._lock:
+            if len(self.snapshots) < 2:
+                return {}
+            first, last = self.snapshots[0], self.snapshots[-1]
+        a, b = first["index"], last["index"]
+        delta = {key: b[key] - a[key] for key in b}
+        seconds = last["timestamp"] - first["timestamp"]
+        return {
+            "window_seconds": round(seconds, 1),
+            "query_cache_hit_ratio": _ratio(delta["query_cache_hits"], delta["query_cache_misses"]),
+            "request_cache_hit_ratio": _ratio(delta["request_cache_hits"], delta["request_cache_misses"]),
+            "query_cache_evictions": delta["query_cache_evictions"],
+            "request_cache_evictions": delta["request_cache_evictions"],
+            "fielddata_evictions": delta["fielddata_evictions"],
+            "merges": delta["merges_total"],
+            "merge_time_ms": delta["merges_time_ms"],
+            "refreshes": delta["refresh_total"],
+            "avg_refresh_ms": delta["refresh_time_ms"] / delta["refresh_total"] if delta["refresh_total"] else None,
+            "indexed_docs_per_second": delta["indexing_total"] / seconds if seconds else None,
+            "avg_indexing_ms": delta["indexing_time_ms"] / delta["indexing_total"] if delta["indexing_total"] else None,
+            "queries_per_second": delta["search_query_total"] / seconds if seconds else None,
+            "avg_query_ms": delta["search_query_time_ms"] / delta["search_query_total"] if delta["search_query_total"] else None,
+            "segment_count_change": delta["segment_count"],
+            # ES 8은 segments.memory_in_bytes를 항상 0으로 보고하므로 세그먼트 규모는 저장 용량 변화로 추적
+            "store_bytes_change": delta["store_bytes"],
+        }
+
+    def report(self) -> Dict[str, Any]:
+        """최근 스냅샷 + 구간 요약"""
+        with self._lock:
+            latest = self.snapshots[-1] if self.snapshots else None
+        return {
+            "index": self.index_name,
+            "latest": latest,
+            "window": self.window_summary(),
+        }
+
+    def _export(self, snapshot: Dict[str, Any]):
+        """스냅샷과 구간 요약을 /metrics gauge로 반영"""
+        for stat, value in snapshot["index"].items():
+            ES_INDEX_GAUGE.set(value, index=self.index_name, stat=stat)
+        for node_name, stats in snapshot["nodes"].items():
+            for stat, value in stats.items():
+                ES_NODE_GAUGE.set(value, node=node_name, stat=stat)
+        for stat, value in self.window_summary().items():
+            if value is not None:
+                ES_WINDOW_GAUGE.set(value, index=self.index_name, stat=stat)
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                self.collect_once()
+            except Exception as e:
+                logger.warning("Elasticsearch 통계 수집 오류: %s", e)
+            self._stop.wait(self.interval)
+
+    def start(self):
+        """백그라운드 수집 시작 (interval이 0 이하면 시작하지 않음)"""
+        if self.interval <= 0 or self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="es-stats-collector", daemon=True)
+        self._thread.start()
+        logger.info("Elasticsearch 통계 수집 시작 (%s, %.0f초 주기)", self.index_name, self.interval)
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+# 전역 인스턴스 생성 (ES_STATS_INTERVAL > 0일 때 앱 시작 시 수집 시작)
+es_stats_collector = EsStatsCollector()
@@ -0,0 +1,166 @@
+from typing import Dict, List, Optional, Tuple
+from contextlib import contextmanager
+import bisect
+import contextvars
+import threading
+import time
+
+# 지연 시간 히스토그램 기본 구간 (초)
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+def _escape_label(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _format_labels(labelnames: Tuple[str, ...], labelvalues: Tuple, extra: str = "") -> str:
+    parts = [f'{name}="{_escape_label(value)}"' for name, value in zip(labelnames, labelvalues)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+class Counter:
+    """누적 카운터 (Prometheus counter)"""
+    type_name = "counter"
+
+    def __init__(self, name: str, help: str, labelnames: Tuple[str, ...] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = labelnames
+        self._values: Dict[Tuple, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0, **labels):
+        key = tuple(labels.get(name, "") for name in self.labelnames)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def get(self, **labels) -> float:
+        key = tuple(labels.get(name, "") for name in self.labelnames)
+        return self._values.get(key, 0.0)
+
+    def render(self) -> List[str]:
+        with self._lock:
+            items = list(self._values.items())
+        return [f"{self.name}{_format_labels(self.labelnames, key)} {value}" for key, value in items]
+
+class Gauge(Counter):
+    """현재 값 (Prometheus gauge)"""
+    type_name = "gauge"
+
+    def set(self, value: float, **labels):
+        key = tuple(labels.get(name, "") for name in self.labelnames)
+        with self._lock:
+            self._values[key] = value
+
+class Histogram:
+    """구간별 누적 분포 (Prometheus histogram)"""
+    type_name = "histogram"
+
+    def __init__(self, name: str, help: str, labelnames: Tuple[str, ...] = (), buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labelnames = labelnames
+        self.buckets = tuple(sorted(buckets))
+        # 레이블 조합별 [구간별 개수..., +Inf 개수], 합계
+        self._counts: Dict[Tuple, List[int]] = {}
+        self._sums: Dict[Tuple, float] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels):
+        key = tuple(labels.get(name, "") for name in self.labelnames)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            counts = self._counts.get(key)
+            if counts is None:
+                counts = self._counts[key] = [0] * (len(self.buckets) + 1)
+                self._sums[key] = 0.0
+            counts[index] += 1
+            self._sums[key] += value
+
+    def render(self) -> List[str]:
+        lines = []
+        with self._lock:
+            items = [(key, list(counts), self._sums[key]) for key, counts in self._counts.items()]
+        for key, counts, total in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets, counts):
+                cumulative += count
+                labels = _format_labels(self.labelnames, key, 'le="%s"' % bound)
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            cumulative += counts[-1]
+            labels = _format_labels(self.labelnames, key, 'le="+Inf"')
+            lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {total}")
+            lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+REGISTRY: List = []
+
+def register(metric):
+    REGISTRY.append(metric)
+    return metric
+
+HTTP_REQUEST_SECONDS = register(Histogram(
+    "ct_search_http_request_seconds", "HTTP 요청 처리 시간", ("method", "path", "status")))
+STAGE_SECONDS = register(Histogram(
+    "ct_search_stage_seconds", "검색 단계별 소요 시간 (embedding, semantic_presearch, es_query, validation, serialization)", ("stage",)))
+ES_CLIENT_SECONDS = register(Histogram(
+    "ct_search_es_client_seconds", "클라이언트에서 측정한 Elasticsearch 검색 시간", ("query",)))
+ES_TOOK_SECONDS = register(Histogram(
+    "ct_search_es_took_seconds", "Elasticsearch 응답의 took (서버 내부 처리 시간)", ("query",)))
+CACHE_REQUESTS = register(Counter(
+    "ct_search_cache_requests_total", "애플리케이션 캐시 조회 수", ("cache", "result")))
+CACHE_HIT_RATIO = register(Gauge(
+    "ct_search_cache_hit_ratio", "애플리케이션 캐시 적중률", ("cache",)))
+
+# 요청별 단계 소요 시간 누적 (Server-Timing 헤더용)
+_request_timings = contextvars.ContextVar("request_timings", default=None)
+
+def start_request_timings() -> Dict[str, float]:
+    """현재 요청의 단계별 소요 시간 누적 시작 (반환된 dict에 초 단위로 누적)"""
+    timings: Dict[str, float] = {}
+    _request_timings.set(timings)
+    return timings
+
+def add_request_timing(name: str, seconds: float):
+    timings = _request_timings.get()
+    if timings is not None:
+        timings[name] = timings.get(name, 0.0) + seconds
+
+@contextmanager
+def stage(name: str):
+    """검색 단계 소요 시간 측정 (히스토그램 + 현재 요청의 Server-Timing)"""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        STAGE_SECONDS.observe(elapsed, stage=name)
+        add_request_timing(name, elapsed)
+
+def record_es_timing(query: str, client_seconds: float, took_ms: Optional[float]):
+    """ES 검색 1회의 클라이언트 측정 시간과 서버 took 기록"""
+    ES_CLIENT_SECONDS.observe(client_seconds, query=query)
+    if took_ms is not None:
+        ES_TOOK_SECONDS.observe(took_ms / 1000, query=query)
+    add_request_timing("es", client_seconds)
+
+def record_cache(cache: str, hit: bool):
+    """캐시 조회 결과 기록 및 적중률 갱신"""
+    CACHE_REQUESTS.inc(cache=cache, result="hit" if hit else "miss")
+    hits = CACHE_REQUESTS.get(cache=cache, result="hit")
+    misses = CACHE_REQUESTS.get(cache=cache, result="miss")
+    CACHE_HIT_RATIO.set(hits / (hits + misses), cache=cache)
+
+def server_timing_header(timings: Dict[str, float]) -> str:
+    """단계별 소요 시간을 Server-Timing 헤더 값으로 변환 (ms)"""
+    return ", ".join(f"{name};dur={seconds * 1000:.1f}" for name, seconds in timings.items())
+
+def render_metrics() -> str:
+    """등록된 모든 지표를 Prometheus text format으로 출력"""
+    lines = []
+    for metric in REGISTRY:
+        lines.append(f"# HELP {metric.name} {metric.help}")
+        lines.append(f"# TYPE {metric.name} {metric.type_name}")
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,172 @@
+"""
+요청 단위 프로파일링 (느린 요청 1건을 그대로 재현해 분석)
+
+DIAGNOSTICS_TOKEN을 설정한 경우에만 동작하며, 요청에 같은 토큰을
+X-Profile 헤더 또는 ?profile= 쿼리 파라미터로 보내면 해당 요청을
+- 샘플링 프로파일러 (sys._current_frames, PROFILE_INTERVAL_MS 간격)
+- tracemalloc 스냅샷 비교 (요청 전후 할당 증가 위치)
+로 측정해 trace id 기준으로 진단 저장소에 보관
+  GET /diagnostics/{trace_id}             요약 (상위 스택, 상위 할당 위치)
+  GET /diagnostics/{trace_id}/flamegraph  collapsed stack (flamegraph.pl / speedscope 입력)
+
+- 토큰이 없거나 일치하지 않으면 요청 처리 경로에 추가 작업 없음
+- tracemalloc은 프로세스 전역이므로 동시에 1건만 프로파일링 (진행 중이면 X-Profile: busy)
+- 샘플은 유휴 상태(대기/select)가 아닌 모든 스레드에서 수집하므로 동시 처리 중인 다른 요청이 섞일 수 있음
+"""
+from typing import Any, Dict, List, Optional, Tuple
+from collections import Counter as StackCounter, OrderedDict
+import hmac
+import os
+import sys
+import threading
+import time
+import tracemalloc
+
+# 프로파일링 요청 인증 토큰 (비어 있으면 기능 비활성화)
+DIAGNOSTICS_TOKEN = os.getenv("DIAGNOSTICS_TOKEN", "")
+# 샘플링 간격 (ms)
+PROFILE_INTERVAL_MS = float(os.getenv("PROFILE_INTERVAL_MS", "2"))
+# 보관할 진단 결과 수 (오래된 것부터 삭제)
+DIAGNOSTICS_MAX_ENTRIES = int(os.getenv("DIAGNOSTICS_MAX_ENTRIES", "50"))
+# 응답에 포함할 상위 스택 / 할당 위치 수
+DIAGNOSTICS_TOP_N = int(os.getenv("DIAGNOSTICS_TOP_N", "25"))
+
+# 유휴 스레드 판정: 가장 안쪽 프레임이 대기 함수인 경우
+IDLE_FILES = ("threading.py", "selectors.py", "queue.py")
+_THIS_FILE = os.path.abspath(__file__)
+
+def is_authorized(token: Optional[str]) -> bool:
+    """프로파일링/진단 조회 토큰 확인 (기능 비활성화 시 항상 False)"""
+    if not DIAGNOSTICS_TOKEN or not token:
+        return False
+    return hmac.compare_digest(token.encode(), DIAGNOSTICS_TOKEN.encode())
+
+def _frame_label(code) -> str:
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+class SamplingProfiler:
+    """별도 스레드에서 주기적으로 스택을 수집하는 샘플링 프로파일러"""
+    def __init__(self, interval: float = PROFILE_INTERVAL_MS / 1000):
+        self.interval = interval
+        self.stacks: StackCounter = StackCounter()
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="request-profiler", daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        own = threading.get_ident()
+        names = {}
+        while not self._stop.wait(self.interval):
+            self.samples += 1
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own or os.path.basename(frame.f_code.co_filename) in IDLE_FILES:
+                    continue
+                stack = []
+                while frame is not None:
+                    stack.append(_frame_label(frame.f_code))
+                    frame = frame.f_back
+                if thread_id not in names:
+                    thread = threading._active.get(thread_id)
+                    names[thread_id] = thread.name if thread else str(thread_id)
+                stack.append(names[thread_id])
+                self.stacks[";".join(reversed(stack))] += 1
+
+    def collapsed(self) -> str:
+        """collapsed stack 형식 (프레임;프레임;... 횟수)"""
+        return "".join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+class RequestProfile:
+    """요청 1건의 샘플링 프로파일 + 할당 증가 측정"""
+    _lock = threading.Lock()
+
+    def __init__(self):
+        self.profiler = SamplingProfiler()
+        self._started_tracemalloc = False
+        self._baseline = None
+        self._start = 0.0
+
+    @classmethod
+    def try_start(cls) -> Optional["RequestProfile"]:
+        """프로파일링 시작 (다른 요청을 프로파일링 중이면 None)"""
+        if not cls._lock.acquire(blocking=False):
+            return None
+        profile = cls()
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+            profile._started_tracemalloc = True
+        profile._baseline = tracemalloc.take_snapshot()
+        profile._start = time.perf_counter()
+        profile.profiler.start()
+        return profile
+
+    def stop(self) -> Dict[str, Any]:
+        try:
+            elapsed = time.perf_counter() - self._start
+            self.profiler.stop()
+            snapshot = tracemalloc.take_snapshot()
+            if self._started_tracemalloc:
+                tracemalloc.stop()
+            return {
+                "duration_ms": round(elapsed * 1000, 2),
+                "interval_ms": PROFILE_INTERVAL_MS,
+                "samples": self.profiler.samples,
+                "top_stacks": [
+                    {"stack": stack.split(";"), "count": count}
+                    for stack, count in self.profiler.stacks.most_common(DIAGNOSTICS_TOP_N)
+                ],
+                "allocations": _top_allocations(self._baseline, snapshot),
+                "collapsed": self.profiler.collapsed(),
+            }
+        finally:
+            RequestProfile._lock.release()
+
+def _top_allocations(baseline, snapshot, limit: int = DIAGNOSTICS_TOP_N) -> List[Dict[str, Any]]:
+    """요청 전후 스냅샷 비교: 할당 증가량이 큰 위치"""
+    filters = [
+        tracemalloc.Filter(False, tracemalloc.__file__),
+        tracemalloc.Filter(False, _THIS_FILE),
+    ]
+    stats = snapshot.filter_traces(filters).compare_to(baseline.filter_traces(filters), "lineno")
+    allocations = []
+    for stat in stats[:limit]:
+        frame = stat.traceback[0]
+        allocations.append({
+            "file": frame.filename,
+            "line": frame.lineno,
+            "size_diff_kb": round(stat.size_diff / 1024, 1),
+            "count_diff": stat.count_diff,
+            "size_kb": round(stat.size / 1024, 1),
+        })
+    return allocations
+
+class DiagnosticsStore:
+    """trace id별 진단 결과 보관 (최근 max_entries개)"""
+    def __init__(self, max_entries: int = DIAGNOSTICS_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def put(self, trace_id: str, entry: Dict[str, Any]):
+        with self._lock:
+            self._entries[trace_id] = entry
+            self._entries.move_to_end(trace_id)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def get(self, trace_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            return self._entries.get(trace_id)
+
+    def recent(self) -> List[Tuple[str, Dict[str, Any]]]:
+        """최근 결과부터 (trace id, 진단 결과)"""
+        with self._lock:
+            return list(reversed(self._entries.items()))
+
+diagnostics_store = DiagnosticsStore()
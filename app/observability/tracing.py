@@ -0,0 +1,124 @@
+from typing import Any, Dict, List, Optional
+import contextvars
+import json
+import logging
+import os
+import random
+import time
+import uuid
+
+from app.observability.metrics import record_es_timing
+
+# 로그 레벨 (쿼리 본문 로그는 DEBUG에서만 출력)
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
+# DEBUG 레벨일 때 쿼리 본문을 기록할 요청 비율 (0.0 ~ 1.0, 요청 단위 샘플링)
+QUERY_LOG_SAMPLE_RATE = float(os.getenv("QUERY_LOG_SAMPLE_RATE", "1.0"))
+# 이 시간(ms) 이상 걸린 검색은 레벨/샘플링과 관계없이 전체 쿼리 본문을 WARNING으로 기록
+SLOW_QUERY_MS = float(os.getenv("SLOW_QUERY_MS", "1000"))
+
+LOG_FORMAT = "%(asctime)s %(levelname)s %(name)s [trace=%(trace_id)s] %(message)s"
+
+logger = logging.getLogger("ct_search")
+query_logger = logging.getLogger("ct_search.query")
+slow_query_logger = logging.getLogger("ct_search.slow_query")
+
+_trace_id = contextvars.ContextVar("trace_id", default=None)
+_trace_sampled = contextvars.ContextVar("trace_sampled", default=None)
+
+def start_trace(trace_id: Optional[str] = None) -> str:
+    """요청 단위 trace id 설정 및 쿼리 로그 샘플링 여부 결정"""
+    trace_id = trace_id or uuid.uuid4().hex[:16]
+    _trace_id.set(trace_id)
+    _trace_sampled.set(random.random() < QUERY_LOG_SAMPLE_RATE)
+    return trace_id
+
+def get_trace_id() -> str:
+    return _trace_id.get() or "-"
+
+def is_trace_sampled() -> bool:
+    """현재 요청의 쿼리 로그 샘플링 여부 (요청 밖에서는 호출마다 결정)"""
+    sampled = _trace_sampled.get()
+    if sampled is None:
+        return random.random() < QUERY_LOG_SAMPLE_RATE
+    return sampled
+
+class TraceIdFilter(logging.Filter):
+    """로그 레코드에 현재 trace id 추가"""
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.trace_id = get_trace_id()
+        return True
+
+def _abbreviate_vectors(value: Any) -> Any:
+    """임베딩 벡터(긴 숫자 리스트)를 차원 수 표시로 축약"""
+    if isinstance(value, dict):
+        return {k: _abbreviate_vectors(v) for k, v in value.items()}
+    if isinstance(value, list):
+        if len(value) > 16 and all(isinstance(v, float) for v in value[:16]):
+            return f"<vector dims={len(value)}>"
+        return [_abbreviate_vectors(v) for v in value]
+    return value
+
+class LazyJson:
+    """로그가 실제로 출력될 때만 JSON으로 직렬화 (기본은 벡터 축약)"""
+    def __init__(self, value: Any, full: bool = False):
+        self.value = value
+        self.full = full
+
+    def __str__(self) -> str:
+        value = self.value if self.full else _abbreviate_vectors(self.value)
+        return json.dumps(value, ensure_ascii=False, default=str)
+
+def configure_logging(level: str = LOG_LEVEL):
+    """ct_search 로거 설정 (trace id 포함 포맷, 중복 핸들러 방지)"""
+    logger.setLevel(level.upper())
+    if not any(getattr(h, "_ct_search_handler", False) for h in logger.handlers):
+        handler = logging.StreamHandler()
+        handler.setFormatter(logging.Formatter(LOG_FORMAT))
+        handler.addFilter(TraceIdFilter())
+        handler._ct_search_handler = True
+        logger.addHandler(handler)
+        logger.propagate = False
+
+def traced_search(es, name: str, query: Dict[str, Any], **kwargs):
+    """
+    Elasticsearch 검색 실행 + 쿼리 추적
+    - DEBUG + 샘플링된 요청: 쿼리 본문(벡터 축약) 기록
+    - SLOW_QUERY_MS 이상 소요: 전체 쿼리 본문과 ES took/클라이언트 소요 시간 기록
+    - ES took / 클라이언트 소요 시간 지표 기록
+    """
+    if query_logger.isEnabledFor(logging.DEBUG) and is_trace_sampled():
+        query_logger.debug("[%s] %s", name, LazyJson(query))
+
+    start = time.perf_counter()
+    response = es.search(body=query, **kwargs)
+    elapsed = time.perf_counter() - start
+    elapsed_ms = elapsed * 1000
+    record_es_timing(name, elapsed, response.get("took"))
+
+    if elapsed_ms >= SLOW_QUERY_MS:
+        slow_query_logger.warning(
+            "[%s] %.1fms (es took=%sms) %s",
+            name, elapsed_ms, response.get("took"), LazyJson(query, full=True)
+        )
+    return response
+
+def traced_msearch(es, name: str, searches: List[Dict[str, Any]], **kwargs):
+    """
+    Elasticsearch msearch 실행 + 쿼리 추적 (traced_search와 같은 기록, 헤더/본문 쌍 목록)
+    took은 msearch 전체 기준으로 기록
+    """
+    if query_logger.isEnabledFor(logging.DEBUG) and is_trace_sampled():
+        query_logger.debug("[%s] %s", name, LazyJson(searches))
+
+    start = time.perf_counter()
+    response = es.msearch(searches=searches, **kwargs)
+    elapsed = time.perf_counter() - start
+    elapsed_ms = elapsed * 1000
+    record_es_timing(name, elapsed, response.get("took"))
+
+    if elapsed_ms >= SLOW_QUERY_MS:
+        slow_query_logger.warning(
+            "[%s] %.1fms (es took=%sms, %d건) %s",
+            name, elapsed_ms, response.get("took"), len(searches) // 2, LazyJson(searches, full=True)
+        )
+    return response
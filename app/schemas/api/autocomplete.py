@@ -0,0 +1,14 @@
+from pydantic import BaseModel
+from typing import List, Literal
+
+# 자동완성 대상 포장 필드 (SearchRequest.packages 항목의 type / material / company)
+AutocompleteField = Literal["type", "material", "company"]
+
+class AutocompleteSuggestion(BaseModel):
+    value: str   # 표시 값 (같은 정규화 값 중 가장 많이 쓰인 표기)
+    count: int   # 사용 횟수 (포장 항목 수)
+
+class AutocompleteResponse(BaseModel):
+    field: AutocompleteField
+    query: str
+    suggestions: List[AutocompleteSuggestion]
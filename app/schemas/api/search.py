@@ -1,16 +1,57 @@
-from pydantic import BaseModel
-from typing import List
-from app.schemas.common import PackingInfo, Document
+from pydantic import BaseModel, Field
+from typing import Dict, List, Literal, Union
+from app.schemas.common import PackingInfo, Document, DocumentSummary
+
+# 검색 결과 조회 형태 (summary: 목록 화면용 경량 필드, detail: 전체 문서)
+SearchView = Literal["summary", "detail"]
+# 정렬 (relevance: 관련도순, recent: 테스트 날짜 최신순)
+SearchSort = Literal["relevance", "recent"]
+# 수치 범위 검색 필드 (app.elasticsearch.extraction.MEASUREMENT_FIELDS, 지름 mm / 토출량 g / 토크 kgf / 용량 ml, g)
+MeasurementField = Literal[
+    "inner_diameter_mm", "outer_diameter_mm", "orifice_mm", "dose_g",
+    "torque_kgf", "lock_torque_kgf", "unlock_torque_kgf",
+    "specific_gravity_min", "specific_gravity_max", "capacity_ml", "capacity_g"
+]
+
+class NumericRange(BaseModel):
+    gte: float | None = None  # 이상
+    lte: float | None = None  # 이하
 
 class SearchRequest(BaseModel):
     packages: List[PackingInfo]
     lab_id: str
-    lab_info: str
-    optimum_capacity: str
+    lab_info: str                       # "비중 1.002 - 1.017"처럼 비중이 있으면 비중 범위 필터
+    optimum_capacity: str               # "30ml" / "15g" / "10"처럼 숫자+단위면 용량 범위 필터
     special_note: str
     test_date_start: str | None = None  # 테스트 날짜 시작 범위 (YYYY-MM-DD)
     test_date_end: str | None = None    # 테스트 날짜 종료 범위 (YYYY-MM-DD)
+    view: SearchView = "detail"         # 응답 필드 범위 (summary / detail)
+    exact_packing_set: bool = False     # 포장 구성(타입+재질 집합)이 packages와 정확히 같은 문서만
+    specific_gravity_tolerance: float = Field(0.0, ge=0)  # 비중 허용 오차 (lab_info 비중 범위를 양쪽으로 확장)
+    capacity_tolerance: float = Field(0.0, ge=0)          # 적정용량 허용 오차 (ml 또는 g)
+    passed_tests: List[str] = []        # 적합 판정 기록이 있는 실험 코드 (예: ["TMM202"], 모두 만족해야 함)
+    failed_tests: List[str] = []        # 부적합 판정 기록이 있는 실험 코드
+    measurements: Dict[MeasurementField, NumericRange] = {}  # 수치 범위 조건 (예: {"inner_diameter_mm": {"gte": 17, "lte": 18}})
+    sort: SearchSort = "relevance"      # 정렬 (recent는 track_total_hits 제한 시 조기 종료로 빠름)
+    size: int = Field(20, ge=1, le=100) # 페이지 크기
+    cursor: str | None = None           # 다음 페이지 토큰 (이전 응답의 next_cursor)
+    track_total_hits: bool | int = 10000  # 전체 건수 집계 (True: 정확히, 숫자: 집계 상한, False: 생략)
 
 class SearchResponse(BaseModel):
-    results: List[Document]
+    results: List[Union[Document, DocumentSummary]]
     total: int
+    total_relation: Literal["eq", "gte"] = "eq"  # gte: 실제 건수가 total 이상
+    next_cursor: str | None = None               # 다음 페이지 토큰 (마지막 페이지면 None)
+
+# 배치 검색 요청 수 상한 (비교 화면의 후보 포장 조합 수)
+BATCH_SEARCH_MAX_REQUESTS = 50
+
+class BatchSearchRequest(BaseModel):
+    requests: List[SearchRequest] = Field(..., min_length=1, max_length=BATCH_SEARCH_MAX_REQUESTS)
+
+class BatchSearchItem(BaseModel):
+    result: SearchResponse | None = None  # 성공한 요청의 첫 페이지 결과
+    error: str | None = None              # 실패한 요청의 오류 (다른 요청 결과에는 영향 없음)
+
+class BatchSearchResponse(BaseModel):
+    responses: List[BatchSearchItem]      # requests와 같은 순서
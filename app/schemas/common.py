@@ -1,5 +1,11 @@
 from pydantic import BaseModel
-from typing import List, Optional
+from pydantic.fields import FieldInfo
+from typing import List, Optional, get_args
+
+def nested_model(field: FieldInfo) -> Optional[type]:
+    """List[하위 모델] 필드의 하위 모델 (packing_info → PackingInfo), 하위 모델 목록이 아니면 None"""
+    args = get_args(field.annotation)
+    return args[0] if args and isinstance(args[0], type) and issubclass(args[0], BaseModel) else None
 
 class PackingInfo(BaseModel):
     type: str
@@ -43,3 +49,17 @@ class Document(BaseModel):
     special_notes: List[SpecialNote]
     download_url: str
 
+
+class DocumentSummary(BaseModel):
+    """검색 결과 목록 화면용 경량 문서 모델 (상세 필드 제외)"""
+    document_id: str
+    summary: str
+    file_name: str
+    test_no: Optional[str] = None
+    product_name: Optional[str] = None
+    customer: Optional[str] = None
+    test_date: Optional[str] = None
+    packing_info: List[PackingInfo]
+    lab_id: Optional[str] = None
+    optimum_capacity : Optional[str] = None
+    download_url: str
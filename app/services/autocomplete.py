@@ -0,0 +1,272 @@
+"""
+포장 타입/재질/업체 자동완성 (메모리 prefix 인덱스)
+
+키 입력마다 ES fuzzy 쿼리를 보내지 않도록 distinct 값과 사용 횟수(포장 항목 수)를 메모리에 두고
+정렬 배열 + 이진 탐색(bisect)으로 prefix 검색
+- 키: keyword_normalizer와 같은 정규화(공백/대소문자/전각 무시) 후 한글을 자모로 분해
+  ("펌ㅌ", "펌텍" 입력 중 "펌테" / "펌텍"이 모두 "펌텍코리아"와 일치, 겹받침/겹모음도 분해)
+- 같은 정규화 값의 여러 표기는 가장 많이 쓰인 표기로 표시
+- 구축: 앱 시작 시 nested terms 집계로 백그라운드 구축,
+  AUTOCOMPLETE_REFRESH_INTERVAL > 0이면 주기적으로 다시 구축 (다른 프로세스의 적재 반영)
+- 갱신: 같은 프로세스의 upsert_ct_documents 적재 결과를 apply_document_change로 즉시 반영
+  (start 시 적재 모듈의 포장 정보 변경 구독자로 등록)
+"""
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from bisect import bisect_left, insort
+from collections import Counter
+import heapq
+import logging
+import os
+import threading
+
+from app.elasticsearch.client import get_es_client
+from app.elasticsearch.uploader import add_packing_change_listener, remove_packing_change_listener
+from app.elasticsearch.normalization import normalize_keyword
+
+logger = logging.getLogger("ct_search.autocomplete")
+
+# 자동완성 필드 → 집계 필드 (nested packing_info 안의 원본 표기 keyword)
+AUTOCOMPLETE_FIELDS = {
+    "type": "packing_info.type.raw",
+    "material": "packing_info.material",
+    "company": "packing_info.company.raw",
+}
+# 다시 구축하는 주기 (초, 0이면 시작 시 1회만)
+AUTOCOMPLETE_REFRESH_INTERVAL = float(os.getenv("AUTOCOMPLETE_REFRESH_INTERVAL", "0"))
+# 시작 시 구축 실패(ES 미기동 등) 후 재시도 간격 (초)
+AUTOCOMPLETE_RETRY_INTERVAL = 30.0
+# 집계할 최대 distinct 값 수
+AUTOCOMPLETE_MAX_TERMS = int(os.getenv("AUTOCOMPLETE_MAX_TERMS", "50000"))
+# 상위 값을 미리 계산해 두는 짧은 prefix 길이 (자모 수, 빈 입력 포함) / prefix별 상위 값 수 (API limit 상한)
+# (빈 입력, 자모 1~2개 입력은 일치 범위가 전체에 가까워 매번 범위 전체를 훑지 않도록)
+SHORT_PREFIX_LENGTH = 2
+SHORT_PREFIX_TOP_K = 50
+
+_CHOSEONG = "ㄱㄲㄴㄷㄸㄹㅁㅂㅃㅅㅆㅇㅈㅉㅊㅋㅌㅍㅎ"
+_JUNGSEONG = "ㅏㅐㅑㅒㅓㅔㅕㅖㅗㅘㅙㅚㅛㅜㅝㅞㅟㅠㅡㅢㅣ"
+_JONGSEONG = "\0ㄱㄲㄳㄴㄵㄶㄷㄹㄺㄻㄼㄽㄾㄿㅀㅁㅂㅄㅅㅆㅇㅈㅊㅋㅌㅍㅎ"
+# 겹모음/겹받침 → 입력 순서대로 분해 (입력 중 "고" → "과"처럼 완성 전 상태도 prefix로 일치)
+_COMPOUND_JAMO = {
+    "ㅘ": "ㅗㅏ", "ㅙ": "ㅗㅐ", "ㅚ": "ㅗㅣ", "ㅝ": "ㅜㅓ", "ㅞ": "ㅜㅔ", "ㅟ": "ㅜㅣ", "ㅢ": "ㅡㅣ",
+    "ㄳ": "ㄱㅅ", "ㄵ": "ㄴㅈ", "ㄶ": "ㄴㅎ", "ㄺ": "ㄹㄱ", "ㄻ": "ㄹㅁ", "ㄼ": "ㄹㅂ", "ㄽ": "ㄹㅅ",
+    "ㄾ": "ㄹㅌ", "ㄿ": "ㄹㅍ", "ㅀ": "ㄹㅎ", "ㅄ": "ㅂㅅ",
+}
+_HANGUL_BASE, _HANGUL_LAST = 0xAC00, 0xD7A3
+
+def to_jamo(text: str) -> str:
+    """한글 음절을 자모(호환 자모)로 분해, 겹모음/겹받침도 분해 (한글 외 문자는 그대로)"""
+    out = []
+    for char in text:
+        code = ord(char)
+        if _HANGUL_BASE <= code <= _HANGUL_LAST:
+            offset = code - _HANGUL_BASE
+            out.append(_CHOSEONG[offset // 588])
+            out.append(_COMPOUND_JAMO.get(_JUNGSEONG[offset % 588 // 28], _JUNGSEONG[offset % 588 // 28]))
+            if offset % 28:
+                out.append(_COMPOUND_JAMO.get(_JONGSEONG[offset % 28], _JONGSEONG[offset % 28]))
+        else:
+            out.append(_COMPOUND_JAMO.get(char, char))
+    return "".join(out)
+
+def autocomplete_key(value: Any) -> Optional[str]:
+    """prefix 비교 키 (정규화 + 자모 분해)"""
+    normalized = normalize_keyword(value)
+    return to_jamo(normalized) if normalized else None
+
+class PrefixIndex:
+    """
+    필드 1개의 distinct 값 prefix 인덱스 (정렬된 (키, 정규화 값) 배열 + 사용 횟수)
+    SHORT_PREFIX_LENGTH 이하 prefix는 상위 SHORT_PREFIX_TOP_K개를 미리 계산해 두고 add에서 갱신
+    (상위 목록 안의 값이 줄어들면 밖의 값이 올라올 수 있으므로 다음 조회 때 그 prefix만 다시 계산)
+    """
+    def __init__(self, counts: Dict[str, int] = None):
+        self._lock = threading.Lock()
+        self._entries: List[Tuple[str, str]] = []
+        self._counts: Dict[str, int] = {}
+        self._surfaces: Dict[str, Counter] = {}
+        # 짧은 prefix 키 → 사용 횟수 내림차순 상위 정규화 값, 다시 계산할 prefix 키
+        self._short_top: Dict[str, List[str]] = {}
+        self._stale_prefixes = set()
+        entries = set()
+        for value, count in (counts or {}).items():
+            normalized = normalize_keyword(value)
+            if not normalized:
+                continue
+            entries.add((to_jamo(normalized), normalized))
+            self._counts[normalized] = self._counts.get(normalized, 0) + count
+            self._surfaces.setdefault(normalized, Counter())[value] += count
+        self._entries = sorted(entries)
+        candidates: Dict[str, List[str]] = {}
+        for key, normalized in self._entries:
+            if self._counts[normalized] > 0:
+                for length in range(min(len(key), SHORT_PREFIX_LENGTH) + 1):
+                    candidates.setdefault(key[:length], []).append(normalized)
+        self._short_top = {prefix: self._top(values, SHORT_PREFIX_TOP_K) for prefix, values in candidates.items()}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _rank(self, normalized: str) -> Tuple[int, str]:
+        return self._counts[normalized], normalized
+
+    def _top(self, candidates: Iterable[str], limit: int) -> List[str]:
+        # 적재 갱신으로 사용 횟수가 0이 된 값은 제외
+        return heapq.nlargest(limit, (n for n in candidates if self._counts.get(n, 0) > 0), key=self._rank)
+
+    def _range(self, key: str) -> Iterable[str]:
+        """키가 key로 시작하는 정규화 값"""
+        entries = self._entries
+        start = bisect_left(entries, (key,))
+        end = bisect_left(entries, (key + "\uffff",), lo=start)
+        return (normalized for _, normalized in entries[start:end])
+
+    def _update_short_top(self, key: str, normalized: str, delta: int):
+        """값 1개의 사용 횟수 변경을 짧은 prefix 상위 목록에 반영 (lock 보유 상태에서 호출)"""
+        for length in range(min(len(key), SHORT_PREFIX_LENGTH) + 1):
+            prefix = key[:length]
+            if prefix in self._stale_prefixes:
+                continue
+            top = self._short_top.setdefault(prefix, [])
+            if normalized in top:
+                if delta < 0:
+                    self._stale_prefixes.add(prefix)
+                else:
+                    top.sort(key=self._rank, reverse=True)
+            elif self._counts[normalized] > 0 and (
+                    len(top) < SHORT_PREFIX_TOP_K or self._rank(normalized) > self._rank(top[-1])):
+                top.append(normalized)
+                top.sort(key=self._rank, reverse=True)
+                del top[SHORT_PREFIX_TOP_K:]
+
+    def add(self, value: Any, delta: int = 1):
+        """값의 사용 횟수 증감 (새 값이면 배열에 삽입, 0 이하가 되면 배열에는 남기고 추천에서 제외)"""
+        normalized = normalize_keyword(value)
+        if not normalized:
+            return
+        with self._lock:
+            if normalized not in self._counts:
+                insort(self._entries, (to_jamo(normalized), normalized))
+                self._counts[normalized] = 0
+                self._surfaces[normalized] = Counter()
+            self._counts[normalized] += delta
+            self._surfaces[normalized][value] += delta
+            self._update_short_top(to_jamo(normalized), normalized, delta)
+
+    def display(self, normalized: str) -> str:
+        surfaces = self._surfaces.get(normalized)
+        return surfaces.most_common(1)[0][0] if surfaces else normalized
+
+    def suggest(self, prefix: str, limit: int = 10) -> List[Dict[str, Any]]:
+        """prefix로 시작하는 값을 사용 횟수 내림차순으로 (빈 입력이면 전체 상위)"""
+        key = autocomplete_key(prefix) or ""
+        if len(key) <= SHORT_PREFIX_LENGTH and limit <= SHORT_PREFIX_TOP_K:
+            with self._lock:
+                if key in self._stale_prefixes:
+                    self._short_top[key] = self._top(self._range(key), SHORT_PREFIX_TOP_K)
+                    self._stale_prefixes.discard(key)
+                top = self._short_top.get(key, [])[:limit]
+        else:
+            top = self._top(self._range(key), limit)
+        counts = self._counts
+        return [{"value": self.display(normalized), "count": counts[normalized]} for normalized in top]
+
+def fetch_value_counts(es, index_name: str, size: int = AUTOCOMPLETE_MAX_TERMS) -> Dict[str, Dict[str, int]]:
+    """필드별 {원본 표기: 포장 항목 수} (nested terms 집계 1회)"""
+    response = es.search(index=index_name, size=0, aggs={
+        "packing": {
+            "nested": {"path": "packing_info"},
+            "aggs": {
+                name: {"terms": {"field": field, "size": size}}
+                for name, field in AUTOCOMPLETE_FIELDS.items()
+            }
+        }
+    })
+    packing = response["aggregations"]["packing"]
+    return {
+        name: {bucket["key"]: bucket["doc_count"] for bucket in packing[name]["buckets"]}
+        for name in AUTOCOMPLETE_FIELDS
+    }
+
+class AutocompleteIndex:
+    """
+    포장 타입/재질/업체 prefix 인덱스 묶음 (구축 시 필드별 인덱스를 통째로 교체)
+    구축 중(집계 ~ 교체) 적재된 변경은 기록해 두었다가 새 인덱스에 다시 반영
+    (집계에 이미 포함된 변경은 두 번 반영될 수 있으나 사용 횟수는 정렬용이므로 다음 구축 때 바로잡힘)
+    """
+    def __init__(self, index_name: str = "ct_documents", refresh_interval: float = AUTOCOMPLETE_REFRESH_INTERVAL):
+        self.index_name = index_name
+        self.refresh_interval = refresh_interval
+        self.indexes: Dict[str, PrefixIndex] = {name: PrefixIndex() for name in AUTOCOMPLETE_FIELDS}
+        self.built = False
+        # 교체와 변경 반영을 직렬화, 구축 중 변경 기록 (구축 중이 아니면 None)
+        self._lock = threading.Lock()
+        self._pending_changes: Optional[List[Tuple[Any, Any]]] = None
+        self._stop = threading.Event()
+        self._thread = None
+
+    def build(self, es=None):
+        """집계로 전체 다시 구축"""
+        with self._lock:
+            self._pending_changes = []
+        try:
+            counts = fetch_value_counts(es or get_es_client(), self.index_name)
+            indexes = {name: PrefixIndex(counts[name]) for name in AUTOCOMPLETE_FIELDS}
+            with self._lock:
+                for new_packing, old_packing in self._pending_changes:
+                    self._apply(indexes, new_packing, old_packing)
+                self.indexes = indexes
+                self.built = True
+        finally:
+            with self._lock:
+                self._pending_changes = None
+        logger.info("자동완성 인덱스 구축: %s", {name: len(index) for name, index in self.indexes.items()})
+
+    def suggest(self, field: str, prefix: str, limit: int = 10) -> List[Dict[str, Any]]:
+        return self.indexes[field].suggest(prefix, limit)
+
+    def apply_document_change(self, new_packing: Optional[Iterable[Dict[str, Any]]],
+                              old_packing: Optional[Iterable[Dict[str, Any]]] = None):
+        """적재된 문서 1건의 포장 정보 변경 반영 (새 포장 항목 값 +1, 이전 포장 항목 값 -1)"""
+        with self._lock:
+            if self._pending_changes is not None:
+                self._pending_changes.append((new_packing, old_packing))
+            if self.built:
+                self._apply(self.indexes, new_packing, old_packing)
+
+    @staticmethod
+    def _apply(indexes: Dict[str, PrefixIndex], new_packing, old_packing):
+        for name in AUTOCOMPLETE_FIELDS:
+            delta = Counter(pack.get(name) for pack in new_packing or [] if pack.get(name))
+            delta.subtract(pack.get(name) for pack in old_packing or [] if pack.get(name))
+            for value, change in delta.items():
+                if change:
+                    indexes[name].add(value, change)
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                self.build()
+            except Exception as e:
+                logger.warning("자동완성 인덱스 구축 오류: %s", e)
+            if self.built and self.refresh_interval <= 0:
+                return
+            self._stop.wait(self.refresh_interval if self.built else AUTOCOMPLETE_RETRY_INTERVAL)
+
+    def start(self):
+        """백그라운드 구축 시작 (앱 시작을 막지 않음, 구축 전 요청은 빈 결과)"""
+        if self._thread is not None:
+            return
+        add_packing_change_listener(self.apply_document_change)
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="autocomplete-index", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        remove_packing_change_listener(self.apply_document_change)
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+# 전역 인스턴스 (앱 시작 시 구축)
+autocomplete_index = AutocompleteIndex()
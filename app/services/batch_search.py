@@ -0,0 +1,171 @@
+"""
+배치 검색 (비교 화면의 여러 SearchRequest를 한 번에 실행)
+
+요청마다 /api/search를 따로 호출하면 쿼리 임베딩 생성, 의미기반 사전 검색, 본 검색이
+요청 수만큼 왕복하므로 단계별로 모아서 실행
+1) special_note 쿼리 임베딩: 요청 간 중복 제거 후 배치 API 1회 (embedding_service.get_query_embeddings)
+2) 의미기반 사전 검색: 서로 다른 special_note마다 1건씩 _msearch 1회
+3) 본 검색: 모든 요청의 쿼리를 _msearch 1회
+- 응답은 요청 순서대로, 한 요청의 실패(잘못된 cursor, ES 오류)는 그 요청의 error에만 기록
+- 첫 페이지 전용: PIT를 열지 않으므로 cursor 요청은 오류, next_cursor는 항상 None
+  (다음 페이지는 개별 /api/search 사용)
+"""
+from typing import Any, Dict, List, Optional
+import logging
+
+from app.elasticsearch.client import get_es_client
+from app.elasticsearch.partitions import search_index_for_range
+from app.observability.metrics import stage
+from app.observability.tracing import traced_msearch
+from app.schemas.api.search import SearchRequest, BatchSearchResponse
+from app.services.ct_document_search import (
+    build_semantic_notes_query, format_semantic_hits, build_multiple_packing_sets_query
+)
+from app.services.embedding_service import embedding_service
+from app.services.pagination import SORT_MODES, RELEVANCE_SORT
+from app.services.search_service import (
+    TRUST_INDEX_SOURCE, build_packing_spec_list, build_measurement_ranges, build_search_response
+)
+
+logger = logging.getLogger("ct_search.batch_search")
+
+# 의미기반 사전 검색 상위 문서 수 (semantic_search_special_notes 기본값과 동일)
+SEMANTIC_PRESEARCH_TOP_K = 10
+
+def _error_message(response: Dict[str, Any]) -> str:
+    """msearch 개별 응답의 오류 → 문자열"""
+    error = response.get("error")
+    if isinstance(error, dict):
+        return error.get("reason") or error.get("type") or str(error)
+    return str(error)
+
+def _item(result=None, error: str = None) -> Dict[str, Any]:
+    """BatchSearchItem 구조의 dict (trusted면 모델 검증 없이 그대로 직렬화)"""
+    return {"result": result, "error": error}
+
+def semantic_presearch_batch(es, index_name: str, special_notes: List[str],
+                             threshold: float = 0.7) -> Dict[str, List[str]]:
+    """
+    special_note별 의미기반 사전 검색 결과 문서 ID (임베딩 1회 + _msearch 1회)
+    임베딩 실패 / 검색 오류인 노트는 빈 목록 (개별 검색과 같이 special_note 조건 없이 검색)
+    """
+    notes = list(dict.fromkeys(note for note in special_notes if note))
+    if not notes:
+        return {}
+    with stage("embedding"):
+        embeddings = embedding_service.get_query_embeddings(notes)
+
+    searchable = [note for note in notes if embeddings.get(note)]
+    doc_ids = {note: [] for note in notes}
+    if not searchable:
+        logger.warning("쿼리 임베딩 생성 실패")
+        return doc_ids
+
+    searches = []
+    for note in searchable:
+        searches.append({"index": index_name})
+        searches.append(build_semantic_notes_query(embeddings[note], SEMANTIC_PRESEARCH_TOP_K, view="ids"))
+    try:
+        with stage("semantic_presearch"):
+            response = traced_msearch(es, "의미기반 배치 검색", searches)
+    except Exception as e:
+        logger.error("의미기반 배치 검색 오류: %s", e)
+        return doc_ids
+
+    for note, item in zip(searchable, response["responses"]):
+        if "error" in item:
+            logger.error("의미기반 검색 오류: %s", _error_message(item))
+            continue
+        doc_ids[note] = [hit['_id'] for hit in format_semantic_hits(item, threshold)['hits']['hits']]
+    return doc_ids
+
+def build_batch_search_body(input: SearchRequest, index_name: str, semantic_doc_ids: Optional[List[str]],
+                            use_semantic_search: bool = True, semantic_threshold: float = 0.7) -> Dict[str, Any]:
+    """SearchRequest 1건의 첫 페이지 검색 본문 (PIT 없이, /api/search 첫 페이지와 같은 정렬)"""
+    body = build_multiple_packing_sets_query(
+        index_name,
+        build_packing_spec_list(input),
+        input.lab_id,
+        input.lab_info,
+        input.optimum_capacity,
+        input.special_note,
+        input.test_date_start,
+        input.test_date_end,
+        use_semantic_search,
+        semantic_threshold,
+        view=input.view,
+        exact_packing_set=input.exact_packing_set,
+        measurements=build_measurement_ranges(input),
+        specific_gravity_tolerance=input.specific_gravity_tolerance,
+        capacity_tolerance=input.capacity_tolerance,
+        passed_tests=input.passed_tests,
+        failed_tests=input.failed_tests,
+        # 사전 검색을 이미 실행했으므로 빈 목록이라도 다시 검색하지 않음
+        semantic_doc_ids=semantic_doc_ids or []
+    )
+    body["sort"] = SORT_MODES.get(input.sort, RELEVANCE_SORT)
+    body["size"] = input.size
+    body["track_total_hits"] = input.track_total_hits
+    return body
+
+def search_ct_documents_batch(requests: List[SearchRequest], use_semantic_search: bool = True,
+                              semantic_threshold: float = 0.7, index_name: str = "ct_documents",
+                              trusted: bool = TRUST_INDEX_SOURCE):
+    """
+    여러 SearchRequest 첫 페이지 검색 (요청 순서대로 결과 또는 오류)
+    trusted=True면 모델 검증 없이 BatchSearchResponse 구조의 dict를 반환 (응답 직렬화 전용, get_ct_document_page와 동일)
+    """
+    es = get_es_client()
+    items: List[Optional[Dict[str, Any]]] = [None] * len(requests)
+
+    semantic_notes = [r.special_note for r in requests if r.special_note and not r.cursor] if use_semantic_search else []
+    semantic_doc_ids = semantic_presearch_batch(es, index_name, semantic_notes, semantic_threshold)
+
+    searches, positions = [], []
+    for position, request in enumerate(requests):
+        if request.cursor:
+            items[position] = _item(error="배치 검색은 첫 페이지만 지원합니다. 다음 페이지는 /api/search로 요청하세요.")
+            continue
+        try:
+            target_index = search_index_for_range(index_name, request.test_date_start, request.test_date_end, es=es)
+            body = build_batch_search_body(
+                request, target_index, semantic_doc_ids.get(request.special_note),
+                use_semantic_search, semantic_threshold
+            )
+        except Exception as e:
+            logger.error("배치 검색 쿼리 생성 오류: %s", e)
+            items[position] = _item(error=str(e))
+            continue
+        searches.append({"index": target_index})
+        searches.append(body)
+        positions.append(position)
+
+    if searches:
+        try:
+            with stage("es_query"):
+                response = traced_msearch(es, "여러 포장 정보 세트 배치 검색", searches)
+            results = response["responses"]
+        except Exception as e:
+            logger.error("여러 포장 정보 세트 배치 검색 오류: %s", e)
+            results = [{"error": str(e)}] * len(positions)
+
+        for position, result in zip(positions, results):
+            if "error" in result:
+                items[position] = _item(error=_error_message(result))
+                continue
+            hits = result["hits"]["hits"]
+            page = {
+                'hits': {
+                    'total': result["hits"].get("total") or {"value": len(hits), "relation": "gte"},
+                    'hits': hits
+                },
+                'next_cursor': None
+            }
+            try:
+                items[position] = _item(result=build_search_response(requests[position], page, trusted))
+            except Exception as e:
+                logger.error("배치 검색 결과 변환 오류: %s", e)
+                items[position] = _item(error=str(e))
+
+    response = {"responses": items}
+    return response if trusted else BatchSearchResponse.model_validate(response)
@@ -1,24 +1,89 @@
 from app.elasticsearch.client import get_es_client
 from app.services.embedding_service import embedding_service
+from app.schemas.common import Document, DocumentSummary, nested_model
+from app.services.pagination import search_page, decode_cursor, DEFAULT_PAGE_SIZE, DEFAULT_TRACK_TOTAL_HITS, SORT_MODES
+from app.observability.tracing import traced_search
+from app.observability.metrics import stage
+from app.elasticsearch.normalization import packing_signature, packing_set_hash
+from app.elasticsearch.partitions import search_index_for_range
+from app.elasticsearch.entities import company_id, material_id, lookup_entity
+from app.elasticsearch.extraction import parse_specific_gravity, strip_specific_gravity, parse_capacity, test_outcome
 from typing import Dict, Any, List
-import json
+import logging
 
-es = get_es_client()
+logger = logging.getLogger("ct_search.service")
 
-def full_text_search_ct_documents(index_name: str, search_text: str):
-    """전체 텍스트 검색"""
+def model_source_fields(model) -> List[str]:
+    """
+    응답 모델 필드 → _source includes 경로 (하위 모델 목록은 "packing_info.type"처럼 펼침)
+    색인 시 추가한 검색 전용 파생 필드(search_text, 임베딩, measurements, 정규 ID, 시그니처 등)는 제외됨
+    """
+    fields = []
+    for name, field in model.model_fields.items():
+        nested = nested_model(field)
+        if nested:
+            fields.extend(f"{name}.{sub}" for sub in nested.model_fields)
+        else:
+            fields.append(name)
+    return fields
+
+# 조회 형태별 _source 필터 (응답 모델에 있는 필드만)
+# - summary: 목록 화면에 필요한 필드만 (DocumentSummary 기준)
+# - detail: 전체 문서 필드 (Document 기준)
+# - ids: 문서 ID만 필요한 내부 검색 (예: 의미기반 사전 검색)
+SOURCE_FILTERS = {
+    "summary": {"includes": model_source_fields(DocumentSummary)},
+    "detail": {"includes": model_source_fields(Document)},
+    "ids": False,
+}
+
+def get_source_filter(view: str = "detail"):
+    """조회 형태(view)에 해당하는 _source includes/excludes 설정 반환"""
+    return SOURCE_FILTERS.get(view, SOURCE_FILTERS["detail"])
+
+# 전체 텍스트 검색에서 업체/재질 정규 ID가 일치하는 문서에 더하는 가중치
+ENTITY_MATCH_BOOST = 2.0
+
+def entity_boost_clauses(search_text: str) -> List[Dict[str, Any]]:
+    """
+    검색어 중 업체/재질 사전에 등록된 단어 → company_ids / material_ids term 목록 (should 전용)
+    표기가 달라도 같은 업체/재질 문서를 찾고 위로 올리되, 필수 조건으로 결과를 좁히지는 않음
+    """
+    clauses = []
+    for token in search_text.split():
+        company = lookup_entity("company", token)
+        material = None if company else lookup_entity("material", token)
+        if company:
+            clauses.append({"term": {"company_ids": {"value": company, "boost": ENTITY_MATCH_BOOST}}})
+        elif material:
+            clauses.append({"term": {"material_ids": {"value": material, "boost": ENTITY_MATCH_BOOST}}})
+    return clauses
+
+def full_text_search_ct_documents(index_name: str, search_text: str, view: str = "detail"):
+    """
+    전체 텍스트 검색
+    검색어 전체 fuzzy multi_match(OR)와 업체/재질 단어의 정규 ID 일치 중 하나 이상 (일치할수록 점수 가산)
+    """
+    should = [{
+        "multi_match": {
+            "query": search_text,
+            "fields": [
+                "product_name^3",
+                "search_text^2", 
+                "lab_info^1.5",
+                "special_notes.*^1"
+            ],
+            "type": "best_fields",
+            "fuzziness": "AUTO"
+        }
+    }]
+    should.extend(entity_boost_clauses(search_text))
     query = {
+        "_source": get_source_filter(view),
         "query": {
-            "multi_match": {
-                "query": search_text,
-                "fields": [
-                    "product_name^3",
-                    "search_text^2", 
-                    "lab_info^1.5",
-                    "special_notes.*^1"
-                ],
-                "type": "best_fields",
-                "fuzziness": "AUTO"
+            "bool": {
+                "should": should,
+                "minimum_should_match": 1
             }
         },
         "highlight": {
@@ -36,15 +101,14 @@ def full_text_search_ct_documents(index_name: str, search_text: str):
         }
     }
     
-    print(f"[쿼리 로그][전체 텍스트 검색]\n{json.dumps(query, ensure_ascii=False, indent=2)}")
     try:
-        response = es.search(index=index_name, body=query)
+        response = traced_search(get_es_client(), "전체 텍스트 검색", query, index=index_name)
         return response
     except Exception as e:
-        print(f"전체 텍스트 검색 오류: {str(e)}")
+        logger.error("전체 텍스트 검색 오류: %s", e)
         return None
 
-def advanced_search_ct_documents(index_name: str, search_params: Dict[str, Any]):
+def advanced_search_ct_documents(index_name: str, search_params: Dict[str, Any], view: str = "detail"):
     """고급 검색 (다중 조건)"""
     must_conditions = []
     filter_conditions = []
@@ -60,33 +124,26 @@ def advanced_search_ct_documents(index_name: str, search_params: Dict[str, Any])
             }
         })
     
-    # 고객사 필터
+    # 고객사 필터 (정규화 keyword 하위 필드로 정확히 일치)
     if search_params.get('customer'):
         filter_conditions.append({
-            "term": {"customer": search_params['customer']}
+            "term": {"customer.norm": search_params['customer']}
         })
     
-    # 테스트 코드 검색
+    # 테스트 코드 필터 (평탄화 keyword, passed 지정 시 해당 판정을 받은 문서만)
     if search_params.get('test_code'):
-        must_conditions.append({
-            "nested": {
-                "path": "experiment_info",
-                "query": {
-                    "term": {"experiment_info.code": search_params['test_code']}
-                }
-            }
-        })
+        if search_params.get('passed') is None:
+            filter_conditions.append({"term": {"test_codes": search_params['test_code']}})
+        else:
+            filter_conditions.append({
+                "term": {"test_outcomes": test_outcome(search_params['test_code'], search_params['passed'])}
+            })
     
-    # 재질 검색
+    # 재질 / 업체 필터 (정규 ID 평탄화 keyword)
     if search_params.get('material'):
-        must_conditions.append({
-            "nested": {
-                "path": "packing_info",
-                "query": {
-                    "match": {"packing_info.material": search_params['material']}
-                }
-            }
-        })
+        filter_conditions.append({"term": {"material_ids": material_id(search_params['material'])}})
+    if search_params.get('company'):
+        filter_conditions.append({"term": {"company_ids": company_id(search_params['company'])}})
     
     # 날짜 범위 필터
     if search_params.get('start_date') or search_params.get('end_date'):
@@ -111,6 +168,7 @@ def advanced_search_ct_documents(index_name: str, search_params: Dict[str, Any])
         })
     
     query = {
+        "_source": get_source_filter(view),
         "query": {
             "bool": {
                 "must": must_conditions,
@@ -128,12 +186,11 @@ def advanced_search_ct_documents(index_name: str, search_params: Dict[str, Any])
         }
     }
     
-    print(f"[쿼리 로그][고급 검색]\n{json.dumps(query, ensure_ascii=False, indent=2)}")
     try:
-        response = es.search(index=index_name, body=query)
+        response = traced_search(get_es_client(), "고급 검색", query, index=index_name)
         return response
     except Exception as e:
-        print(f"고급 검색 오류: {str(e)}")
+        logger.error("고급 검색 오류: %s", e)
         return None
 
 def get_ct_document_statistics(index_name: str):
@@ -166,12 +223,11 @@ def get_ct_document_statistics(index_name: str):
         }
     }
     
-    print(f"[쿼리 로그][통계 조회]\n{json.dumps(query, ensure_ascii=False, indent=2)}")
     try:
-        response = es.search(index=index_name, body=query)
+        response = traced_search(get_es_client(), "통계 조회", query, index=index_name)
         return response
     except Exception as e:
-        print(f"통계 조회 오류: {str(e)}")
+        logger.error("통계 조회 오류: %s", e)
         return None
 
 def print_ct_search_results(response, search_type: str):
@@ -227,128 +283,118 @@ def print_ct_statistics(response):
         for bucket in aggs['date_distribution']['buckets']:
             print(f"  {bucket['key_as_string']}: {bucket['doc_count']}개")
 
-def search_ct_documents_by_packing_info(index_name: str, packing_type: str, material: str, spec: str = None, company: str = None):
+def search_ct_documents_by_packing_info(index_name: str, packing_type: str, material: str, spec: str = None, company: str = None, view: str = "detail"):
     """포장 정보(타입, 재질, 세부사양, 업체)로 CT 문서 검색 (타입, 재질 필수, 세부사양/업체 선택)"""
-    nested_query = {
-        "bool": {
-            "must": [
-                {"term": {"packing_info.type": packing_type}},
-                {"term": {"packing_info.material": material}}
-            ]
-        }
-    }
-    # 세부사양(spec) 조건 추가 (있을 때만)
-    if spec:
-        nested_query["bool"]["must"].append({
-            "match": {"packing_info.spec": spec}
-        })
-    # 포장재업체(company) 조건 추가 (있을 때만)
-    if company:
-        nested_query["bool"]["must"].append({
-            "match": {"packing_info.company": company}
-        })
-
     query = {
-        "query": {
-            "nested": {
-                "path": "packing_info",
-                "query": nested_query
-            }
-        }
+        "_source": get_source_filter(view),
+        "query": build_packing_set_clause({"type": packing_type, "material": material, "spec": spec, "company": company})
     }
-    print(f"[쿼리 로그][포장 정보 검색]\n{json.dumps(query, ensure_ascii=False, indent=2)}")
     try:
-        response = es.search(index=index_name, body=query)
+        response = traced_search(get_es_client(), "포장 정보 검색", query, index=index_name)
         return response
     except Exception as e:
-        print(f"포장 정보 검색 오류: {str(e)}")
+        logger.error("포장 정보 검색 오류: %s", e)
         return None
     
-def semantic_search_special_notes(index_name: str, query_text: str, threshold: float = 0.7, top_k: int = 10):
+def build_semantic_notes_query(query_embedding: List[float], top_k: int = 10, view: str = "detail") -> Dict[str, Any]:
+    """special_notes 임베딩 코사인 유사도 검색 쿼리 (문서별 상위 노트를 inner_hits로 반환)"""
+    return {
+        "_source": get_source_filter(view),
+        "query": {
+            "nested": {
+                "path": "special_notes",
+                "query": {
+                    "script_score": {
+                        "query": {
+                            "exists": {
+                                "field": "special_notes.embedding"
+                            }
+                        },
+                        "script": {
+                            "source": "cosineSimilarity(params.query_vector, 'special_notes.embedding') + 1.0",
+                            "params": {
+                                "query_vector": query_embedding
+                            }
+                        }
+                    }
+                },
+                "inner_hits": {
+                    "size": top_k,
+                    "_source": ["special_notes.key", "special_notes.value"]
+                }
+            }
+        },
+        "size": top_k
+    }
+
+def format_semantic_hits(response, threshold: float = 0.7) -> Dict[str, Any]:
+    """의미기반 검색 응답 → 임계값 이상인 노트별 결과 (하이라이트에 노트 내용)"""
+    formatted_results = []
+    for hit in response['hits']['hits']:
+        source = hit.get('_source', {})
+
+        # inner_hits에서 special_notes 결과 추출
+        if 'inner_hits' in hit and 'special_notes' in hit['inner_hits']:
+            for inner_hit in hit['inner_hits']['special_notes']['hits']['hits']:
+                inner_score = inner_hit['_score']
+                if inner_score >= threshold:
+                    note = inner_hit['_source']
+                    formatted_results.append({
+                        '_id': hit['_id'],
+                        '_score': inner_score,
+                        '_source': source,
+                        'highlight': {
+                            'special_notes.value': [note['value']],
+                            'special_notes.key': [note.get('key', '')]
+                        }
+                    })
+    return {
+        'hits': {
+            'total': {'value': len(formatted_results)},
+            'hits': formatted_results
+        }
+    }
+
+def semantic_search_special_notes(index_name: str, query_text: str, threshold: float = 0.7, top_k: int = 10, view: str = "detail"):
     """special_notes의 의미기반 검색 (Elasticsearch dense_vector 사용)"""
     try:
         # 쿼리 텍스트의 임베딩 생성
-        query_embedding = embedding_service.get_embedding(query_text)
+        with stage("embedding"):
+            query_embedding = embedding_service.get_embedding(query_text)
         if not query_embedding:
-            print("쿼리 임베딩 생성 실패")
+            logger.warning("쿼리 임베딩 생성 실패")
             return None
         
-        print(f"의미기반 검색 시작: '{query_text}' (임계값: {threshold})")
+        logger.debug("의미기반 검색 시작: '%s' (임계값: %s)", query_text, threshold)
         
         # Elasticsearch의 dense_vector 검색 쿼리
-        query = {
-            "query": {
-                "nested": {
-                    "path": "special_notes",
-                    "query": {
-                        "script_score": {
-                            "query": {
-                                "exists": {
-                                    "field": "special_notes.embedding"
-                                }
-                            },
-                            "script": {
-                                "source": "cosineSimilarity(params.query_vector, 'special_notes.embedding') + 1.0",
-                                "params": {
-                                    "query_vector": query_embedding
-                                }
-                            }
-                        }
-                    },
-                    "inner_hits": {
-                        "size": top_k,
-                        "_source": ["special_notes.key", "special_notes.value"]
-                    }
-                }
-            },
-            "size": top_k
-        }
-        
-        print(f"[쿼리 로그][의미기반 검색]\n{json.dumps(query, ensure_ascii=False, indent=2)}")
-        
-        response = es.search(index=index_name, body=query)
+        query = build_semantic_notes_query(query_embedding, top_k, view)
+        response = traced_search(get_es_client(), "의미기반 검색", query, index=index_name)
         
         # 결과 처리
-        formatted_results = []
-        for hit in response['hits']['hits']:
-            source = hit['_source']
-            score = hit['_score']
-            
-            # inner_hits에서 special_notes 결과 추출
-            if 'inner_hits' in hit and 'special_notes' in hit['inner_hits']:
-                for inner_hit in hit['inner_hits']['special_notes']['hits']['hits']:
-                    inner_score = inner_hit['_score']
-                    if inner_score >= threshold:
-                        note = inner_hit['_source']
-                        formatted_results.append({
-                            '_id': hit['_id'],
-                            '_score': inner_score,
-                            '_source': source,
-                            'highlight': {
-                                'special_notes.value': [note['value']],
-                                'special_notes.key': [note.get('key', '')]
-                            }
-                        })
-        
-        print(f"의미기반 검색 완료: {len(formatted_results)}개 결과")
-        
-        return {
-            'hits': {
-                'total': {'value': len(formatted_results)},
-                'hits': formatted_results
-            }
-        }
+        results = format_semantic_hits(response, threshold)
+        logger.debug("의미기반 검색 완료: %d개 결과", len(results['hits']['hits']))
+        return results
         
     except Exception as e:
-        print(f"의미기반 검색 오류: {str(e)}")
+        logger.error("의미기반 검색 오류: %s", e)
         return None
 
+def semantic_presearch_ids(index_name: str, special_note: str, semantic_threshold: float = 0.7) -> List[str]:
+    """의미기반 사전 검색 결과 문서 ID (실패 시 빈 목록: special_note 조건 없이 검색)"""
+    with stage("semantic_presearch"):
+        semantic_results = semantic_search_special_notes(index_name, special_note, semantic_threshold, view="ids")
+    if not semantic_results:
+        return []
+    return [hit['_id'] for hit in semantic_results['hits']['hits']]
+
 def hybrid_search_special_notes(index_name: str, query_text: str, 
                               text_boost: float = 1.0, semantic_boost: float = 2.0,
-                              threshold: float = 0.7):
+                              threshold: float = 0.7, view: str = "detail"):
     """하이브리드 검색 (텍스트 검색 + 의미기반 검색)"""
     # 텍스트 기반 검색
     text_query = {
+        "_source": get_source_filter(view),
         "query": {
             "nested": {
                 "path": "special_notes",
@@ -377,8 +423,8 @@ def hybrid_search_special_notes(index_name: str, query_text: str,
     }
     
     try:
-        text_response = es.search(index=index_name, body=text_query)
-        semantic_response = semantic_search_special_notes(index_name, query_text, threshold)
+        text_response = traced_search(get_es_client(), "하이브리드 텍스트 검색", text_query, index=index_name)
+        semantic_response = semantic_search_special_notes(index_name, query_text, threshold, view=view)
         
         # 결과 병합
         combined_hits = []
@@ -406,10 +452,90 @@ def hybrid_search_special_notes(index_name: str, query_text: str,
         }
         
     except Exception as e:
-        print(f"하이브리드 검색 오류: {str(e)}")
+        logger.error("하이브리드 검색 오류: %s", e)
         return None
 
-def search_ct_documents_by_multiple_packing_sets(
+def build_packing_set_clause(packing: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    포장 정보 세트 1개의 검색 조건
+    - 타입+재질(+업체) 조합: 평탄화된 시그니처(packing_type_material[_company]) term filter (nested 조인 없음)
+      재질/업체는 정규 ID로 변환되므로 "펌텍" / "펌텍코리아" / "Pumtech"가 같은 조건
+    - 세부사양: 자유 입력 텍스트라 nested match로 같은 포장 항목 안에서 확인
+    - 타입/재질 중 하나만 있으면 시그니처를 쓸 수 없으므로 nested term filter
+    """
+    signature = packing_signature(packing.get("type"), packing.get("material"))
+    company = company_id(packing.get("company"))
+    material = material_id(packing.get("material"))
+    if signature and company:
+        signature_filter = {"term": {"packing_type_material_company": packing_signature(
+            packing["type"], packing["material"], packing["company"])}}
+    else:
+        signature_filter = {"term": {"packing_type_material": signature}}
+    if signature and not packing.get("spec"):
+        return {"bool": {"filter": [signature_filter]}}
+
+    # 타입/재질/업체: 정확히 일치 (filter, .norm 하위 필드 / 정규 ID)
+    # 세부사양: 관련도 점수가 필요한 match (must)
+    nested_filter = []
+    nested_must = []
+    if packing.get("type"):
+        nested_filter.append({"term": {"packing_info.type.norm": packing["type"]}})
+    if material:
+        nested_filter.append({"term": {"packing_info.material_id": material}})
+    if company:
+        nested_filter.append({"term": {"packing_info.company_id": company}})
+    if packing.get("spec"):
+        nested_must.append({"match": {"packing_info.spec": packing["spec"]}})
+    nested_bool = {"filter": nested_filter}
+    if nested_must:
+        nested_bool["must"] = nested_must
+    nested_query = {
+        "nested": {
+            "path": "packing_info",
+            "query": {
+                "bool": nested_bool
+            }
+        }
+    }
+    if not signature:
+        return nested_query
+
+    # 조합 시그니처 filter로 후보를 먼저 좁힌 뒤 nested 조건 확인
+    return {
+        "bool": {
+            "filter": [signature_filter],
+            "must": [nested_query]
+        }
+    }
+
+def build_measurement_filters(measurements: Dict[str, Dict[str, float]]) -> List[Dict[str, Any]]:
+    """수치 범위 조건 → measurements.* range 필터 (경계가 하나도 없는 조건은 제외)"""
+    filters = []
+    for field, bounds in (measurements or {}).items():
+        bounds = {op: bounds[op] for op in ("gte", "lte") if bounds.get(op) is not None}
+        if bounds:
+            filters.append({"range": {f"measurements.{field}": bounds}})
+    return filters
+
+def build_specific_gravity_filters(lab_info: str, tolerance: float = 0.0) -> List[Dict[str, Any]]:
+    """lab_info의 비중 범위 → 문서 비중 범위와 겹치는지 확인하는 range 필터 (비중 표기가 없으면 빈 목록)"""
+    gravity = parse_specific_gravity(lab_info)
+    if gravity is None:
+        return []
+    return [
+        {"range": {"measurements.specific_gravity_min": {"lte": round(gravity[1] + tolerance, 6)}}},
+        {"range": {"measurements.specific_gravity_max": {"gte": round(gravity[0] - tolerance, 6)}}},
+    ]
+
+def build_capacity_filter(optimum_capacity: str, tolerance: float = 0.0) -> Dict[str, Any] | None:
+    """숫자+단위 적정용량 → capacity_ml / capacity_g range 필터 (자유 텍스트면 None)"""
+    capacity = parse_capacity(optimum_capacity)
+    if capacity is None:
+        return None
+    field, value = capacity
+    return {"range": {f"measurements.{field}": {"gte": round(value - tolerance, 6), "lte": round(value + tolerance, 6)}}}
+
+def build_multiple_packing_sets_query(
         index_name: str, 
         packing_sets: list, 
         lab_id: str = None, 
@@ -419,9 +545,18 @@ def search_ct_documents_by_multiple_packing_sets(
         test_date_start: str = None,
         test_date_end: str = None,
         use_semantic_search: bool = True,
-        semantic_threshold: float = 0.7
-    ):
+        semantic_threshold: float = 0.7,
+        view: str = "detail",
+        exact_packing_set: bool = False,
+        measurements: Dict[str, Dict[str, float]] = None,
+        specific_gravity_tolerance: float = 0.0,
+        capacity_tolerance: float = 0.0,
+        passed_tests: List[str] = None,
+        failed_tests: List[str] = None,
+        semantic_doc_ids: List[str] = None
+    ) -> Dict[str, Any]:
     """
+    여러 포장 정보 세트 검색 쿼리 생성 (검색 실행은 호출 측에서 수행)
     여러 포장 정보 세트 중 하나라도 일치하는 CT 문서 검색 + lab_id로도 검색
     packing_sets: [
         {"type": "튜브", "material": "AS", "company": "건동"},
@@ -429,49 +564,48 @@ def search_ct_documents_by_multiple_packing_sets(
     ]
     lab_id: str (optional)
     use_semantic_search: bool - special_note 검색 시 의미기반 검색 사용 여부
+    view: str - 응답 _source 범위 (summary / detail)
+    exact_packing_set: bool - 문서의 포장 구성(타입+재질 집합)이 packing_sets와 정확히 같은 문서만 검색
+    measurements: {"inner_diameter_mm": {"gte": 17, "lte": 18}, ...} - 추출 수치 범위 조건 (filter)
+    lab_info / optimum_capacity: 비중, 숫자+단위 용량으로 해석되면 range 필터 (허용 오차 적용),
+      해석되지 않는 부분만 텍스트 match
+    passed_tests / failed_tests: 해당 실험 코드가 적합 / 부적합 판정인 문서만 (test_outcomes filter)
+    semantic_doc_ids: 의미기반 사전 검색을 호출 측에서 이미 실행한 경우 그 결과 문서 ID
+      (배치 검색, 다음 페이지 cursor에 저장된 값)
     """
-    should_nested_queries = []
-    for packing in packing_sets:
-        must_conditions = []
-        if packing.get("type"):
-            must_conditions.append({"term": {"packing_info.type": packing["type"]}})
-        if packing.get("material"):
-            must_conditions.append({"term": {"packing_info.material": packing["material"]}})
-        if packing.get("spec"):
-            must_conditions.append({"match": {"packing_info.spec": packing["spec"]}})
-        if packing.get("company"):
-            must_conditions.append({"match": {"packing_info.company": packing["company"]}})
-        if must_conditions:
-            should_nested_queries.append({
-                "nested": {
-                    "path": "packing_info",
-                    "query": {
-                        "bool": {
-                            "must": must_conditions
-                        }
-                    }
-                }
-            })
+    should_packing_queries = [
+        build_packing_set_clause(packing)
+        for packing in packing_sets
+        if any(packing.get(key) for key in ("type", "material", "spec", "company"))
+    ]
     
-    # lab_id 조건 추가
+    # 정확히 일치하는 조건(lab_id, 날짜 범위, 의미기반 사전 검색 결과)은 filter,
+    # 관련도가 필요한 텍스트 조건은 must
     must_queries = []
+    filter_queries = []
     if lab_id:
-        must_queries.append({"term": {"lab_id": lab_id}})
+        filter_queries.append({"term": {"lab_id.norm": lab_id}})
     if lab_info:
-        must_queries.append({"match": {"lab_info": lab_info}})
+        gravity_filters = build_specific_gravity_filters(lab_info, specific_gravity_tolerance)
+        filter_queries.extend(gravity_filters)
+        lab_text = strip_specific_gravity(lab_info) if gravity_filters else lab_info
+        if lab_text:
+            must_queries.append({"match": {"lab_info": lab_text}})
     if optimum_capacity:
-        must_queries.append({"match": {"optimum_capacity": optimum_capacity}})
+        capacity_filter = build_capacity_filter(optimum_capacity, capacity_tolerance)
+        if capacity_filter:
+            filter_queries.append(capacity_filter)
+        else:
+            must_queries.append({"match": {"optimum_capacity": optimum_capacity}})
 
     # special_note 조건 추가 (의미기반 검색 사용 시)
     if special_note and use_semantic_search:
-        # 의미기반 검색을 별도로 수행하고 결과를 필터링 조건으로 사용
-        semantic_results = semantic_search_special_notes(
-            index_name, special_note, semantic_threshold
-        )
-        if semantic_results and semantic_results['hits']['hits']:
+        if semantic_doc_ids is None:
+            # 의미기반 검색을 별도로 수행하고 결과를 필터링 조건으로 사용
+            semantic_doc_ids = semantic_presearch_ids(index_name, special_note, semantic_threshold)
+        if semantic_doc_ids:
             # 의미기반 검색 결과의 문서 ID들을 필터링 조건으로 사용
-            doc_ids = [hit['_id'] for hit in semantic_results['hits']['hits']]
-            must_queries.append({"terms": {"document_id": doc_ids}})
+            filter_queries.append({"terms": {"document_id": semantic_doc_ids}})
     elif special_note:
         # 기존 텍스트 기반 검색
         must_queries.append({
@@ -488,19 +622,30 @@ def search_ct_documents_by_multiple_packing_sets(
         })
 
     # should 조건이 있을 때만 minimum_should_match 추가
+    if test_date_start:
+        filter_queries.append({"range": {"test_date": {"gte": test_date_start}}})
+    if test_date_end:
+        filter_queries.append({"range": {"test_date": {"lte": test_date_end}}})
+    if exact_packing_set:
+        set_hash = packing_set_hash(packing_sets)
+        if set_hash:
+            filter_queries.append({"term": {"packing_set_hash": set_hash}})
+    filter_queries.extend(build_measurement_filters(measurements))
+    for code in passed_tests or []:
+        filter_queries.append({"term": {"test_outcomes": test_outcome(code, True)}})
+    for code in failed_tests or []:
+        filter_queries.append({"term": {"test_outcomes": test_outcome(code, False)}})
+
     bool_query = {
-        "must": must_queries
+        "must": must_queries,
+        "filter": filter_queries
     }
-    if should_nested_queries:
-        bool_query["should"] = should_nested_queries
+    if should_packing_queries:
+        bool_query["should"] = should_packing_queries
         bool_query["minimum_should_match"] = 1
     
-    if test_date_start:
-        bool_query["must"].append({"range": {"test_date": {"gte": test_date_start}}})
-    if test_date_end:
-        bool_query["must"].append({"range": {"test_date": {"lte": test_date_end}}})
-    
     query = {
+        "_source": get_source_filter(view),
         "query": {
             "bool": bool_query
         },
@@ -517,13 +662,65 @@ def search_ct_documents_by_multiple_packing_sets(
             }
         }
     }
-    
-    print(f"[쿼리 로그][여러 포장 정보 세트 검색]\n{json.dumps(query, ensure_ascii=False, indent=2)}")
+    return query
+
+def search_ct_documents_by_multiple_packing_sets(
+        index_name: str, 
+        packing_sets: list, 
+        lab_id: str = None, 
+        lab_info: str = None, 
+        optimum_capacity: str = None, 
+        special_note: str = None,
+        test_date_start: str = None,
+        test_date_end: str = None,
+        use_semantic_search: bool = True,
+        semantic_threshold: float = 0.7,
+        view: str = "detail",
+        exact_packing_set: bool = False,
+        measurements: Dict[str, Dict[str, float]] = None,
+        specific_gravity_tolerance: float = 0.0,
+        capacity_tolerance: float = 0.0,
+        passed_tests: List[str] = None,
+        failed_tests: List[str] = None,
+        size: int = DEFAULT_PAGE_SIZE,
+        cursor: str = None,
+        track_total_hits: bool | int = DEFAULT_TRACK_TOTAL_HITS,
+        sort: str = "relevance"
+    ):
+    """
+    여러 포장 정보 세트 검색을 PIT + search_after 페이지 단위로 실행
+    size: 페이지 크기
+    cursor: 이전 응답의 next_cursor (없으면 첫 페이지, 같은 sort로 요청해야 함)
+    track_total_hits: 전체 건수 집계 방식 (True: 정확한 건수, 숫자: 집계 상한, False: 집계 안 함)
+    sort: relevance(관련도순) / recent(test_date 최신순, 점수 계산 생략)
+    반환: {'hits': {...}, 'next_cursor': str | None}
+    의미기반 사전 검색 결과 문서 ID는 첫 페이지에서 한 번만 구해 cursor에 저장
+    (다음 페이지마다 임베딩/사전 검색을 다시 하지 않고, 페이지 간 필터 조건이 바뀌지 않도록)
+    """
+    state = decode_cursor(cursor) if cursor else None
+    semantic_doc_ids = state.get("semantic_ids") if state else None
+    # 시간 분할 인덱스 사용 시 날짜 범위와 겹치는 분할 인덱스만 검색 (다음 페이지는 cursor의 PIT 사용)
+    if not cursor:
+        index_name = search_index_for_range(index_name, test_date_start, test_date_end)
+    if special_note and use_semantic_search and semantic_doc_ids is None:
+        semantic_doc_ids = semantic_presearch_ids(index_name, special_note, semantic_threshold)
+    query = build_multiple_packing_sets_query(
+        index_name, packing_sets, lab_id, lab_info, optimum_capacity, special_note,
+        test_date_start, test_date_end, use_semantic_search, semantic_threshold, view, exact_packing_set,
+        measurements, specific_gravity_tolerance, capacity_tolerance, passed_tests, failed_tests,
+        semantic_doc_ids
+    )
+    cursor_state = {"semantic_ids": semantic_doc_ids} if semantic_doc_ids is not None else None
     try:
-        response = es.search(index=index_name, body=query)
-        return response
+        with stage("es_query"):
+            return search_page(get_es_client(), index_name, query, size, cursor, track_total_hits,
+                               sort=SORT_MODES.get(sort), name="여러 포장 정보 세트 검색",
+                               cursor_state=cursor_state)
+    except ValueError:
+        # 잘못된 페이지 토큰은 호출 측에서 처리
+        raise
     except Exception as e:
-        print(f"여러 포장 정보 세트 검색 오류: {str(e)}")
+        logger.error("여러 포장 정보 세트 검색 오류: %s", e)
         return None
 
 if __name__ == "__main__":
@@ -1,15 +1,21 @@
 import os
 import json
+import threading
+from collections import OrderedDict
 import requests
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Tuple
+import logging
 import numpy as np
 from dotenv import load_dotenv
 from google.oauth2 import service_account
 from google.auth.transport.requests import Request
 from google.auth import default
+from app.observability.metrics import record_cache
 
 load_dotenv()
 
+logger = logging.getLogger("ct_search.embedding")
+
 # Google Cloud 서비스 계정 키 파일 경로
 SERVICE_ACCOUNT_KEY_PATH = "service-account-key.json"
 
@@ -17,46 +23,86 @@ SERVICE_ACCOUNT_KEY_PATH = "service-account-key.json"
 PROJECT_ID = "lge-vs-genai"
 LOCATION = "us-central1"  # 또는 다른 리전
 
+# 쿼리 임베딩 LRU 캐시 크기 (같은 special_note로 페이지를 넘기거나 반복 검색 시 API 호출 생략, 0이면 비활성화)
+QUERY_EMBEDDING_CACHE_SIZE = int(os.getenv("QUERY_EMBEDDING_CACHE_SIZE", "1024"))
+
+# 임베딩 API 사용 여부 (false면 Google Cloud 인증 없이 더미 임베딩 사용 - 테스트/오프라인 벤치마크용)
+EMBEDDING_API_ENABLED = os.getenv("EMBEDDING_API_ENABLED", "true").lower() == "true"
+
 class EmbeddingService:
-    def __init__(self):
-        # Google Cloud 인증 설정
-        try:
-            self.credentials = service_account.Credentials.from_service_account_file(
-                SERVICE_ACCOUNT_KEY_PATH,
-                scopes=['https://www.googleapis.com/auth/cloud-platform']
-            )
-            
-            # Vertex AI API 엔드포인트
-            self.endpoint_url = f"https://{LOCATION}-aiplatform.googleapis.com/v1/projects/{PROJECT_ID}/locations/{LOCATION}/publishers/google/models/textembedding-gecko@003:predict"
-            
-            # 임베딩 차원
-            self.dimensions = 768  # textembedding-gecko의 임베딩 차원
-            
-            # API 연결 테스트
-            self._test_connection()
-            
-        except Exception as e:
-            print(f"Google Cloud 인증 설정 오류: {str(e)}")
-            print("의미기반 검색이 비활성화됩니다.")
-            self.credentials = None
-            self.endpoint_url = None
+    def __init__(self, api_enabled: bool = EMBEDDING_API_ENABLED):
+        self._cache = OrderedDict()
+        self._cache_lock = threading.Lock()
+        self._init_lock = threading.Lock()
+        self._initialized = False
+        self._credentials = None
+        self._endpoint_url = None
+        self.api_enabled = api_enabled
+        # 임베딩 차원
+        self.dimensions = 768  # textembedding-gecko의 임베딩 차원
+
+    def _initialize(self):
+        """Google Cloud 인증 설정 (최초 사용 시 1회, import만으로는 API에 접근하지 않음)"""
+        if self._initialized:
+            return
+        with self._init_lock:
+            if self._initialized:
+                return
+            if self.api_enabled:
+                try:
+                    self._credentials = service_account.Credentials.from_service_account_file(
+                        SERVICE_ACCOUNT_KEY_PATH,
+                        scopes=['https://www.googleapis.com/auth/cloud-platform']
+                    )
+
+                    # Vertex AI API 엔드포인트
+                    self._endpoint_url = f"https://{LOCATION}-aiplatform.googleapis.com/v1/projects/{PROJECT_ID}/locations/{LOCATION}/publishers/google/models/textembedding-gecko@003:predict"
+
+                    # API 연결 테스트
+                    self._test_connection()
+
+                except Exception as e:
+                    logger.warning("Google Cloud 인증 설정 오류: %s - 의미기반 검색이 비활성화됩니다.", e)
+                    self._credentials = None
+                    self._endpoint_url = None
+            self._initialized = True
+
+    @property
+    def credentials(self):
+        self._initialize()
+        return self._credentials
+
+    @credentials.setter
+    def credentials(self, value):
+        self._initialized = True
+        self._credentials = value
+
+    @property
+    def endpoint_url(self):
+        self._initialize()
+        return self._endpoint_url
+
+    @endpoint_url.setter
+    def endpoint_url(self, value):
+        self._initialized = True
+        self._endpoint_url = value
     
     def _test_connection(self):
         """API 연결 테스트"""
         try:
             token = self._get_auth_token()
-            print(f"Google Cloud API 연결 성공 (토큰 길이: {len(token)})")
+            logger.info("Google Cloud API 연결 성공 (토큰 길이: %d)", len(token))
         except Exception as e:
-            print(f"Google Cloud API 연결 실패: {str(e)}")
+            logger.warning("Google Cloud API 연결 실패: %s", e)
             raise e
     
     def _get_auth_token(self):
         """인증 토큰 가져오기"""
-        if not self.credentials:
+        if not self._credentials:
             raise Exception("Google Cloud 인증 정보가 없습니다.")
         
-        self.credentials.refresh(Request())
-        return self.credentials.token
+        self._credentials.refresh(Request())
+        return self._credentials.token
     
     def _get_dummy_embedding(self, text: str) -> List[float]:
         """더미 임베딩 생성 (API 연결 실패 시 사용)"""
@@ -73,11 +119,65 @@ class EmbeddingService:
         return embedding
     
     def get_embedding(self, text: str) -> List[float]:
-        """텍스트를 임베딩 벡터로 변환"""
+        """텍스트를 임베딩 벡터로 변환 (LRU 캐시 사용)"""
+        if QUERY_EMBEDDING_CACHE_SIZE <= 0:
+            return self._create_embedding(text)[0]
+
+        with self._cache_lock:
+            embedding = self._cache.get(text)
+            if embedding is not None:
+                self._cache.move_to_end(text)
+        record_cache("embedding", embedding is not None)
+        if embedding is not None:
+            return embedding
+
+        embedding, from_api = self._create_embedding(text)
+        # 더미 임베딩(API 미사용 환경, 타임아웃/오류 시 대체값)은 캐시하지 않음
+        if embedding and from_api:
+            with self._cache_lock:
+                self._cache[text] = embedding
+                if len(self._cache) > QUERY_EMBEDDING_CACHE_SIZE:
+                    self._cache.popitem(last=False)
+        return embedding
+
+    def get_query_embeddings(self, texts: List[str]) -> Dict[str, List[float]]:
+        """
+        여러 쿼리 텍스트의 임베딩 (중복 제거 + LRU 캐시, 캐시에 없는 텍스트만 배치 API 1회 호출)
+        반환: {텍스트: 임베딩}
+        """
+        unique = list(dict.fromkeys(text for text in texts if text))
+        if QUERY_EMBEDDING_CACHE_SIZE <= 0:
+            return dict(zip(unique, self.get_embeddings_batch(unique))) if unique else {}
+
+        embeddings = {}
+        with self._cache_lock:
+            for text in unique:
+                embedding = self._cache.get(text)
+                if embedding is not None:
+                    self._cache.move_to_end(text)
+                    embeddings[text] = embedding
+        for text in unique:
+            record_cache("embedding", text in embeddings)
+
+        missing = [text for text in unique if text not in embeddings]
+        if missing:
+            created, from_api = self._create_embeddings_batch(missing)
+            embeddings.update(zip(missing, created))
+            # 더미 임베딩(API 미사용 환경, 타임아웃/오류 시 대체값)은 캐시하지 않음
+            if from_api:
+                with self._cache_lock:
+                    for text, embedding in zip(missing, created):
+                        self._cache[text] = embedding
+                    while len(self._cache) > QUERY_EMBEDDING_CACHE_SIZE:
+                        self._cache.popitem(last=False)
+        return embeddings
+
+    def _create_embedding(self, text: str) -> Tuple[List[float], bool]:
+        """임베딩 API 호출 (실패 시 더미 임베딩), 반환: (임베딩, API 결과 여부)"""
         try:
             if not self.credentials or not self.endpoint_url:
-                print("Google Cloud API 연결 불가 - 더미 임베딩 사용")
-                return self._get_dummy_embedding(text)
+                logger.debug("Google Cloud API 연결 불가 - 더미 임베딩 사용")
+                return self._get_dummy_embedding(text), False
             
             # 요청 헤더 설정
             headers = {
@@ -95,30 +195,33 @@ class EmbeddingService:
             }
             
             # API 호출 (타임아웃 30초 설정)
-            print(f"임베딩 생성 중: '{text[:50]}...'")
+            logger.debug("임베딩 생성 중: '%s...'", text[:50])
             response = requests.post(self.endpoint_url, headers=headers, json=data, timeout=30)
             response.raise_for_status()
             
             # 응답에서 임베딩 추출
             result = response.json()
             embedding = result["predictions"][0]["embeddings"]["values"]
-            print(f"임베딩 생성 완료 (차원: {len(embedding)})")
-            return embedding
+            logger.debug("임베딩 생성 완료 (차원: %d)", len(embedding))
+            return embedding, True
             
         except requests.exceptions.Timeout:
-            print(f"API 호출 타임아웃 - 더미 임베딩 사용")
-            return self._get_dummy_embedding(text)
+            logger.warning("API 호출 타임아웃 - 더미 임베딩 사용")
+            return self._get_dummy_embedding(text), False
         except Exception as e:
-            print(f"임베딩 생성 오류: {str(e)}")
-            print("더미 임베딩으로 대체합니다.")
-            return self._get_dummy_embedding(text)
+            logger.warning("임베딩 생성 오류: %s - 더미 임베딩으로 대체합니다.", e)
+            return self._get_dummy_embedding(text), False
     
     def get_embeddings_batch(self, texts: List[str]) -> List[List[float]]:
         """여러 텍스트를 배치로 임베딩 벡터로 변환"""
+        return self._create_embeddings_batch(texts)[0]
+
+    def _create_embeddings_batch(self, texts: List[str]) -> Tuple[List[List[float]], bool]:
+        """배치 임베딩 API 호출 (실패 시 더미 임베딩), 반환: (임베딩 목록, API 결과 여부)"""
         try:
             if not self.credentials or not self.endpoint_url:
-                print("Google Cloud API 연결 불가 - 더미 임베딩 사용")
-                return [self._get_dummy_embedding(text) for text in texts]
+                logger.debug("Google Cloud API 연결 불가 - 더미 임베딩 사용")
+                return [self._get_dummy_embedding(text) for text in texts], False
             
             # 요청 헤더 설정
             headers = {
@@ -136,23 +239,22 @@ class EmbeddingService:
             }
             
             # API 호출 (타임아웃 60초 설정)
-            print(f"배치 임베딩 생성 중: {len(texts)}개 텍스트")
+            logger.debug("배치 임베딩 생성 중: %d개 텍스트", len(texts))
             response = requests.post(self.endpoint_url, headers=headers, json=data, timeout=60)
             response.raise_for_status()
             
             # 응답에서 임베딩 추출
             result = response.json()
             embeddings = [prediction["embeddings"]["values"] for prediction in result["predictions"]]
-            print(f"배치 임베딩 생성 완료: {len(embeddings)}개")
-            return embeddings
+            logger.debug("배치 임베딩 생성 완료: %d개", len(embeddings))
+            return embeddings, True
             
         except requests.exceptions.Timeout:
-            print(f"배치 API 호출 타임아웃 - 더미 임베딩 사용")
-            return [self._get_dummy_embedding(text) for text in texts]
+            logger.warning("배치 API 호출 타임아웃 - 더미 임베딩 사용")
+            return [self._get_dummy_embedding(text) for text in texts], False
         except Exception as e:
-            print(f"배치 임베딩 생성 오류: {str(e)}")
-            print("더미 임베딩으로 대체합니다.")
-            return [self._get_dummy_embedding(text) for text in texts]
+            logger.warning("배치 임베딩 생성 오류: %s - 더미 임베딩으로 대체합니다.", e)
+            return [self._get_dummy_embedding(text) for text in texts], False
     
     def cosine_similarity(self, vec1: List[float], vec2: List[float]) -> float:
         """두 벡터 간의 코사인 유사도 계산"""
@@ -171,12 +273,12 @@ class EmbeddingService:
     def semantic_search(self, query: str, documents: List[Dict[str, Any]], 
                        threshold: float = 0.7, top_k: int = 5) -> List[Dict[str, Any]]:
         """의미기반 검색 수행"""
-        print(f"의미기반 검색 시작: '{query}'")
+        logger.debug("의미기반 검색 시작: '%s'", query)
         
         # 쿼리 임베딩 생성
         query_embedding = self.get_embedding(query)
         if not query_embedding:
-            print("쿼리 임베딩 생성 실패")
+            logger.warning("쿼리 임베딩 생성 실패")
             return []
         
         # 각 문서의 special_notes 값들을 임베딩하고 유사도 계산
@@ -200,45 +302,47 @@ class EmbeddingService:
                                     'similarity': similarity
                                 })
         
-        print(f"의미기반 검색 완료: {processed_notes}/{total_notes} 노트 처리, {len(results)}개 결과")
+        logger.debug("의미기반 검색 완료: %d/%d 노트 처리, %d개 결과", processed_notes, total_notes, len(results))
         
         # 유사도 기준으로 정렬하고 top_k 반환
         results.sort(key=lambda x: x['similarity'], reverse=True)
         return results[:top_k]
 
     def add_embeddings_to_document(self, document: Dict[str, Any]) -> Dict[str, Any]:
-        """문서의 special_notes에 임베딩을 추가"""
+        """문서의 special_notes에 임베딩을 추가 (이미 임베딩이 있는 note는 건너뜀 - 재적재 시 재사용분)"""
         if 'special_notes' in document and document['special_notes']:
-            print(f"문서 '{document.get('product_name', 'Unknown')}'의 special_notes 임베딩 생성 중...")
+            logger.debug("문서 '%s'의 special_notes 임베딩 생성 중", document.get('product_name', 'Unknown'))
             
             for note in document['special_notes']:
+                if note.get('embedding'):
+                    continue
                 if 'value' in note and note['value']:
                     try:
                         # 임베딩 생성
                         embedding = self.get_embedding(note['value'])
                         if embedding:
                             note['embedding'] = embedding
-                            print(f"  - 임베딩 생성 완료: '{note['value'][:50]}...'")
+                            logger.debug("임베딩 생성 완료: '%s...'", note['value'][:50])
                         else:
-                            print(f"  - 임베딩 생성 실패: '{note['value'][:50]}...'")
+                            logger.warning("임베딩 생성 실패: '%s...'", note['value'][:50])
                     except Exception as e:
-                        print(f"  - 임베딩 생성 오류: {str(e)}")
+                        logger.warning("임베딩 생성 오류: %s - 더미 임베딩으로 대체합니다.", e)
                         # 더미 임베딩으로 대체
                         note['embedding'] = self._get_dummy_embedding(note['value'])
             
-            print(f"총 {len(document['special_notes'])}개 special_notes 임베딩 완료")
+            logger.debug("총 %d개 special_notes 임베딩 완료", len(document['special_notes']))
         
         return document
     
     def add_embeddings_to_documents_batch(self, documents: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
         """여러 문서의 special_notes에 임베딩을 배치로 추가"""
-        print(f"배치 임베딩 생성 시작: {len(documents)}개 문서")
+        logger.debug("배치 임베딩 생성 시작: %d개 문서", len(documents))
         
         for i, document in enumerate(documents):
-            print(f"문서 {i+1}/{len(documents)} 처리 중...")
+            logger.debug("문서 %d/%d 처리 중", i + 1, len(documents))
             document = self.add_embeddings_to_document(document)
         
-        print("배치 임베딩 생성 완료")
+        logger.debug("배치 임베딩 생성 완료")
         return documents
 
 # 전역 인스턴스 생성
@@ -0,0 +1,94 @@
+from typing import Dict, Any, Iterator, List
+import csv
+import io
+import json
+
+from app.schemas.api.search import SearchRequest
+from app.schemas.common import Document, DocumentSummary
+from app.elasticsearch.client import get_es_client
+from app.elasticsearch.partitions import search_index_for_range
+from app.services.ct_document_search import build_multiple_packing_sets_query
+from app.services.pagination import iter_search_hits
+from app.services.search_service import build_packing_spec_list, build_measurement_ranges, project_source
+
+# 내보내기 형식별 Content-Type
+EXPORT_MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv; charset=utf-8",
+}
+
+def build_export_query(input: SearchRequest, use_semantic_search: bool = True, semantic_threshold: float = 0.7,
+                       index_name: str = "ct_documents") -> Dict[str, Any]:
+    """검색 화면과 같은 조건의 내보내기용 쿼리 생성 (하이라이트 제외)"""
+    query = build_multiple_packing_sets_query(
+        index_name,
+        build_packing_spec_list(input),
+        input.lab_id,
+        input.lab_info,
+        input.optimum_capacity,
+        input.special_note,
+        input.test_date_start,
+        input.test_date_end,
+        use_semantic_search,
+        semantic_threshold,
+        view=input.view,
+        exact_packing_set=input.exact_packing_set,
+        measurements=build_measurement_ranges(input),
+        specific_gravity_tolerance=input.specific_gravity_tolerance,
+        capacity_tolerance=input.capacity_tolerance,
+        passed_tests=input.passed_tests,
+        failed_tests=input.failed_tests
+    )
+    # 내보내기에는 하이라이트가 필요 없음
+    query.pop("highlight", None)
+    return query
+
+def _format_csv_cell(value) -> str:
+    """CSV 셀 값 변환 (객체 목록은 '값/값/값 | 값/값' 형태로 펼침)"""
+    if value is None:
+        return ""
+    if isinstance(value, list):
+        items = []
+        for item in value:
+            if isinstance(item, dict):
+                items.append("/".join(str(v) for k, v in item.items() if v and k != "embedding"))
+            else:
+                items.append(str(item))
+        return " | ".join(items)
+    return str(value)
+
+def iter_ndjson_export(query: Dict[str, Any], index_name: str = "ct_documents",
+                       document_model=Document) -> Iterator[str]:
+    """검색 결과를 ES 페이지 단위로 받아 NDJSON 청크로 반환 (문서는 API 응답과 같은 모델 필드 구성)"""
+    for hits in iter_search_hits(get_es_client(), index_name, query):
+        yield "".join(
+            json.dumps(project_source(hit["_source"], document_model), ensure_ascii=False) + "\n" for hit in hits
+        )
+
+def iter_csv_export(query: Dict[str, Any], columns: List[str], index_name: str = "ct_documents",
+                    document_model=Document) -> Iterator[str]:
+    """검색 결과를 ES 페이지 단위로 받아 CSV 청크로 반환 (엑셀 한글 표시를 위해 BOM 포함)"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+
+    buffer.write("\ufeff")
+    writer.writerow(columns)
+    yield buffer.getvalue()
+
+    for hits in iter_search_hits(get_es_client(), index_name, query):
+        buffer.seek(0)
+        buffer.truncate()
+        for hit in hits:
+            source = project_source(hit["_source"], document_model)
+            writer.writerow([_format_csv_cell(source.get(column)) for column in columns])
+        yield buffer.getvalue()
+
+def export_ct_documents(input: SearchRequest, format: str = "ndjson") -> Iterator[str]:
+    """검색 조건에 맞는 CT 문서 전체를 지정 형식으로 스트리밍"""
+    # 시간 분할 인덱스 사용 시 날짜 범위와 겹치는 분할 인덱스만 조회
+    index_name = search_index_for_range("ct_documents", input.test_date_start, input.test_date_end)
+    query = build_export_query(input, index_name=index_name)
+    document_model = DocumentSummary if input.view == "summary" else Document
+    if format == "csv":
+        return iter_csv_export(query, list(document_model.model_fields), index_name, document_model)
+    return iter_ndjson_export(query, index_name, document_model)
@@ -0,0 +1,186 @@
+from typing import Dict, Any, Iterator, List, Optional
+import base64
+import binascii
+import json
+import logging
+
+from elasticsearch import NotFoundError
+
+from app.observability.tracing import traced_search
+
+logger = logging.getLogger("ct_search.pagination")
+
+# Point-in-time 유지 시간 (다음 페이지 요청까지 허용되는 간격)
+PIT_KEEP_ALIVE = "2m"
+
+# 기본 페이지 크기 / 전체 건수 집계 상한 (Elasticsearch 기본값과 동일)
+DEFAULT_PAGE_SIZE = 20
+DEFAULT_TRACK_TOTAL_HITS = 10000
+
+# 점수 내림차순 + document_id로 동점 정렬 → 페이지 간 순서 고정
+# (첫 페이지는 PIT 없이 검색하므로 PIT 전용인 _shard_doc 대신 keyword 필드 사용, _id 정렬은 ES 8 기본 비활성)
+RELEVANCE_SORT = [
+    {"_score": {"order": "desc"}},
+    {"document_id": {"order": "asc"}}
+]
+
+# 최신순: test_date 내림차순 (날짜 없는 문서는 마지막)
+# 점수를 계산하지 않고, track_total_hits가 제한되어 있으면 세그먼트별로 경쟁력 없는 문서를 건너뜀
+# (인덱스가 ct_document.TEST_DATE_INDEX_SORT로 정렬되어 있으면 세그먼트 앞부분만 읽고 조기 종료)
+RECENT_SORT = [
+    {"test_date": {"order": "desc", "missing": "_last"}},
+    {"document_id": {"order": "asc", "missing": "_last"}}
+]
+
+# SearchRequest.sort 값별 정렬
+SORT_MODES = {
+    "relevance": RELEVANCE_SORT,
+    "recent": RECENT_SORT,
+}
+
+def encode_cursor(state: Dict[str, Any]) -> str:
+    """페이지 상태(PIT ID, search_after 값, 전체 건수)를 불투명 토큰으로 인코딩"""
+    raw = json.dumps(state, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+def decode_cursor(cursor: str) -> Dict[str, Any]:
+    """불투명 토큰을 페이지 상태로 디코딩 (형식 오류 시 ValueError)"""
+    try:
+        padding = "=" * (-len(cursor) % 4)
+        state = json.loads(base64.urlsafe_b64decode(cursor + padding))
+    except (binascii.Error, UnicodeDecodeError, json.JSONDecodeError) as e:
+        raise ValueError(f"잘못된 페이지 토큰입니다: {str(e)}")
+    if not isinstance(state, dict) or "pit" not in state or "after" not in state:
+        raise ValueError("잘못된 페이지 토큰입니다.")
+    return state
+
+def open_point_in_time(es, index_name: str, keep_alive: str = PIT_KEEP_ALIVE) -> str:
+    """인덱스에 대한 point-in-time 생성 후 PIT ID 반환"""
+    response = es.open_point_in_time(index=index_name, keep_alive=keep_alive)
+    return response["id"]
+
+def close_point_in_time(es, pit_id: str):
+    """point-in-time 해제 (이미 만료된 경우 무시)"""
+    try:
+        es.close_point_in_time(body={"id": pit_id})
+    except Exception as e:
+        logger.warning("PIT 해제 오류: %s", e)
+
+def search_page(
+        es,
+        index_name: str,
+        query: Dict[str, Any],
+        size: int = DEFAULT_PAGE_SIZE,
+        cursor: Optional[str] = None,
+        track_total_hits: bool | int = DEFAULT_TRACK_TOTAL_HITS,
+        sort: Optional[List[Dict[str, Any]]] = None,
+        name: str = "페이지 검색",
+        cursor_state: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, Any]:
+    """
+    search_after 기반 페이지 검색
+    - 첫 페이지: PIT 없이 일반 검색 1회 (track_total_hits 설정에 따라 전체 건수 집계),
+      다음 페이지가 있을 때만 PIT를 열어 cursor에 저장 (한 페이지로 끝나는 검색은 ES 요청 1회)
+      PIT는 첫 페이지 검색 직후 시점의 스냅샷이므로, 그 사이 적재/수정된 문서가 정렬 위치를
+      바꾸면 1→2페이지 경계에서만 문서가 중복/누락될 수 있음 (2페이지 이후는 같은 스냅샷)
+      적재는 배치로 드물게 실행되므로 대부분 1페이지로 끝나는 검색마다 PIT를 여닫는 비용 대신 허용
+    - 다음 페이지: cursor의 PIT/search_after 사용, 전체 건수는 cursor에 저장된 값 재사용
+      PIT가 만료되었으면(keep_alive 경과) ValueError
+    - size + 1건을 조회하여 다음 페이지 존재 여부 판단, 마지막 페이지에서 PIT 해제
+    cursor_state: cursor에 함께 저장할 호출 측 상태 (다음 페이지 요청 시 decode_cursor로 조회)
+    반환: {'hits': {'total': {...}, 'hits': [...]}, 'next_cursor': str | None}
+    """
+    state = decode_cursor(cursor) if cursor else None
+
+    body = dict(query)
+    body["sort"] = sort or RELEVANCE_SORT
+    body["size"] = size + 1
+    if state:
+        pit_id = state["pit"]
+        body["pit"] = {"id": pit_id, "keep_alive": PIT_KEEP_ALIVE}
+        body["search_after"] = state["after"]
+        # 전체 건수는 첫 페이지에서 이미 집계됨
+        body["track_total_hits"] = False
+        try:
+            response = traced_search(es, name, body)
+        except NotFoundError as e:
+            raise ValueError("페이지 토큰이 만료되었습니다. 첫 페이지부터 다시 검색하세요.") from e
+        # PIT ID는 검색마다 갱신될 수 있음
+        pit_id = response.get("pit_id", pit_id)
+    else:
+        body["track_total_hits"] = track_total_hits
+        response = traced_search(es, name, body, index=index_name)
+        pit_id = None
+
+    hits = response["hits"]["hits"]
+    page_hits = hits[:size]
+
+    if state:
+        total = {"value": state.get("total", 0), "relation": state.get("relation", "eq")}
+    else:
+        total = response["hits"].get("total") or {"value": len(page_hits), "relation": "gte"}
+
+    next_cursor = None
+    if len(hits) > size:
+        if pit_id is None:
+            pit_id = open_point_in_time(es, index_name)
+        next_cursor = encode_cursor({
+            **(cursor_state or {}),
+            "pit": pit_id,
+            "after": page_hits[-1]["sort"],
+            "total": total["value"],
+            "relation": total["relation"]
+        })
+    elif pit_id is not None:
+        close_point_in_time(es, pit_id)
+
+    return {
+        'hits': {
+            'total': total,
+            'hits': page_hits
+        },
+        'next_cursor': next_cursor
+    }
+
+# 전체 결과 순회 시 페이지 크기 / 정렬 (점수 계산 없이 PIT 내부 문서 순서)
+SCAN_BATCH_SIZE = 500
+SCAN_SORT = [{"_shard_doc": {"order": "asc"}}]
+
+def iter_search_hits(
+        es,
+        index_name: str,
+        query: Dict[str, Any],
+        batch_size: int = SCAN_BATCH_SIZE,
+        sort: Optional[List[Dict[str, Any]]] = None,
+        name: str = "전체 결과 순회"
+    ) -> Iterator[List[Dict[str, Any]]]:
+    """
+    PIT + search_after로 검색 결과 전체를 batch_size 단위로 순회 (hit 목록을 페이지별로 반환)
+    - 한 번에 한 페이지만 메모리에 유지
+    - 순회가 끝나거나 중단되면(generator close) PIT 해제
+    """
+    pit_id = open_point_in_time(es, index_name)
+    search_after = None
+    try:
+        while True:
+            body = dict(query)
+            body["pit"] = {"id": pit_id, "keep_alive": PIT_KEEP_ALIVE}
+            body["sort"] = sort or SCAN_SORT
+            body["size"] = batch_size
+            body["track_total_hits"] = False
+            if search_after is not None:
+                body["search_after"] = search_after
+
+            response = traced_search(es, name, body)
+            pit_id = response.get("pit_id", pit_id)
+            hits = response["hits"]["hits"]
+            if not hits:
+                break
+
+            yield hits
+
+            if len(hits) < batch_size:
+                break
+            search_after = hits[-1]["sort"]
+    finally:
+        close_point_in_time(es, pit_id)
@@ -1,8 +1,111 @@
-from app.schemas.common import Document, PackingInfo
+from typing import List
+import logging
+import os
+from pydantic import TypeAdapter, ValidationError
+from app.schemas.common import Document, DocumentSummary, PackingInfo, nested_model
 from app.services.ct_document_search import *
-from app.schemas.api.search import SearchRequest
+from app.schemas.api.search import SearchRequest, SearchResponse
+from app.observability.metrics import stage
+from app.services.shadow import shadow_runner
 
-def get_ct_document(input: SearchRequest, use_semantic_search: bool = True, semantic_threshold: float = 0.7):
+logger = logging.getLogger("ct_search.service")
+
+# 인덱스 데이터 신뢰 여부 (uploader로만 적재되는 인덱스라면 true로 설정하여 응답 검증 생략)
+TRUST_INDEX_SOURCE = os.getenv("SEARCH_TRUST_INDEX_SOURCE", "false").lower() == "true"
+
+# 문서 목록 일괄 검증용 어댑터 (스키마는 한 번만 생성)
+DOCUMENT_LIST_ADAPTERS = {
+    Document: TypeAdapter(List[Document]),
+    DocumentSummary: TypeAdapter(List[DocumentSummary]),
+}
+
+def validate_documents(hits: list, document_model=Document) -> list:
+    """
+    hit들의 _source를 한 번에 검증하여 문서 모델 목록으로 변환
+    일괄 검증이 실패한 경우에만 hit별로 다시 검증하여 문제 문서를 제외
+    """
+    sources = [hit['_source'] for hit in hits]
+    try:
+        return DOCUMENT_LIST_ADAPTERS[document_model].validate_python(sources)
+    except ValidationError:
+        pass
+
+    documents = []
+    for hit in hits:
+        try:
+            documents.append(document_model.model_validate(hit['_source']))
+        except ValidationError as e:
+            logger.warning("문서 검증 오류 (id=%s): %s", hit.get('_id'), e)
+    return documents
+
+# 모델별 _source 투영 계획 캐시: [(필드명, 기본값, 하위 모델)]
+_projection_plans = {}
+
+def _get_projection_plan(model):
+    plan = _projection_plans.get(model)
+    if plan is None:
+        plan = []
+        for name, field in model.model_fields.items():
+            nested = nested_model(field)
+            default = [] if nested else (None if field.is_required() else field.default)
+            plan.append((name, default, nested))
+        _projection_plans[model] = plan
+    return plan
+
+def project_source(source: dict, model=Document) -> dict:
+    """
+    _source를 모델 필드 구성대로 투영한 응답용 dict 생성 (검증 없음)
+    인덱스 데이터를 신뢰할 수 있을 때 모델 생성/검증 비용 없이 응답을 만들기 위해 사용
+    """
+    projected = {}
+    for name, default, nested in _get_projection_plan(model):
+        value = source.get(name, default)
+        if nested and value:
+            value = [project_source(item, nested) for item in value]
+        projected[name] = value
+    return projected
+
+def get_ct_document_page(input: SearchRequest, use_semantic_search: bool = True, semantic_threshold: float = 0.7,
+                         trusted: bool = TRUST_INDEX_SOURCE):
+    """
+    검색 결과 한 페이지와 전체 건수, 다음 페이지 토큰 반환
+    trusted=True면 모델 검증 없이 SearchResponse 구조의 dict를 반환 (응답 직렬화 전용)
+    """
+    result = search_ct_documents_by_packing_request(input, use_semantic_search, semantic_threshold)
+    if not result:
+        return SearchResponse(results=[], total=0)
+    # 후보 검색 전략 섀도 실행 (SHADOW_STRATEGIES 설정 시, 응답에는 영향 없음)
+    if shadow_runner.enabled:
+        shadow_runner.submit(input, [hit['_id'] for hit in result['hits']['hits']])
+    return build_search_response(input, result, trusted)
+
+def build_search_response(input: SearchRequest, result: dict, trusted: bool = TRUST_INDEX_SOURCE):
+    """
+    검색 결과({'hits': ..., 'next_cursor': ...})를 응답으로 변환
+    trusted=True면 모델 검증 없이 SearchResponse 구조의 dict를 반환 (응답 직렬화 전용)
+    """
+    total = result['hits']['total']
+    if trusted:
+        document_model = DocumentSummary if input.view == "summary" else Document
+        with stage("validation"):
+            results = [project_source(hit['_source'], document_model) for hit in result['hits']['hits']]
+        return {
+            "results": results,
+            "total": total['value'],
+            "total_relation": total['relation'],
+            "next_cursor": result.get('next_cursor')
+        }
+
+    documents = get_ct_document(input, result=result)
+    return SearchResponse(
+        results=documents,
+        total=total['value'],
+        total_relation=total['relation'],
+        next_cursor=result.get('next_cursor')
+    )
+
+def build_packing_spec_list(input: SearchRequest) -> list:
+    """SearchRequest의 포장 정보에서 빈 값을 제외한 실제 검색 조건 목록 생성"""
     # 빈 값들을 필터링하여 실제 검색 조건만 추출
     packing_spec_list = []
     for package in input.packages:
@@ -19,14 +122,23 @@ def get_ct_document(input: SearchRequest, use_semantic_search: bool = True, sema
         # 최소한 하나의 조건이라도 있으면 추가
         if packing_spec:
             packing_spec_list.append(packing_spec)
-    
+    return packing_spec_list
+
+def build_measurement_ranges(input: SearchRequest) -> dict:
+    """SearchRequest의 수치 범위 조건 → {필드: {"gte": ..., "lte": ...}}"""
+    return {field: bounds.model_dump(exclude_none=True) for field, bounds in input.measurements.items()}
+
+def search_ct_documents_by_packing_request(input: SearchRequest, use_semantic_search: bool = True, semantic_threshold: float = 0.7):
+    """SearchRequest를 검색 조건으로 변환하여 여러 포장 정보 세트 검색 실행"""
+    packing_spec_list = build_packing_spec_list(input)
+
     # TODO : 나중에 검색 조건이 없는경우 벨리데이션 조건 붙여야 할 때 붙이기
     # # 검색 조건이 없으면 빈 결과 반환 
     # if not packing_spec_list and not input.lab_id and not input.lab_info and not input.optimum_capacity:
     #     print("검색 조건이 없습니다.")
     #     return []
     
-    result = search_ct_documents_by_multiple_packing_sets(
+    return search_ct_documents_by_multiple_packing_sets(
         "ct_documents", 
         packing_spec_list, 
         input.lab_id, 
@@ -36,31 +148,40 @@ def get_ct_document(input: SearchRequest, use_semantic_search: bool = True, sema
         input.test_date_start,
         input.test_date_end,
         use_semantic_search,
-        semantic_threshold
+        semantic_threshold,
+        view=input.view,
+        exact_packing_set=input.exact_packing_set,
+        measurements=build_measurement_ranges(input),
+        specific_gravity_tolerance=input.specific_gravity_tolerance,
+        capacity_tolerance=input.capacity_tolerance,
+        passed_tests=input.passed_tests,
+        failed_tests=input.failed_tests,
+        size=input.size,
+        cursor=input.cursor,
+        track_total_hits=input.track_total_hits,
+        sort=input.sort
     )
+
+def get_ct_document(input: SearchRequest, use_semantic_search: bool = True, semantic_threshold: float = 0.7, result=None):
+    """검색 결과 hit들을 Document(또는 DocumentSummary) 목록으로 변환 (result 미지정 시 검색 실행)"""
+    if result is None:
+        result = search_ct_documents_by_packing_request(input, use_semantic_search, semantic_threshold)
+    if not result:
+        return []
     hits = result['hits']['hits']
 
-    documents = []
-    for hit in hits:
-        try:
-            doc = Document(**hit['_source'])
-            documents.append(doc)
-        except Exception as e:
-            print("에러 발생 hit:", hit)
-            print("에러 메시지:", e)
+    # 목록 화면(summary)은 경량 모델로 검증
+    document_model = DocumentSummary if input.view == "summary" else Document
+    with stage("validation"):
+        documents = validate_documents(hits, document_model)
 
-    for i, document in enumerate(documents):
-        print("ㅁ   ", document.file_name)
-        print("    실험날짜 :", document.test_date)
-        print("    포장재정보 :", document.packing_info)
-        
-        # 하이라이트 정보 출력
-        if i < len(hits) and 'highlight' in hits[i]:
-            print("🔍 하이라이트된 매칭 부분:")
-            for field, highlights in hits[i]['highlight'].items():
-                print(f"  📝 {field}: {' ... '.join(highlights)}")
-        
-        print("-" * 200)
+    # 검색 결과 상세 로그는 DEBUG 레벨에서만 생성
+    if logger.isEnabledFor(logging.DEBUG):
+        for hit, document in zip(hits, documents):
+            logger.debug(
+                "검색 결과: %s (실험날짜: %s, 포장재정보: %s, 하이라이트: %s)",
+                document.file_name, document.test_date, document.packing_info, hit.get('highlight')
+            )
     return documents
 
 
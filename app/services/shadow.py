@@ -0,0 +1,265 @@
+"""
+검색 전략 섀도 실행
+
+실제 응답과 별개로, 샘플링한 /api/search 요청(첫 페이지)을 후보 전략으로 한 번 더 실행해
+실제 경로(primary) 대비 지연 시간 차이와 결과 겹침을 기록
+- 결과 겹침: 실제 응답의 문서 ID와 비교
+- 지연 시간: 실제 요청 시간에는 PIT/cursor 처리, 응답 변환이 포함되어 후보에 유리하게 치우치므로
+  같은 스레드에서 기준 전략(PRIMARY_STRATEGY, 실제 경로와 같은 쿼리)을 후보 직전에 같은 방식으로 실행해 비교
+- 후보 실행은 별도 스레드 풀에서 처리하며 실패/지연이 응답에 영향을 주지 않음
+- 대기 중인 섀도 작업이 SHADOW_MAX_PENDING을 넘으면 해당 요청은 건너뜀 (부하 시 자동 감속)
+- 비교 지표: Jaccard@k, 공통 문서의 순위 상관계수 (Kendall tau)
+- 결과: /metrics (ct_search_shadow_*), /metrics/shadow (전략별 최근 비교 요약)
+
+설정: SHADOW_STRATEGIES=semantic,hybrid  SHADOW_SAMPLE_RATE=0.05
+"""
+from typing import Any, Callable, Dict, List, Optional
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+import logging
+import os
+import random
+import threading
+import time
+
+from app.schemas.api.search import SearchRequest
+from app.elasticsearch.client import get_es_client
+from app.services.ct_document_search import (
+    build_multiple_packing_sets_query, hybrid_search_special_notes, semantic_search_special_notes
+)
+from app.observability.tracing import traced_search
+from app.observability.metrics import Counter, Histogram, register
+
+logger = logging.getLogger("ct_search.shadow")
+
+# 섀도 실행할 후보 전략 (콤마 구분, 비어 있으면 비활성화)
+SHADOW_STRATEGIES = [s.strip() for s in os.getenv("SHADOW_STRATEGIES", "").split(",") if s.strip()]
+# 섀도 실행할 요청 비율 (0.0 ~ 1.0)
+SHADOW_SAMPLE_RATE = float(os.getenv("SHADOW_SAMPLE_RATE", "0.05"))
+# 결과 비교 대상 상위 문서 수
+SHADOW_TOP_K = int(os.getenv("SHADOW_TOP_K", "10"))
+SHADOW_WORKERS = int(os.getenv("SHADOW_WORKERS", "2"))
+SHADOW_MAX_PENDING = int(os.getenv("SHADOW_MAX_PENDING", "20"))
+# 전략별 보관할 최근 비교 결과 수 (/metrics/shadow 요약용)
+SHADOW_HISTORY = int(os.getenv("SHADOW_HISTORY", "1000"))
+# 지연 시간 비교 기준 전략 (실제 경로와 같은 포장 정보 세트 + 의미기반 사전 검색 쿼리)
+PRIMARY_STRATEGY = "packing_sets_semantic"
+
+SHADOW_RUNS = register(Counter(
+    "ct_search_shadow_runs_total", "섀도 실행 수 (result: ok, error, skipped, dropped)", ("strategy", "result")))
+SHADOW_LATENCY_DELTA = register(Histogram(
+    "ct_search_shadow_latency_delta_seconds", "후보 전략 - 실제 경로 지연 시간 차이 (음수: 후보가 빠름)", ("strategy",),
+    buckets=(-1.0, -0.5, -0.25, -0.1, -0.05, -0.025, -0.01, 0.0, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)))
+SHADOW_JACCARD = register(Histogram(
+    "ct_search_shadow_jaccard", "실제 경로 대비 상위 k개 결과 Jaccard", ("strategy",),
+    buckets=(0.0, 0.1, 0.2, 0.3, 0.4, 0.5, 0.6, 0.7, 0.8, 0.9, 1.0)))
+
+def _hit_ids(response) -> Optional[List[str]]:
+    if not response:
+        return None
+    return [hit['_id'] for hit in response['hits']['hits']]
+
+def _special_note_required(func: Callable[[SearchRequest, int], Optional[List[str]]]):
+    """special_note 기반 전략: 검색어가 없으면 비교 대상 아님"""
+    def run(request: SearchRequest, k: int):
+        if not request.special_note:
+            return None
+        return func(request, k)
+    return run
+
+def _packing_sets_query(request: SearchRequest, k: int, **kwargs) -> Dict[str, Any]:
+    from app.services.search_service import build_packing_spec_list, build_measurement_ranges
+
+    query = build_multiple_packing_sets_query(
+        "ct_documents", build_packing_spec_list(request), request.lab_id, request.lab_info,
+        request.optimum_capacity, test_date_start=request.test_date_start,
+        test_date_end=request.test_date_end, view="ids", exact_packing_set=request.exact_packing_set,
+        measurements=build_measurement_ranges(request), specific_gravity_tolerance=request.specific_gravity_tolerance,
+        capacity_tolerance=request.capacity_tolerance, passed_tests=request.passed_tests,
+        failed_tests=request.failed_tests, **kwargs
+    )
+    query.pop("highlight", None)
+    query["size"] = k
+    return query
+
+def _packing_sets_text(request: SearchRequest, k: int) -> Optional[List[str]]:
+    """포장 정보 세트 + special_note 텍스트(match_phrase) 검색 (의미기반 사전 검색 없음)"""
+    query = _packing_sets_query(request, k, special_note=request.special_note, use_semantic_search=False)
+    return _hit_ids(traced_search(get_es_client(), "섀도: 포장 정보 세트 텍스트", query, index="ct_documents"))
+
+def _packing_sets_semantic(request: SearchRequest, k: int) -> Optional[List[str]]:
+    """포장 정보 세트 + 의미기반 사전 검색 (실제 경로와 같은 방식, 기준선 확인용)"""
+    query = _packing_sets_query(request, k, special_note=request.special_note, use_semantic_search=True)
+    return _hit_ids(traced_search(get_es_client(), "섀도: 포장 정보 세트 의미기반", query, index="ct_documents"))
+
+def _advanced_hybrid(request: SearchRequest, k: int) -> Optional[List[str]]:
+    """
+    samples/elastic_smaple_2.advanced_hybrid_search 방식을 CT 문서에 적용
+    (multi_match fuzziness AUTO + match minimum_should_match 50%를 special_notes nested 안에서 실행)
+    """
+    query = _packing_sets_query(request, k, use_semantic_search=False)
+    if request.special_note:
+        query["query"]["bool"]["must"].append({
+            "nested": {
+                "path": "special_notes",
+                "score_mode": "max",
+                "query": {
+                    "bool": {
+                        "should": [
+                            {
+                                "multi_match": {
+                                    "query": request.special_note,
+                                    "fields": ["special_notes.value^2", "special_notes.key"],
+                                    "type": "best_fields",
+                                    "fuzziness": "AUTO"
+                                }
+                            },
+                            {
+                                "match": {
+                                    "special_notes.value": {
+                                        "query": request.special_note,
+                                        "operator": "or",
+                                        "minimum_should_match": "50%"
+                                    }
+                                }
+                            }
+                        ],
+                        "minimum_should_match": 1
+                    }
+                }
+            }
+        })
+    return _hit_ids(traced_search(get_es_client(), "섀도: 고급 하이브리드", query, index="ct_documents"))
+
+# 후보 전략: (요청, k) → 상위 문서 ID 목록 (None이면 비교 대상 아님)
+STRATEGIES: Dict[str, Callable[[SearchRequest, int], Optional[List[str]]]] = {
+    "packing_sets_text": _packing_sets_text,
+    "packing_sets_semantic": _packing_sets_semantic,
+    "advanced_hybrid": _advanced_hybrid,
+    "semantic": _special_note_required(
+        lambda request, k: _hit_ids(semantic_search_special_notes("ct_documents", request.special_note, top_k=k, view="ids"))),
+    "hybrid": _special_note_required(
+        lambda request, k: _hit_ids(hybrid_search_special_notes("ct_documents", request.special_note, view="ids"))),
+}
+
+def jaccard_at_k(primary: List[str], candidate: List[str], k: int) -> float:
+    """상위 k개 결과 집합의 Jaccard 유사도 (둘 다 비어 있으면 1.0)"""
+    a, b = set(primary[:k]), set(candidate[:k])
+    if not a and not b:
+        return 1.0
+    return len(a & b) / len(a | b)
+
+def rank_correlation(primary: List[str], candidate: List[str], k: int) -> Optional[float]:
+    """상위 k개 중 공통 문서의 순위 일치도 (Kendall tau, 공통 문서가 2개 미만이면 None)"""
+    candidate_rank = {doc_id: i for i, doc_id in enumerate(candidate[:k])}
+    common = [candidate_rank[doc_id] for doc_id in primary[:k] if doc_id in candidate_rank]
+    n = len(common)
+    if n < 2:
+        return None
+    concordant = sum(1 for i in range(n) for j in range(i + 1, n) if common[i] < common[j])
+    pairs = n * (n - 1) // 2
+    return (2 * concordant - pairs) / pairs
+
+class ShadowRunner:
+    """후보 전략 비동기 실행 및 비교 결과 보관"""
+    def __init__(self, strategies: List[str] = None, sample_rate: float = SHADOW_SAMPLE_RATE,
+                 top_k: int = SHADOW_TOP_K, workers: int = SHADOW_WORKERS, max_pending: int = SHADOW_MAX_PENDING):
+        self.strategies = list(SHADOW_STRATEGIES if strategies is None else strategies)
+        unknown = [name for name in self.strategies if name not in STRATEGIES]
+        if unknown:
+            raise ValueError(f"알 수 없는 섀도 전략: {unknown} (사용 가능: {list(STRATEGIES)})")
+        self.sample_rate = sample_rate
+        self.top_k = top_k
+        self.workers = workers
+        self.max_pending = max_pending
+        self._executor = None
+        self._pending = 0
+        self._lock = threading.Lock()
+        self._history: Dict[str, deque] = {name: deque(maxlen=SHADOW_HISTORY) for name in self.strategies}
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.strategies) and self.sample_rate > 0
+
+    def submit(self, request: SearchRequest, primary_ids: List[str]):
+        """실제 검색 결과와 비교할 후보 전략 실행 예약 (샘플링 제외/대기열 초과 시 무시)"""
+        if not self.enabled or request.cursor or random.random() >= self.sample_rate:
+            return
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="shadow")
+            for name in self.strategies:
+                if self._pending >= self.max_pending:
+                    SHADOW_RUNS.inc(strategy=name, result="dropped")
+                    continue
+                self._pending += 1
+                self._executor.submit(self._run, name, request, list(primary_ids))
+
+    def _run(self, name: str, request: SearchRequest, primary_ids: List[str]):
+        try:
+            # 기준 전략과 후보를 같은 조건(단일 검색, 같은 스레드, 연속 실행)으로 측정
+            start = time.perf_counter()
+            STRATEGIES[PRIMARY_STRATEGY](request, self.top_k)
+            primary_seconds = time.perf_counter() - start
+            start = time.perf_counter()
+            candidate_ids = STRATEGIES[name](request, self.top_k)
+            elapsed = time.perf_counter() - start
+            if candidate_ids is None:
+                SHADOW_RUNS.inc(strategy=name, result="skipped")
+                return
+            self.record(name, primary_ids, candidate_ids, primary_seconds, elapsed)
+        except Exception as e:
+            SHADOW_RUNS.inc(strategy=name, result="error")
+            logger.warning("섀도 전략 %s 실행 오류: %s", name, e)
+        finally:
+            with self._lock:
+                self._pending -= 1
+
+    def record(self, name: str, primary_ids: List[str], candidate_ids: List[str],
+               primary_seconds: float, candidate_seconds: float) -> Dict[str, Any]:
+        """비교 결과 1건 기록"""
+        comparison = {
+            "primary_ms": round(primary_seconds * 1000, 2),
+            "candidate_ms": round(candidate_seconds * 1000, 2),
+            "delta_ms": round((candidate_seconds - primary_seconds) * 1000, 2),
+            "jaccard": round(jaccard_at_k(primary_ids, candidate_ids, self.top_k), 4),
+            "rank_correlation": rank_correlation(primary_ids, candidate_ids, self.top_k),
+        }
+        SHADOW_RUNS.inc(strategy=name, result="ok")
+        SHADOW_LATENCY_DELTA.observe(candidate_seconds - primary_seconds, strategy=name)
+        SHADOW_JACCARD.observe(comparison["jaccard"], strategy=name)
+        with self._lock:
+            self._history.setdefault(name, deque(maxlen=SHADOW_HISTORY)).append(comparison)
+        logger.debug("섀도 %s: %s", name, comparison)
+        return comparison
+
+    def report(self) -> Dict[str, Any]:
+        """전략별 최근 비교 요약 (지연 시간 차이 분포, 평균 겹침)"""
+        with self._lock:
+            history = {name: list(items) for name, items in self._history.items()}
+        summary = {}
+        for name, items in history.items():
+            deltas = sorted(item["delta_ms"] for item in items)
+            correlations = [item["rank_correlation"] for item in items if item["rank_correlation"] is not None]
+            summary[name] = {
+                "count": len(items),
+                "delta_ms_p50": _nearest_rank(deltas, 50),
+                "delta_ms_p95": _nearest_rank(deltas, 95),
+                "faster_ratio": round(sum(d < 0 for d in deltas) / len(deltas), 4) if deltas else None,
+                "jaccard_mean": round(sum(item["jaccard"] for item in items) / len(items), 4) if items else None,
+                "rank_correlation_mean": round(sum(correlations) / len(correlations), 4) if correlations else None,
+            }
+        return {
+            "strategies": self.strategies,
+            "sample_rate": self.sample_rate,
+            "top_k": self.top_k,
+            "pending": self._pending,
+            "summary": summary,
+        }
+
+def _nearest_rank(ordered: List[float], p: float) -> Optional[float]:
+    if not ordered:
+        return None
+    return ordered[min(len(ordered) - 1, int(len(ordered) * p / 100))]
+
+shadow_runner = ShadowRunner()
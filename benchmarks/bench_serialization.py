@@ -0,0 +1,144 @@
+"""
+검색 응답 직렬화 벤치마크 (Elasticsearch 불필요)
+
+ES가 반환한 hit 목록을 HTTP 응답 바이트로 만드는 비용을 hit당 시간으로 비교
+- before: hit별 Document(**_source) 생성 → FastAPI response_model 재검증/직렬화 → 표준 json 인코딩
+- validated: TypeAdapter(List[Document]) 일괄 검증 → ModelORJSONResponse (재검증 없이 orjson)
+- trusted: 검증 없이 _source를 모델 필드대로 투영 → ModelORJSONResponse (SEARCH_TRUST_INDEX_SOURCE=true)
+
+실행: python -m benchmarks.bench_serialization --hits 20 100 500 --repeat 50
+"""
+import argparse
+import asyncio
+import json
+import time
+
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_model_field
+
+from app.api.responses import ModelORJSONResponse
+from app.schemas.api.search import SearchResponse
+from app.schemas.common import Document
+from app.services.search_service import validate_documents, project_source
+
+def make_hit(i: int) -> dict:
+    """실제 CT 문서와 비슷한 크기의 검색 hit 생성"""
+    return {
+        "_id": f"DOC{i:08d}",
+        "_score": 1.0,
+        "_source": {
+            "document_id": f"DOC{i:08d}",
+            "summary": "용기별 타입의 특성상 크랙 발생에 대한 안전성 관리가 중요하며...",
+            "file_name": f"[브로우-스크류캡,버진씰]{10000 + i} (CKR) 로얄 프레쉬 수딩 토너-V1-CT연구팀-20220513",
+            "test_no": f"내곡2205-{10000 + i}●",
+            "product_name": "로얄 프레쉬 수딩 토너",
+            "customer": "CKR",
+            "developer": "이승재",
+            "requester": "이주홍",
+            "test_count": "2차(네크규격조정)",
+            "test_quantity": "10ea",
+            "test_date": "2022-05-13T00:00:00",
+            "expected_date": "2022-06-13T00:00:00",
+            "writer": "유태준",
+            "reviewer": "최형",
+            "approver": "강수진",
+            "packing_info": [
+                {"type": "용기", "material": "PET", "spec": "인젝션 브로우 / 내경 : 17.8Φ", "company": "우성"},
+                {"type": "박킹", "material": "PE", "spec": "버진씰타입/ 토출구 2.4Φ / 외경 : 18.5Φ", "company": "우성"},
+                {"type": "캡", "material": "PP", "spec": "스크류캡", "company": "펌텍"}
+            ],
+            "lab_id": "GB1915-DAI",
+            "lab_info": "초록색 무점도 액상\n비중 1.002 - 1.017",
+            "optimum_capacity": "10",
+            "experiment_info": [
+                {"code": f"TMM{200 + j:03d}", "item": "낙하", "period": "1일", "check": "O",
+                 "standard": "1.2m 높이에서 낙하시 파손없음", "result": "적합"}
+                for j in range(12)
+            ],
+            "special_notes": [
+                {"key": "포장재 특이사항", "value": "1. 기밀 관련 \n=>물로 진공감압테스트 시 기밀 양호하나, 용기 네크 및 캡 나사선 규격 관리 철저 요망.\n" * 4},
+                {"key": "상용성 특이사항", "value": "1. 토출 관련 \n=>박킹 토출구 내경 2.4파이로 토출감 양호.\n" * 3},
+                {"key": "생산관련", "value": "1. 토크 관련\n   잠금 토크 약 23.14kgf / 풀림 토크 약 21.19kgf"},
+                {"key": "기타", "value": "특이사항 없음."}
+            ],
+            "download_url": f"https://example.com/downloads/DOC{i:08d}.xlsx"
+        }
+    }
+
+RESPONSE_FIELD = create_model_field("Response_search", SearchResponse, mode="serialization")
+
+def render_before(hits: list) -> bytes:
+    """기존 경로: hit별 모델 생성 + response_model 재검증 + 표준 json"""
+    documents = []
+    for hit in hits:
+        try:
+            documents.append(Document(**hit['_source']))
+        except Exception as e:
+            print("에러 메시지:", e)
+    response = SearchResponse(results=documents, total=len(documents))
+    content = asyncio.run(serialize_response(field=RESPONSE_FIELD, response_content=response))
+    return JSONResponse(content).body
+
+def render_validated(hits: list) -> bytes:
+    """개선 경로: 일괄 검증 + orjson 직접 직렬화"""
+    documents = validate_documents(hits)
+    response = SearchResponse(results=documents, total=len(documents))
+    return ModelORJSONResponse(response).body
+
+def render_trusted(hits: list) -> bytes:
+    """신뢰 경로: 검증 없이 투영 + orjson 직접 직렬화"""
+    response = {
+        "results": [project_source(hit['_source']) for hit in hits],
+        "total": len(hits),
+        "total_relation": "eq",
+        "next_cursor": None
+    }
+    return ModelORJSONResponse(response).body
+
+RENDERERS = {
+    "before": render_before,
+    "validated": render_validated,
+    "trusted": render_trusted,
+}
+
+def measure(render, hits: list, repeat: int) -> float:
+    """hit 1건당 평균 처리 시간(μs)"""
+    render(hits)  # 워밍업
+    start = time.perf_counter()
+    for _ in range(repeat):
+        render(hits)
+    elapsed = time.perf_counter() - start
+    return elapsed / (repeat * len(hits)) * 1e6
+
+def main():
+    parser = argparse.ArgumentParser(description="검색 응답 직렬화 벤치마크")
+    parser.add_argument("--hits", type=int, nargs="+", default=[20, 100, 500], help="페이지당 hit 수")
+    parser.add_argument("--repeat", type=int, default=30, help="반복 횟수")
+    parser.add_argument("--out", help="결과 JSON 저장 경로")
+    args = parser.parse_args()
+
+    # 모든 경로의 응답 내용이 같은지 먼저 확인
+    sample = [make_hit(i) for i in range(3)]
+    expected = json.loads(render_before(sample))
+    for name, render in RENDERERS.items():
+        assert json.loads(render(sample)) == expected, f"{name} 응답 불일치"
+
+    results = []
+    print(f"{'hits':>6} " + " ".join(f"{name + '(us/hit)':>18}" for name in RENDERERS))
+    for count in args.hits:
+        hits = [make_hit(i) for i in range(count)]
+        row = {"hits": count}
+        for name, render in RENDERERS.items():
+            row[f"{name}_us_per_hit"] = round(measure(render, hits, args.repeat), 2)
+        for name in ("validated", "trusted"):
+            row[f"{name}_speedup"] = round(row["before_us_per_hit"] / row[f"{name}_us_per_hit"], 2)
+        results.append(row)
+        print(f"{count:>6} " + " ".join(f"{row[name + '_us_per_hit']:>18.2f}" for name in RENDERERS))
+
+    if args.out:
+        with open(args.out, 'w', encoding='utf-8') as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+
+if __name__ == "__main__":
+    main()
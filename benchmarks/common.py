@@ -0,0 +1,82 @@
+"""
+벤치마크 공용 유틸 (지연 시간 통계, 결과 저장, 기준 결과 비교)
+"""
+from typing import Dict, Any, List, Sequence
+import datetime
+import json
+import platform
+
+def percentile(values: Sequence[float], p: float) -> float:
+    """선형 보간 백분위수 (p: 0~100)"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    k = (len(ordered) - 1) * p / 100
+    low = int(k)
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (k - low)
+
+def summarize_latencies(latencies: Sequence[float], wall_seconds: float, errors: int = 0) -> Dict[str, Any]:
+    """초 단위 지연 시간 목록 → p50/p95/p99(ms), QPS 요약"""
+    count = len(latencies)
+    return {
+        "count": count,
+        "errors": errors,
+        "p50_ms": round(percentile(latencies, 50) * 1000, 2),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 2),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 2),
+        "mean_ms": round(sum(latencies) / count * 1000, 2) if count else 0.0,
+        "qps": round(count / wall_seconds, 2) if wall_seconds else 0.0,
+    }
+
+def write_results(path: str, results: List[Dict[str, Any]], **meta):
+    """결과를 실행 환경 정보와 함께 JSON으로 저장"""
+    payload = {
+        "meta": {
+            "timestamp": datetime.datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+            **meta,
+        },
+        "results": results,
+    }
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(payload, f, ensure_ascii=False, indent=2)
+
+def load_results(path: str) -> List[Dict[str, Any]]:
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)["results"]
+
+# 비교 지표별 방향 (True: 클수록 좋음)
+COMPARE_METRICS = {"p50_ms": False, "p95_ms": False, "p99_ms": False, "qps": True}
+
+def compare_results(baseline: List[Dict[str, Any]], current: List[Dict[str, Any]],
+                    keys: Sequence[str], threshold: float = 0.2,
+                    metrics: Dict[str, bool] = None) -> List[Dict[str, Any]]:
+    """
+    기준 결과 대비 회귀 항목 반환
+    keys: 결과 행을 식별하는 필드 (예: corpus_size, function)
+    threshold: 허용 변화율 (0.2 = 20% 이상 나빠지면 회귀)
+    metrics: 비교할 지표와 방향 (기본: COMPARE_METRICS)
+    """
+    metrics = metrics or COMPARE_METRICS
+    baseline_rows = {tuple(row.get(k) for k in keys): row for row in baseline}
+    regressions = []
+    for row in current:
+        base = baseline_rows.get(tuple(row.get(k) for k in keys))
+        if not base:
+            continue
+        for metric, higher_is_better in metrics.items():
+            before, after = base.get(metric), row.get(metric)
+            if not before or after is None:
+                continue
+            change = (after - before) / before
+            if (-change if higher_is_better else change) > threshold:
+                regressions.append({
+                    **{k: row.get(k) for k in keys},
+                    "metric": metric,
+                    "baseline": before,
+                    "current": after,
+                    "change": round(change, 3),
+                })
+    return regressions
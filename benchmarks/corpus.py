@@ -0,0 +1,184 @@
+"""
+합성 CT 문서 생성기
+
+app/schemas/common.Document 구조(정제된 JSON 형식)를 따르는 현실적인 CT 문서를 생성
+- 한글 포장재 타입/재질/업체, 실험 정보, 특이사항(수치 포함) 포함
+- seed가 같으면 같은 문서가 생성되어 벤치마크 결과를 비교 가능
+"""
+from typing import Dict, Any, Iterator, List
+import datetime
+import random
+
+PACKING_TYPES = ["용기", "캡", "펌프", "튜브", "박킹", "오버캡", "디스펜서", "스포이드", "파우치", "브로우", "마개", "에어리스 용기"]
+MATERIALS = ["PET", "PP", "PE", "PETG", "AS", "ABS", "HDPE", "LDPE", "PCTG", "알루미늄", "유리", "SAN", "NBR", "실리콘"]
+COMPANIES = ["우성", "펌텍", "펌텍코리아", "건동", "대원", "연우", "태성산업", "삼화", "Pumtech", "에이치피씨", "세기", "진우"]
+SPEC_TEMPLATES = [
+    "인젝션 브로우 / 내경 : {inner:.1f}Φ",
+    "버진씰타입/ 토출구 {orifice:.1f}Φ / 외경 : {outer:.1f}Φ",
+    "스크류캡 / 내경 {inner:.1f}파이",
+    "튜브타입 / 내경 : {inner:.1f}Φ",
+    "플립캡 / 토출구 {orifice:.1f}Φ",
+    "{capacity}ml 펌프 / 토출량 {dose:.1f}g",
+    "에어리스 / 외경 {outer:.1f}mm",
+]
+CUSTOMERS = ["CKR", "LG", "아모레", "Interstory", "코스알엑스", "닥터지", "이니스프리", "미샤", "토니모리", "클리오"]
+PRODUCT_PREFIXES = ["로얄", "퓨어", "아쿠아", "비타", "시카", "히알루론", "녹차", "세라마이드", "레티놀", "콜라겐"]
+PRODUCT_MIDDLES = ["프레쉬", "모이스처", "브라이트닝", "리페어", "카밍", "수딩", "딥", "마일드", "물광", "안티에이징"]
+PRODUCT_TYPES = ["토너", "에센스", "크림", "클렌징 폼", "로션", "세럼", "선크림", "앰플", "미스트", "립밤"]
+PEOPLE = ["이승재", "이주홍", "유태준", "최형", "강수진", "김민수", "박지원", "이수진", "박상현", "김태호", "정다은", "한지민"]
+LAB_DESCRIPTIONS = ["초록색 무점도 액상", "흰색 크림상", "투명 젤상", "연노랑 로션상", "무색 투명 액상", "분홍색 점도 액상"]
+EXPERIMENTS = [
+    ("TMM005", "내내압", "원형 10Kg/㎠, 타원 8Kg/㎠, 사각 5Kg/㎠"),
+    ("TMM101", "감압누액", "-0.08MPa 10분 유지시 누액없음"),
+    ("TMM105", "토출량", "{dose:.1f}g ± 0.5g/회"),
+    ("TMM110", "체결토크", "잠금 토크 15~25kgf"),
+    ("TMM202", "낙하", "1.2m 높이에서 낙하시 파손없음"),
+    ("TMM306", "분사각", "분사각 45도 ± 10도: 보통(Normal)"),
+    ("TMM401", "내용물 상용성", "45℃ 4주 보관 후 이상없음"),
+    ("TMM402", "광안정성", "일광 2주 노출 후 변색없음"),
+]
+RESULTS = ["적합"] * 8 + ["부적합", "-"]
+NOTE_TEMPLATES = {
+    "포장재 특이사항": [
+        "1. 기밀 관련 \n=>물로 진공감압테스트 시 기밀 양호하나, 용기 네크 및 캡 나사선 규격 관리 철저 요망.\n=>횡도누액테스트 결과 확인 후 진행 요망.",
+        "1. 포장재 규격 관리 철저 요망.\n 1) 용기 바닥 및 배두께 규격 관리 철저 요망.\n 2) 용기 네크 늘어짐 관리 철저 요망.\n   → 미관리 시 적정용량 충전 불가.",
+        "1. 불투명 용기사용\n=>투명 용기 사용 시 공기층 및 기포 보일 수 있으며, 일광,형광에 노출되어 내용물 변색 우려.",
+        "1. 낙하 등의 외부 충격 발생 시 제품 파손 발생될 수 있으므로 제품 운송 및 보관 시 주의 필요.",
+        "1. 튜브 씰링 관련\n=>열접착 온도 180±5℃ 유지 관리 필요\n=>씰링 강도 테스트 결과 양호",
+    ],
+    "상용성 특이사항": [
+        "1. 토출 관련 \n=>박킹 토출구 내경 {orifice:.1f}파이로 토출감 양호.\n=>버진씰 개봉 시 내압으로 인해 내용물이 소량 튈 수 있음.",
+        "1. 토출 특성\n=>점도에 따른 토출구 직경 최적화 완료\n=>1회 토출량 {dose:.1f}g 기준 충족",
+        "1. 물광 현상 관련\n=>고온 보관 시 내용물 분리 및 물광 현상 발생 가능성 있음.",
+        "1. 기밀 유지를 위해 정립 상태로 제품 이동 및 보관 요망.",
+    ],
+    "생산관련": [
+        "1. 토크 관련\n   잠금 토크 약 {lock:.2f}kgf / 풀림 토크 약 {unlock:.2f}kgf",
+        "1. 충전량 관리\n=>충전기 노즐 직경 12mm 사용\n=>충전 속도 60개/분 권장",
+        "1. 펌핑 테스트 관련\n=>초기 펌핑 {pumps}회 이내 토출 확인",
+    ],
+    "기타": ["특이사항 없음.", "캡 개폐 시 이물감 없음", "-"],
+}
+
+START_DATE = datetime.date(2019, 1, 1)
+DATE_RANGE_DAYS = 365 * 6
+
+def _numbers(rng: random.Random) -> Dict[str, Any]:
+    """스펙/특이사항 템플릿에 들어갈 수치"""
+    inner = rng.uniform(8.0, 40.0)
+    return {
+        "inner": inner,
+        "outer": inner + rng.uniform(0.5, 3.0),
+        "orifice": rng.uniform(0.8, 4.0),
+        "capacity": rng.choice([10, 15, 30, 50, 100, 150, 200]),
+        "dose": rng.uniform(0.2, 3.0),
+        "lock": rng.uniform(10.0, 30.0),
+        "unlock": rng.uniform(8.0, 28.0),
+        "pumps": rng.randint(3, 10),
+    }
+
+def generate_document(i: int, rng: random.Random) -> Dict[str, Any]:
+    """i번째 합성 CT 문서 생성 (refine_json 결과와 같은 형식)"""
+    numbers = _numbers(rng)
+    test_date = START_DATE + datetime.timedelta(days=rng.randrange(DATE_RANGE_DAYS))
+    expected_date = test_date + datetime.timedelta(days=31)
+    customer = rng.choice(CUSTOMERS)
+    product_name = f"{rng.choice(PRODUCT_PREFIXES)} {rng.choice(PRODUCT_MIDDLES)} {rng.choice(PRODUCT_TYPES)}"
+    number = 10000 + i
+
+    packing_info = []
+    company = rng.choice(COMPANIES)
+    for _ in range(rng.randint(1, 4)):
+        # 같은 문서 안에서는 업체가 이어지는 경우가 많음
+        if rng.random() < 0.3:
+            company = rng.choice(COMPANIES)
+        packing_info.append({
+            "type": rng.choice(PACKING_TYPES),
+            "material": rng.choice(MATERIALS),
+            "spec": rng.choice(SPEC_TEMPLATES).format(**numbers),
+            "company": company,
+        })
+
+    experiment_info = []
+    for code, item, standard in rng.sample(EXPERIMENTS, rng.randint(3, len(EXPERIMENTS))):
+        experiment_info.append({
+            "code": code,
+            "item": item,
+            "period": rng.choice(["1일", "1주", "4주"]),
+            "check": rng.choice(["O", "-"]),
+            "standard": standard.format(**numbers),
+            "result": rng.choice(RESULTS),
+        })
+    capacity = rng.choice(["10", "10ml", "30ml", "50 mL", "100ml", "15g", "적정용량 충전 가능"])
+    experiment_info.append({
+        "code": "TMM202", "item": "적정용량", "period": "1일", "check": "O",
+        "standard": "-", "result": capacity,
+    })
+
+    special_notes = [
+        {"key": key, "value": rng.choice(templates).format(**numbers)}
+        for key, templates in NOTE_TEMPLATES.items()
+    ]
+
+    gravity = rng.uniform(0.95, 1.10)
+    return {
+        "document_id": f"DOC{number:012d}",
+        "summary": "#### TODO : 추가 llm 로직으로 업데이트 예정",
+        "file_name": f"[{packing_info[0]['type']}-{packing_info[-1]['type']}]{number} ({customer}) {product_name}-V1-CT연구팀-{test_date:%Y%m%d}",
+        "test_no": f"내곡{test_date:%y%m}-{number}●",
+        "product_name": product_name,
+        "customer": customer,
+        "developer": rng.choice(PEOPLE),
+        "requester": rng.choice(PEOPLE),
+        "test_count": rng.choice(["1차", "2차", "2차(네크규격조정)", "3차"]),
+        "test_quantity": f"{rng.choice([5, 10, 15, 20])}ea",
+        "test_date": test_date.isoformat(),
+        "expected_date": expected_date.isoformat(),
+        "test_result": rng.choice(["적합", "부적합", None]),
+        "test_result_date": expected_date.isoformat(),
+        "writer": rng.choice(PEOPLE),
+        "reviewer": rng.choice(PEOPLE),
+        "approver": rng.choice(PEOPLE),
+        "packing_info": packing_info,
+        "lab_id": f"GB{rng.randint(1000, 9999)}-{rng.choice(['DAI', 'LGH', 'AMR', 'CKR'])}",
+        "lab_info": f"{rng.choice(LAB_DESCRIPTIONS)}\n비중 {gravity:.3f} - {gravity + rng.uniform(0.005, 0.02):.3f}",
+        "optimum_capacity": capacity,
+        "experiment_info": experiment_info,
+        "special_notes": special_notes,
+        "download_url": "#### TODO : 추가 스토리지 업로드 로직으로 업데이트 예정",
+    }
+
+def iter_documents(count: int, seed: int = 42) -> Iterator[Dict[str, Any]]:
+    """합성 문서를 하나씩 생성 (대용량 코퍼스도 메모리에 올리지 않음)"""
+    rng = random.Random(seed)
+    for i in range(count):
+        yield generate_document(i, rng)
+
+def generate_search_params(rng: random.Random) -> Dict[str, Any]:
+    """코퍼스 어휘로 검색 조건 생성 (검색 함수별 인자로 사용)"""
+    start = START_DATE + datetime.timedelta(days=rng.randrange(DATE_RANGE_DAYS - 365))
+    packing_sets = []
+    for _ in range(rng.randint(1, 3)):
+        packing = {"type": rng.choice(PACKING_TYPES), "material": rng.choice(MATERIALS)}
+        if rng.random() < 0.3:
+            packing["company"] = rng.choice(COMPANIES)
+        if rng.random() < 0.2:
+            packing["spec"] = rng.choice(["인젝션 브로우", "버진씰", "스크류캡", "에어리스"])
+        packing_sets.append(packing)
+    note_key = rng.choice(list(NOTE_TEMPLATES))
+    return {
+        "search_text": rng.choice(PRODUCT_MIDDLES + PRODUCT_TYPES + ["펌핑 테스트", "낙하", "기밀"]),
+        "product_name": rng.choice(PRODUCT_TYPES),
+        "customer": rng.choice(CUSTOMERS),
+        "material": rng.choice(MATERIALS),
+        "test_code": rng.choice(EXPERIMENTS)[0],
+        "packing": packing_sets[0],
+        "packing_sets": packing_sets,
+        "special_note": rng.choice(["낙하 실패", "물광 현상", "누출 문제", "토크 관련", "기밀 관련", note_key]),
+        "test_date_start": start.isoformat(),
+        "test_date_end": (start + datetime.timedelta(days=365)).isoformat(),
+    }
+
+def generate_queries(count: int, seed: int = 7) -> List[Dict[str, Any]]:
+    rng = random.Random(seed)
+    return [generate_search_params(rng) for _ in range(count)]
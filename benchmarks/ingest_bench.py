@@ -0,0 +1,350 @@
+"""
+색인 파이프라인 처리량 벤치마크 (오프라인)
+
+합성 CT 엑셀(한글/영문 양식)을 openpyxl로 만든 뒤 실제 파이프라인 단계별로
+처리량(docs/s)과 단계별 메모리 최대치(RSS, 선택 시 tracemalloc)를 측정해 JSON으로 저장
+  excel_to_json → refine_json → process_ct_document_data → embedding → bulk 쓰기
+
+- excel_to_json / refine_json: 파일 단위 작업이라 --workers 개수의 프로세스로 병렬 실행
+- embedding: API 호출 대기 시간이 대부분이라 --workers 개수의 스레드로 실행
+  (기본은 오프라인 더미 임베딩, --live-embedding 지정 시 실제 API)
+- bulk: 기본은 bulk 요청 본문 직렬화까지만 측정, --es-host 지정 시 실제 색인
+  (--memory-es 지정 시 프로세스 내 대체 구현으로 streaming_bulk 경로까지 측정)
+- 메모리: 단계 실행 중 /proc로 RSS(메인 + 하위 프로세스 합계)를 주기적으로 읽어 단계별 최대치(peak_rss_mb) 기록
+  (/proc가 없는 환경은 None, max_rss_mb는 프로세스 시작 이후 누적 최대치)
+
+실행: python -m benchmarks.ingest_bench --docs 1000 --workers 1 4 --variants ko en --out ingest.json
+"""
+from typing import Dict, Any, List, Callable
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+import argparse
+import contextlib
+import json
+import os
+import resource
+import shutil
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+
+from benchmarks.common import write_results, load_results, compare_results
+from benchmarks.corpus import iter_documents
+
+# 양식별 라벨 (refine_json이 인식하는 한글/영문 라벨)
+TEMPLATE_LABELS = {
+    "ko": {
+        "tested_date": "시험일자", "estimated_date": "판정예정일자", "product_name": "제품명", "client": "고객사명",
+        "developer": "개발담당자", "requester": "시험의뢰자", "test_count": "시험의뢰차수", "quantity": "시험의뢰수량",
+        "approval": "결재", "component": "포장재정보", "formula": "처방정보", "lab_no": "처방번호",
+        "bulk_spec": "물성정보", "test_code": "시험코드", "test_item": "시험항목", "result": "결과", "date": "일자",
+        "remarks": "시험 특이사항", "criteria_note": "※ 판정기준은 당사 품질기준에 따름", "end_note": "※ 본 시험 결과는 의뢰 시료에 한함",
+    },
+    "en": {
+        "tested_date": "Tested Date", "estimated_date": "Estimated date", "product_name": "Product Name", "client": "Client",
+        "developer": "Developer", "requester": "Test Requestor", "test_count": "# of test", "quantity": "Quantity for Test",
+        "approval": "Approval", "component": "Component Info.", "formula": "Formula Info.", "lab_no": "Lab No.",
+        "bulk_spec": "Bulk Specification", "test_code": "Test Code", "test_item": "Test Item", "result": "Result", "date": "Date",
+        "remarks": "Test Remarks", "criteria_note": "※ Criteria follow internal quality standards", "end_note": "※ Results apply to the submitted samples only",
+    },
+}
+
+def workbook_rows(document: Dict[str, Any], variant: str) -> List[Dict[int, Any]]:
+    """CT 문서 → 엑셀 행 목록 (열 번호는 excel_to_json의 'Unnamed: N'과 같음)"""
+    label = TEMPLATE_LABELS[variant]
+    rows = [
+        {0: f"Test No : {document['test_no']}"},
+        {0: label["tested_date"], 2: document["test_date"], 6: label["developer"], 7: document["developer"]},
+        {0: label["estimated_date"], 2: document["expected_date"], 6: label["requester"], 7: document["requester"]},
+        {0: label["product_name"], 2: document["product_name"], 6: label["test_count"], 7: document["test_count"]},
+        {0: label["client"], 2: document["customer"], 6: label["quantity"], 7: document["test_quantity"]},
+        {6: label["approval"]},
+        {7: document["writer"], 9: document["reviewer"], 11: document["approver"]},
+        {0: label["component"]},
+    ]
+    rows += [{2: p["type"], 4: p["material"], 6: p["spec"], 8: p["company"]} for p in document["packing_info"]]
+    rows += [
+        {0: label["formula"], 2: label["lab_no"], 6: document["lab_id"]},
+        {2: label["bulk_spec"], 6: document["lab_info"]},
+        {0: label["test_code"], 1: label["test_item"]},
+    ]
+    rows += [
+        {0: e["code"], 1: e["item"], 4: e["period"], 5: e["check"], 6: e["standard"], 12: e["result"]}
+        for e in document["experiment_info"]
+    ]
+    rows += [
+        {0: label["criteria_note"]},
+        {0: label["result"], 1: document["test_result"] or "-", 3: label["date"], 4: document["test_result_date"]},
+        {0: label["remarks"]},
+    ]
+    rows += [{0: n["key"], 2: n["value"]} for n in document["special_notes"]]
+    rows.append({0: label["end_note"]})
+    return rows
+
+def write_workbook(path: str, document: Dict[str, Any], variant: str):
+    from openpyxl import Workbook
+
+    workbook = Workbook()
+    sheet = workbook.active
+    for row_index, row in enumerate(workbook_rows(document, variant), start=1):
+        for column, value in row.items():
+            sheet.cell(row=row_index, column=column + 1, value=value)
+    workbook.save(path)
+
+def synthesize_workbooks(directory: str, count: int, variants: List[str], seed: int) -> List[str]:
+    """합성 CT 엑셀 파일 생성 (양식은 variants 순서대로 번갈아 사용)"""
+    paths = []
+    for i, document in enumerate(iter_documents(count, seed)):
+        variant = variants[i % len(variants)]
+        path = os.path.join(directory, f"{document['file_name']}_{variant}.xlsx")
+        write_workbook(path, document, variant)
+        paths.append(path)
+    return paths
+
+@contextlib.contextmanager
+def quiet():
+    """파이프라인 함수의 파일 단위 print 출력 억제"""
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        yield
+
+def run_excel_to_json(paths):
+    from parser.excel_to_json import excel_to_json
+    with quiet():
+        excel_to_json(*paths)
+
+def run_refine_json(paths):
+    from parser.json_refine_packing import refine_json
+    with quiet():
+        refine_json(*paths)
+
+# 단계 실행 중 RSS 측정 간격 (초)
+RSS_SAMPLE_INTERVAL = 0.05
+
+def max_rss_mb() -> float:
+    """현재 프로세스와 종료된 하위 프로세스 중 최대 RSS, 프로세스 시작 이후 누적 (Linux: KB 단위)"""
+    own = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    children = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+    scale = 1024 * 1024 if sys.platform == "darwin" else 1024
+    return round(max(own, children) / scale, 1)
+
+def _proc_rss_kb(pid: int) -> int:
+    """/proc/<pid>/status의 VmRSS (KB, 프로세스가 종료되었으면 0)"""
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return 0
+
+def _child_pids(pid: int) -> List[int]:
+    """하위 프로세스 목록 (ProcessPoolExecutor 작업 프로세스 포함)"""
+    children = []
+    try:
+        for task in os.listdir(f"/proc/{pid}/task"):
+            with open(f"/proc/{pid}/task/{task}/children") as f:
+                children.extend(int(child) for child in f.read().split())
+    except OSError:
+        pass
+    return children
+
+def current_rss_kb() -> int:
+    """현재 RSS (메인 프로세스 + 하위 프로세스 합계, KB)"""
+    pid = os.getpid()
+    return _proc_rss_kb(pid) + sum(_proc_rss_kb(child) for child in _child_pids(pid))
+
+class RssSampler:
+    """with 블록 실행 중 RSS를 주기적으로 읽어 최대치 기록 (/proc가 없으면 peak_mb는 None)"""
+    def __init__(self, interval: float = RSS_SAMPLE_INTERVAL):
+        self.interval = interval
+        self.available = os.path.exists(f"/proc/{os.getpid()}/status")
+        self.peak_kb = 0
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _sample(self):
+        self.peak_kb = max(self.peak_kb, current_rss_kb())
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self._sample()
+
+    def __enter__(self):
+        if self.available:
+            self._sample()
+            self._thread = threading.Thread(target=self._run, name="rss-sampler", daemon=True)
+            self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        if self._thread is not None:
+            self._stop.set()
+            self._thread.join()
+            self._sample()
+
+    @property
+    def peak_mb(self):
+        return round(self.peak_kb / 1024, 1) if self.available else None
+
+def measure_stage(name: str, docs: int, workers: int, run: Callable[[], Any], trace_memory: bool) -> Dict[str, Any]:
+    """단계 1개 실행 후 처리량/메모리 기록"""
+    if trace_memory:
+        tracemalloc.start()
+    with RssSampler() as rss:
+        start = time.perf_counter()
+        run()
+        elapsed = time.perf_counter() - start
+    row = {
+        "stage": name,
+        "docs": docs,
+        "workers": workers,
+        "seconds": round(elapsed, 3),
+        "docs_per_second": round(docs / elapsed, 1) if elapsed else 0.0,
+        "peak_rss_mb": rss.peak_mb,
+        "max_rss_mb": max_rss_mb(),
+    }
+    if trace_memory:
+        # 하위 프로세스에서 실행된 단계는 메인 프로세스 할당만 잡힘
+        row["python_peak_mb"] = round(tracemalloc.get_traced_memory()[1] / 1024 / 1024, 1)
+        tracemalloc.stop()
+    print(f"{name:<26} workers={workers:<3} {row['docs_per_second']:>10.1f} docs/s  {row['seconds']:>8.2f}s  "
+          f"peak_rss {row['peak_rss_mb']}MB" + (f"  py_peak {row['python_peak_mb']}MB" if trace_memory else ""))
+    return row
+
+def serialize_bulk(actions, chunk_size: int) -> int:
+    """오프라인 bulk 쓰기: streaming_bulk와 같은 단위로 요청 본문(NDJSON) 직렬화"""
+    total = 0
+    lines = []
+    for action in actions:
+        source = action.pop("_source")
+        lines.append(json.dumps({"index": action}, ensure_ascii=False))
+        lines.append(json.dumps(source, ensure_ascii=False))
+        if len(lines) >= chunk_size * 2:
+            total += len(("\n".join(lines) + "\n").encode("utf-8"))
+            lines = []
+    if lines:
+        total += len(("\n".join(lines) + "\n").encode("utf-8"))
+    return total
+
+def run_pipeline(paths: List[str], workdir: str, workers: int, args) -> List[Dict[str, Any]]:
+    """파이프라인 단계별 측정 (workers 1개 설정)"""
+    from app.elasticsearch.uploader import process_ct_document_data
+    from app.services.embedding_service import embedding_service
+
+    json_dir = os.path.join(workdir, f"json_{workers}")
+    refine_dir = os.path.join(workdir, f"refine_{workers}")
+    os.makedirs(json_dir, exist_ok=True)
+    os.makedirs(refine_dir, exist_ok=True)
+    count = len(paths)
+    json_paths = [os.path.join(json_dir, os.path.basename(p).replace('.xlsx', '.json')) for p in paths]
+    refined_paths = [os.path.join(refine_dir, os.path.basename(p)) for p in json_paths]
+
+    def map_files(func, pairs):
+        if workers > 1:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                list(pool.map(func, pairs, chunksize=max(1, len(pairs) // (workers * 4))))
+        else:
+            for pair in pairs:
+                func(pair)
+
+    rows = []
+    rows.append(measure_stage("excel_to_json", count, workers,
+                              lambda: map_files(run_excel_to_json, list(zip(paths, json_paths))), args.tracemalloc))
+    rows.append(measure_stage("refine_json", count, workers,
+                              lambda: map_files(run_refine_json, list(zip(json_paths, refined_paths))), args.tracemalloc))
+
+    refined = []
+    for path in refined_paths:
+        with open(path, 'r', encoding='utf-8') as f:
+            refined.append(json.load(f))
+
+    processed = []
+    rows.append(measure_stage("process_ct_document_data", count, 1,
+                              lambda: processed.extend(process_ct_document_data(doc) for doc in refined), args.tracemalloc))
+
+    def embed_all():
+        with quiet(), ThreadPoolExecutor(max_workers=workers) as pool:
+            list(pool.map(embedding_service.add_embeddings_to_document, processed))
+    rows.append(measure_stage("embedding", count, workers, embed_all, args.tracemalloc))
+
+    def actions():
+        for doc in processed:
+            yield {"_index": args.index, "_id": doc["document_id"], "_source": dict(doc)}
+
+    if args.es_host or args.memory_es:
+        from elasticsearch import helpers
+        from app.elasticsearch.client import get_es_client
+
+        def bulk_write():
+            for ok, item in helpers.streaming_bulk(get_es_client(), actions(), chunk_size=args.chunk_size, raise_on_error=False):
+                if not ok:
+                    print("bulk 오류:", item)
+            get_es_client().indices.refresh(index=args.index)
+    else:
+        def bulk_write():
+            serialize_bulk(actions(), args.chunk_size)
+    rows.append(measure_stage("bulk", count, 1, bulk_write, args.tracemalloc))
+    return rows
+
+def main():
+    parser = argparse.ArgumentParser(description="CT 문서 색인 파이프라인 처리량 벤치마크")
+    parser.add_argument("--docs", type=int, default=500, help="합성 엑셀 파일 수")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 4], help="병렬 작업 수 (여러 개 지정 시 각각 측정)")
+    parser.add_argument("--variants", nargs="+", choices=list(TEMPLATE_LABELS), default=["ko", "en"], help="엑셀 양식")
+    parser.add_argument("--seed", type=int, default=42, help="코퍼스 seed")
+    parser.add_argument("--tracemalloc", action="store_true", help="단계별 파이썬 메모리 최대치 측정 (느려짐)")
+    parser.add_argument("--live-embedding", action="store_true", help="실제 임베딩 API 사용")
+    parser.add_argument("--es-host", help="실제 bulk 색인할 Elasticsearch 주소 (미지정 시 직렬화만 측정)")
+    parser.add_argument("--memory-es", action="store_true", help="프로세스 내 Elasticsearch 대체 구현에 bulk 색인")
+    parser.add_argument("--index", default="ct_documents_ingest_bench", help="bulk 대상 인덱스")
+    parser.add_argument("--chunk-size", type=int, default=500, help="bulk 요청당 문서 수")
+    parser.add_argument("--workdir", help="중간 파일 디렉터리 (기본: 임시 디렉터리, 종료 시 삭제)")
+    parser.add_argument("--out", default="ingest_bench.json", help="결과 JSON 저장 경로")
+    parser.add_argument("--baseline", help="비교할 이전 결과 JSON")
+    parser.add_argument("--threshold", type=float, default=0.2, help="회귀 판정 변화율")
+    args = parser.parse_args()
+
+    # 클라이언트/임베딩 설정은 환경변수로 읽으므로 app 모듈 import 전에 설정 (오프라인 모드에서는 연결하지 않음)
+    os.environ["ELASTICSEARCH_HOST"] = args.es_host or os.getenv("ELASTICSEARCH_HOST") or "http://localhost:9200"
+    if args.memory_es:
+        os.environ["ELASTICSEARCH_BACKEND"] = "memory"
+    if not args.live_embedding:
+        # 인증 정보가 있어도 API를 호출하지 않고 서비스의 더미 임베딩 경로 사용
+        os.environ["EMBEDDING_API_ENABLED"] = "false"
+    if args.es_host or args.memory_es:
+        from app.elasticsearch.client import get_es_client
+        from app.elasticsearch.indices.ct_document import create_ct_document_index_with_mapping
+        create_ct_document_index_with_mapping(get_es_client(), args.index)
+
+    workdir = args.workdir or tempfile.mkdtemp(prefix="ingest_bench_")
+    excel_dir = os.path.join(workdir, "excel")
+    os.makedirs(excel_dir, exist_ok=True)
+    try:
+        start = time.perf_counter()
+        paths = synthesize_workbooks(excel_dir, args.docs, args.variants, args.seed)
+        print(f"합성 엑셀 {len(paths)}개 생성: {time.perf_counter() - start:.1f}초 ({workdir})")
+
+        results = []
+        for workers in args.workers:
+            results.extend(run_pipeline(paths, workdir, workers, args))
+    finally:
+        if not args.workdir:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    write_results(args.out, results, docs=args.docs, variants=args.variants, seed=args.seed,
+                  embedding="live" if args.live_embedding else "dummy", bulk="es" if args.es_host else "memory" if args.memory_es else "serialize")
+    print(f"결과 저장: {args.out}")
+
+    if args.baseline:
+        regressions = compare_results(load_results(args.baseline), results, keys=("stage", "workers"),
+                                      threshold=args.threshold, metrics={"docs_per_second": True})
+        for item in regressions:
+            print(f"회귀: {item['stage']} workers={item['workers']} {item['metric']} "
+                  f"{item['baseline']} → {item['current']} ({item['change']:+.0%})")
+        if regressions:
+            sys.exit(1)
+
+if __name__ == "__main__":
+    main()
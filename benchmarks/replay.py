@@ -0,0 +1,162 @@
+"""
+캡처한 검색 요청 재생 부하 테스트
+
+app/observability/capture.py가 기록한 JSONL을 읽어 대상 /api/search로 다시 요청
+- 원래 요청 간격을 --scales 배율로 압축해 재생 (2 = 2배 빠르게), 배율마다 한 단계씩 측정
+- --scales max: 간격 무시, --concurrency 한도 안에서 최대한 빠르게 요청 (QPS 상한 측정)
+- 지연 시간은 예정 전송 시각 기준 (동시 실행 한도로 밀린 대기 시간 포함)
+- 단계별 p50/p95/p99, 오류율(상태 코드별), 목표/달성 QPS를 출력하고
+  오류율이 --max-error-rate 이하인 단계 중 최대 달성 QPS를 QPS 상한으로 보고
+
+실행 예:
+  QUERY_CAPTURE_PATH=logs/search_capture.jsonl uvicorn app.main:app   # 트래픽 수집
+  python -m benchmarks.replay --capture logs/search_capture.jsonl --target http://localhost:8000 \\
+      --scales 1 2 4 8 max --concurrency 32 --out replay.json
+"""
+from typing import Dict, Any, List, Optional
+import argparse
+import asyncio
+import glob
+import json
+import sys
+
+import httpx
+
+from benchmarks.common import summarize_latencies, write_results, load_results, compare_results
+
+def capture_files(path: str) -> List[str]:
+    """회전된 백업(path.N, 숫자가 클수록 오래됨)을 포함해 오래된 순서로 정렬"""
+    backups = [p for p in glob.glob(glob.escape(path) + ".*") if p.rsplit(".", 1)[1].isdigit()]
+    backups.sort(key=lambda p: int(p.rsplit(".", 1)[1]), reverse=True)
+    return backups + glob.glob(glob.escape(path))
+
+def load_capture(path: str, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+    """캡처 기록을 시간순으로 로드 (깨진 줄은 건너뜀)"""
+    records = []
+    for file_path in capture_files(path):
+        with open(file_path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                if "ts" in record and "request" in record:
+                    records.append(record)
+    records.sort(key=lambda r: r["ts"])
+    return records[:limit] if limit else records
+
+async def replay_step(client: httpx.AsyncClient, url: str, records: List[Dict[str, Any]],
+                      scale: Optional[float], concurrency: int) -> Dict[str, Any]:
+    """
+    캡처 기록 1회 재생
+    scale: 간격 압축 배율 (None이면 간격 없이 최대 속도)
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies: List[float] = []
+    statuses: Dict[str, int] = {}
+    loop = asyncio.get_running_loop()
+    first_ts = records[0]["ts"]
+    start = loop.time()
+
+    async def send(record: Dict[str, Any]):
+        scheduled = start + (record["ts"] - first_ts) / scale if scale else None
+        if scheduled is not None:
+            await asyncio.sleep(max(0.0, scheduled - loop.time()))
+        async with semaphore:
+            sent = scheduled if scheduled is not None else loop.time()
+            try:
+                response = await client.post(url, json=record["request"])
+                status = str(response.status_code)
+            except httpx.HTTPError as e:
+                status = type(e).__name__
+            elapsed = loop.time() - sent
+        statuses[status] = statuses.get(status, 0) + 1
+        if status.isdigit() and int(status) < 400:
+            latencies.append(elapsed)
+
+    if scale:
+        await asyncio.gather(*(send(record) for record in records))
+    else:
+        # 최대 속도: 동시 실행 수만큼만 태스크를 유지 (대기 중 태스크가 지연 시간에 포함되지 않도록)
+        queue = asyncio.Queue()
+        for record in records:
+            queue.put_nowait(record)
+
+        async def worker():
+            while not queue.empty():
+                await send(queue.get_nowait())
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+    wall = loop.time() - start
+
+    errors = len(records) - len(latencies)
+    row = summarize_latencies(latencies, wall, errors=errors)
+    span = (records[-1]["ts"] - first_ts) / scale if scale else 0.0
+    row.update({
+        "scale": scale or "max",
+        "concurrency": concurrency,
+        "requests": len(records),
+        "error_rate": round(errors / len(records), 4),
+        "target_qps": round(len(records) / span, 2) if span else None,
+        "achieved_qps": round(len(records) / wall, 2) if wall else 0.0,
+        "statuses": statuses,
+    })
+    return row
+
+async def run(args) -> List[Dict[str, Any]]:
+    records = load_capture(args.capture, args.limit)
+    if not records:
+        raise SystemExit(f"캡처 기록이 없습니다: {args.capture}")
+    print(f"캡처 {len(records)}건, 원래 구간 {records[-1]['ts'] - records[0]['ts']:.1f}초")
+
+    url = args.target.rstrip("/") + args.path
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    results = []
+    async with httpx.AsyncClient(timeout=args.timeout, limits=limits) as client:
+        for scale in args.scales:
+            row = await replay_step(client, url, records, None if scale == "max" else float(scale), args.concurrency)
+            results.append(row)
+            print(f"scale {str(row['scale']):>5}  목표 {row['target_qps'] or '-':>8} qps  달성 {row['achieved_qps']:>8.1f} qps  "
+                  f"p50 {row['p50_ms']:>8.2f}ms  p95 {row['p95_ms']:>8.2f}ms  p99 {row['p99_ms']:>8.2f}ms  "
+                  f"오류율 {row['error_rate']:.2%} {row['statuses']}")
+    return results
+
+def qps_ceiling(results: List[Dict[str, Any]], max_error_rate: float) -> Optional[float]:
+    """오류율 한도 안에서 달성한 최대 QPS"""
+    passing = [row["achieved_qps"] for row in results if row["error_rate"] <= max_error_rate]
+    return max(passing) if passing else None
+
+def main():
+    parser = argparse.ArgumentParser(description="캡처한 검색 요청 재생 부하 테스트")
+    parser.add_argument("--capture", required=True, help="캡처 JSONL 경로 (회전된 path.N 포함)")
+    parser.add_argument("--target", default="http://localhost:8000", help="대상 서버 주소")
+    parser.add_argument("--path", default="/api/search", help="요청 경로")
+    parser.add_argument("--scales", nargs="+", default=["1"], help="재생 속도 배율 (max: 간격 없이 최대 속도)")
+    parser.add_argument("--concurrency", type=int, default=16, help="동시 요청 한도")
+    parser.add_argument("--limit", type=int, help="재생할 최대 요청 수 (앞에서부터)")
+    parser.add_argument("--timeout", type=float, default=30.0, help="요청 타임아웃(초)")
+    parser.add_argument("--max-error-rate", type=float, default=0.01, help="QPS 상한 판정 시 허용 오류율")
+    parser.add_argument("--out", default="replay.json", help="결과 JSON 저장 경로")
+    parser.add_argument("--baseline", help="비교할 이전 결과 JSON")
+    parser.add_argument("--threshold", type=float, default=0.2, help="회귀 판정 변화율")
+    args = parser.parse_args()
+
+    results = asyncio.run(run(args))
+    ceiling = qps_ceiling(results, args.max_error_rate)
+    print(f"QPS 상한 (오류율 {args.max_error_rate:.1%} 이하): {ceiling if ceiling is not None else '-'}")
+
+    write_results(args.out, results, target=args.target, capture=args.capture,
+                  concurrency=args.concurrency, qps_ceiling=ceiling)
+    print(f"결과 저장: {args.out}")
+
+    if args.baseline:
+        regressions = compare_results(load_results(args.baseline), results, keys=("scale", "concurrency"),
+                                      threshold=args.threshold,
+                                      metrics={"p95_ms": False, "p99_ms": False, "achieved_qps": True})
+        for item in regressions:
+            print(f"회귀: scale={item['scale']} {item['metric']} "
+                  f"{item['baseline']} → {item['current']} ({item['change']:+.0%})")
+        if regressions:
+            sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,178 @@
+"""
+검색 벤치마크 (합성 CT 코퍼스)
+
+코퍼스 크기별로 인덱스를 만들고 ct_document_search.py의 검색 함수마다
+p50/p95/p99 지연 시간과 QPS를 측정해 JSON으로 저장
+
+실행 예:
+  # 로컬 ES 컨테이너 (docker run -p 9200:9200 -e discovery.type=single-node ...)
+  python -m benchmarks.search_bench --host http://localhost:9200 --sizes 10000 100000 1000000 --out search.json
+  # 이전 결과와 비교 (p95/QPS가 20% 이상 나빠지면 종료 코드 1)
+  python -m benchmarks.search_bench --sizes 10000 --baseline search.json
+  # ES 없이 프로세스 내 대체 구현으로 실행 (쿼리 구성/후처리 비용 확인용, 절대 수치는 ES와 비교 불가)
+  python -m benchmarks.search_bench --backend memory --sizes 1000 --queries 50
+"""
+from typing import Dict, Any, Callable, List
+from concurrent.futures import ThreadPoolExecutor
+import argparse
+import os
+import sys
+import time
+
+from benchmarks.common import summarize_latencies, write_results, load_results, compare_results
+from benchmarks.corpus import iter_documents, generate_queries
+
+def build_search_cases() -> Dict[str, Callable[[str, Dict[str, Any]], Any]]:
+    """검색 함수별 호출 방법 (인덱스 이름, 코퍼스 검색 조건) → ES 응답"""
+    from app.services import ct_document_search as search
+
+    return {
+        "full_text": lambda index, p: search.full_text_search_ct_documents(index, p["search_text"]),
+        "advanced": lambda index, p: search.advanced_search_ct_documents(index, {
+            "product_name": p["product_name"],
+            "material": p["material"],
+            "test_code": p["test_code"],
+            "start_date": p["test_date_start"],
+            "end_date": p["test_date_end"],
+        }),
+        "statistics": lambda index, p: search.get_ct_document_statistics(index),
+        "packing_info": lambda index, p: search.search_ct_documents_by_packing_info(
+            index, p["packing"]["type"], p["packing"]["material"],
+            p["packing"].get("spec"), p["packing"].get("company")),
+        "semantic": lambda index, p: search.semantic_search_special_notes(index, p["special_note"]),
+        "hybrid": lambda index, p: search.hybrid_search_special_notes(index, p["special_note"]),
+        "multiple_packing_sets": lambda index, p: search.search_ct_documents_by_multiple_packing_sets(
+            index, p["packing_sets"], special_note=p["special_note"],
+            test_date_start=p["test_date_start"], test_date_end=p["test_date_end"]),
+        "multiple_packing_sets_text": lambda index, p: search.search_ct_documents_by_multiple_packing_sets(
+            index, p["packing_sets"], special_note=p["special_note"], use_semantic_search=False),
+        "multiple_packing_sets_recent": lambda index, p: search.search_ct_documents_by_multiple_packing_sets(
+            index, p["packing_sets"], special_note=p["special_note"], use_semantic_search=False, sort="recent"),
+    }
+
+def iter_bulk_actions(index_name: str, count: int, seed: int, with_embeddings: bool):
+    """합성 문서 → 색인용 bulk action (uploader와 같은 전처리 사용)"""
+    from app.elasticsearch.uploader import process_ct_document_data
+    from app.services.embedding_service import embedding_service
+
+    for document in iter_documents(count, seed):
+        processed = process_ct_document_data(document)
+        if with_embeddings:
+            # 오프라인 측정을 위해 API 대신 결정적인 더미 임베딩 사용 (쿼리 쪽도 --live-embedding 없으면 같은 방식)
+            for note in processed["special_notes"]:
+                note["embedding"] = embedding_service._get_dummy_embedding(note["value"])
+        yield {"_index": index_name, "_id": processed["document_id"], "_source": processed}
+
+def load_corpus(es, index_name: str, count: int, seed: int, with_embeddings: bool, chunk_size: int) -> Dict[str, Any]:
+    """인덱스 재생성 후 합성 코퍼스 색인"""
+    from elasticsearch import helpers
+    from app.elasticsearch.indices.ct_document import create_ct_document_index_with_mapping
+
+    create_ct_document_index_with_mapping(es, index_name)
+    start = time.perf_counter()
+    errors = 0
+    for ok, _ in helpers.streaming_bulk(
+        es, iter_bulk_actions(index_name, count, seed, with_embeddings),
+        chunk_size=chunk_size, raise_on_error=False
+    ):
+        errors += not ok
+    es.indices.refresh(index=index_name)
+    elapsed = time.perf_counter() - start
+    return {"docs": count, "errors": errors, "seconds": round(elapsed, 2), "docs_per_second": round(count / elapsed, 1)}
+
+def run_case(run: Callable, index_name: str, queries: List[Dict[str, Any]], warmup: int, concurrency: int) -> Dict[str, Any]:
+    """검색 1종을 쿼리 목록으로 반복 실행 (앞 warmup개는 워밍업, None 반환/예외는 오류로 집계)"""
+    for params in queries[:warmup]:
+        run(index_name, params)
+    queries = queries[warmup:]
+
+    def timed(params):
+        start = time.perf_counter()
+        try:
+            ok = run(index_name, params) is not None
+        except Exception:
+            ok = False
+        return time.perf_counter() - start, ok
+
+    start = time.perf_counter()
+    if concurrency > 1:
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            outcomes = list(pool.map(timed, queries))
+    else:
+        outcomes = [timed(params) for params in queries]
+    wall = time.perf_counter() - start
+
+    latencies = [elapsed for elapsed, ok in outcomes if ok]
+    return summarize_latencies(latencies, wall, errors=len(outcomes) - len(latencies))
+
+def main():
+    parser = argparse.ArgumentParser(description="합성 CT 코퍼스 검색 벤치마크")
+    parser.add_argument("--host", help="Elasticsearch 주소 (기본: ELASTICSEARCH_HOST 환경변수)")
+    parser.add_argument("--backend", choices=["elasticsearch", "memory"], default="elasticsearch",
+                        help="검색 대상 (memory: 프로세스 내 대체 구현)")
+    parser.add_argument("--live-embedding", action="store_true", help="쿼리 임베딩에 실제 API 사용")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10000, 100000, 1000000], help="코퍼스 문서 수")
+    parser.add_argument("--functions", nargs="+", help="측정할 검색 함수 (기본: 전체)")
+    parser.add_argument("--queries", type=int, default=200, help="함수별 측정 쿼리 수")
+    parser.add_argument("--warmup", type=int, default=20, help="함수별 워밍업 쿼리 수")
+    parser.add_argument("--concurrency", type=int, default=1, help="동시 실행 수 (1이면 순차 실행)")
+    parser.add_argument("--seed", type=int, default=42, help="코퍼스 seed")
+    parser.add_argument("--index-prefix", default="ct_documents_bench", help="벤치마크 인덱스 이름 접두사")
+    parser.add_argument("--reuse-index", action="store_true", help="이미 색인된 벤치마크 인덱스 재사용")
+    parser.add_argument("--keep-index", action="store_true", help="측정 후 인덱스 삭제하지 않음")
+    parser.add_argument("--no-embeddings", action="store_true", help="special_notes 임베딩 없이 색인")
+    parser.add_argument("--chunk-size", type=int, default=1000, help="bulk 요청당 문서 수")
+    parser.add_argument("--out", default="search_bench.json", help="결과 JSON 저장 경로")
+    parser.add_argument("--baseline", help="비교할 이전 결과 JSON")
+    parser.add_argument("--threshold", type=float, default=0.2, help="회귀 판정 변화율")
+    args = parser.parse_args()
+
+    # 클라이언트/임베딩 설정은 환경변수로 읽으므로 app 모듈 import 전에 설정
+    if args.host:
+        os.environ["ELASTICSEARCH_HOST"] = args.host
+    os.environ["ELASTICSEARCH_BACKEND"] = args.backend
+    if not args.live_embedding:
+        os.environ["EMBEDDING_API_ENABLED"] = "false"
+    from app.elasticsearch.client import get_es_client
+
+    es = get_es_client()
+    cases = build_search_cases()
+    if args.functions:
+        cases = {name: cases[name] for name in args.functions}
+    queries = generate_queries(args.warmup + args.queries)
+
+    results = []
+    for size in args.sizes:
+        index_name = f"{args.index_prefix}_{size}"
+        if args.reuse_index and es.indices.exists(index=index_name):
+            load = None
+        else:
+            load = load_corpus(es, index_name, size, args.seed, not args.no_embeddings, args.chunk_size)
+            print(f"[{size}] 색인 완료: {load['seconds']}초 ({load['docs_per_second']} docs/s, 오류 {load['errors']})")
+
+        for name, run in cases.items():
+            row = {"corpus_size": size, "function": name, "concurrency": args.concurrency}
+            row.update(run_case(run, index_name, queries, args.warmup, args.concurrency))
+            if load:
+                row["load_docs_per_second"] = load["docs_per_second"]
+            results.append(row)
+            print(f"[{size}] {name:<28} p50 {row['p50_ms']:>8.2f}ms  p95 {row['p95_ms']:>8.2f}ms  "
+                  f"p99 {row['p99_ms']:>8.2f}ms  {row['qps']:>8.1f} qps  오류 {row['errors']}")
+
+        if not args.keep_index:
+            es.indices.delete(index=index_name)
+
+    write_results(args.out, results, seed=args.seed, queries=args.queries, concurrency=args.concurrency, backend=args.backend)
+    print(f"결과 저장: {args.out}")
+
+    if args.baseline:
+        regressions = compare_results(load_results(args.baseline), results,
+                                      keys=("corpus_size", "function", "concurrency"), threshold=args.threshold)
+        for item in regressions:
+            print(f"회귀: {item['corpus_size']} {item['function']} {item['metric']} "
+                  f"{item['baseline']} → {item['current']} ({item['change']:+.0%})")
+        if regressions:
+            sys.exit(1)
+
+if __name__ == "__main__":
+    main()
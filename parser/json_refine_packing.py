@@ -2,6 +2,7 @@ import os
 import json
 import pandas as pd
 import datetime
+import uuid
 
 INPUT_DIR = os.path.join('data', 'json')
 OUTPUT_DIR = os.path.join('data', 'refine')
@@ -90,19 +91,19 @@ def convert_excel_date_to_string(value):
     # 변환 실패 시 원본 반환
     return str_value
 
-def generate_uuid():
+# 문서 ID 네임스페이스 (값을 바꾸면 모든 문서 ID가 바뀌므로 고정)
+DOCUMENT_ID_NAMESPACE = uuid.UUID('6f1c2a4e-9d3b-5e7f-8a1c-2b4d6e8f0a13')
+
+def generate_document_id(test_no, file_name):
     """
-    UUID를 생성하여 문자열로 반환하는 함수
-    
+    시험번호(없으면 파일명)로 결정적인 문서 ID를 생성하는 함수
+    같은 보고서를 다시 가공해도 같은 ID가 나와 재적재 시 기존 문서를 갱신
+
     Returns:
-        str: 생성된 UUID 문자열
+        str: 'DOC' + UUID5 (대문자, '-' 제거)
     """
-    import uuid
-    # UUID에서 '-' 제거하고 'DOC' 프리픽스 추가
-    uuid_str = str(uuid.uuid4()).upper()
-    uuid_str = uuid_str.replace('-', '')
-    uuid_str = 'DOC' + uuid_str
-    return uuid_str
+    key = (test_no or '').strip() or file_name
+    return 'DOC' + uuid.uuid5(DOCUMENT_ID_NAMESPACE, key).hex.upper()
 
 # 의미있는 정보만 추출하는 함수
 def refine_json(input_path, output_path):
@@ -313,7 +314,7 @@ def refine_json(input_path, output_path):
 
     # packing_info 리스트를 'packing_info'라는 상위 키로 감싸서 json으로 저장
     result = {
-        'document_id': generate_uuid(),
+        'document_id': generate_document_id(test_no, file_name),
         'summary': '#### TODO : 추가 llm 로직으로 업데이트 예정',
         'file_name': file_name,
         'test_no': test_no,